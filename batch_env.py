@@ -0,0 +1,420 @@
+"""Mange Snake-runder på én gang i NumPy-arrays (bot-træning og balancering).
+
+BatchEnv kører N uafhængige runder i takt: ét step() flytter alle slanger,
+tjekker kollisioner, spiser, spawner og flytter hunde med array-operationer
+over alle N spil i stedet for en Python-løkke per Game. Reglerne følger
+Simulation.step i snake_sim.py med to forenklinger: kanoner og støvsuger er
+ikke med (en runde starter uden pengepung), og hundene går grådigt mod
+nærmeste slangehoved (Manhattan-afstand) i stedet for ad BFS-flowfeltet.
+
+Kræver numpy - det gør spillet selv ikke (Pygbag)."""
+import random
+
+import numpy as np
+
+from snake_sim import (
+    GRID_W, GRID_H, DIFFICULTIES, UP, DOWN, LEFT, RIGHT,
+    FOOD_NORMAL, FOOD_BONUS, FOOD_INVINCIBLE, FOOD_MEGA, MEGA_FOOD_INTERVAL,
+    MONEY_BILL_VALUE, ENEMY_SPAWN, RUIN_COUNTS,
+    FoodItem, Coin, MoneyBill, EnemyDog,
+    generate_safe_zones, generate_ruins, edge_cells,
+)
+
+# --- Konstanter ---
+# Handling i betyder DIRECTIONS[i]; den modsatte retning er i ^ 1
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIR_DX = np.array([dx for dx, _ in DIRECTIONS], dtype=np.int32)
+DIR_DY = np.array([dy for _, dy in DIRECTIONS], dtype=np.int32)
+NO_TURN = -1  # handling: behold retningen
+
+# Koder i items-griddet (0 = tom celle)
+CELL_NORMAL = 1
+CELL_BONUS = 2
+CELL_INVINCIBLE = 3
+CELL_MEGA = 4
+CELL_COIN = 5
+CELL_BILL = 6
+CELL_FOOD_TYPES = {CELL_NORMAL: FOOD_NORMAL, CELL_BONUS: FOOD_BONUS,
+                   CELL_INVINCIBLE: FOOD_INVINCIBLE, CELL_MEGA: FOOD_MEGA}
+
+# Point og levetid per kode hentes fra tingene selv, så reglerne kun står ét sted
+CELL_POINTS = np.zeros(CELL_BILL + 1, dtype=np.int32)
+CELL_LIFETIME = np.zeros(CELL_BILL + 1, dtype=np.int32)  # 0 = forsvinder aldrig
+for _code, _food_type in CELL_FOOD_TYPES.items():
+    _food = FoodItem(_food_type, None)
+    CELL_POINTS[_code] = _food.points
+    CELL_LIFETIME[_code] = _food.lifetime or 0
+CELL_LIFETIME[CELL_COIN] = Coin(None).lifetime
+CELL_LIFETIME[CELL_BILL] = MoneyBill(None).lifetime
+
+INVINCIBLE_TICKS = 50   # som i Simulation.step
+LAYOUT_POOL = 64        # forudgenererede ruin-layouts; en ny runde trækker et af dem
+FAR = 1 << 20           # "uendelig" afstand for hunde
+
+# Observations-kanaler (0/1 per celle): obs[n, kanal, x, y]
+OBS_SNAKE1 = 0
+OBS_SNAKE2 = 1
+OBS_HEADS = 2
+OBS_RUIN = 3
+OBS_FOOD = 4
+OBS_SPECIAL = 5   # bonus, uovervindelig og mega
+OBS_MONEY = 6     # coins og pengesedler
+OBS_DOG = 7
+OBS_CHANNELS = 8
+
+
+class BatchEnv:
+    """N Snake-runder der køres i takt.
+
+    Slangerne ligger i body[n, p, x, y] som det tick hvor segmentet på cellen
+    forsvinder (optaget når værdien er større end spillets tick). Så flytter
+    halen sig uden at røre arrayet; kun en slange der vokser får alle sine
+    segmenter forlænget med ét tick. Ting ligger som CELL_* koder i
+    items[n, x, y] med udløbs-tick i expires.
+
+    step(actions) tager en retning per spiller (indeks i DIRECTIONS eller
+    NO_TURN) og returnerer (obs, rewards, dones). Spil der slutter startes
+    forfra med det samme; deres slutscore og længde står i final_scores og
+    final_ticks."""
+
+    def __init__(self, n, difficulty=1, num_players=1, seed=None, layouts=LAYOUT_POOL):
+        self.n = n
+        self.difficulty = difficulty
+        self.num_players = num_players
+        self.rng = np.random.default_rng(seed)
+        _, self.start_fps, self.max_fps, self.increase_every = DIFFICULTIES[difficulty]
+        self.enemy_spawn = ENEMY_SPAWN.get(difficulty)  # None = ingen hunde
+        max_dogs = self.enemy_spawn[1] if self.enemy_spawn else 0
+
+        # Ruin-layouts bygges én gang med generate_ruins
+        layout_rng = random.Random(int(self.rng.integers(2 ** 63)))
+        safe = generate_safe_zones()
+        self.layouts = np.zeros((layouts, GRID_W, GRID_H), dtype=bool)
+        for k in range(layouts):
+            for x, y in generate_ruins(RUIN_COUNTS[difficulty], safe, layout_rng)[0]:
+                self.layouts[k, x, y] = True
+        self.edge = np.zeros((GRID_W, GRID_H), dtype=bool)
+        for x, y in edge_cells(GRID_W, GRID_H):
+            self.edge[x, y] = True
+
+        p = num_players
+        self.tick = np.zeros(n, dtype=np.int32)
+        self.ruins = np.zeros((n, GRID_W, GRID_H), dtype=bool)
+        self.body = np.zeros((n, p, GRID_W, GRID_H), dtype=np.int32)
+        self.head_x = np.zeros((n, p), dtype=np.int32)
+        self.head_y = np.zeros((n, p), dtype=np.int32)
+        self.direction = np.zeros((n, p), dtype=np.int32)
+        self.length = np.zeros((n, p), dtype=np.int32)
+        self.grow_pending = np.zeros((n, p), dtype=np.int32)
+        self.invincible = np.zeros((n, p), dtype=np.int32)
+        self.items = np.zeros((n, GRID_W, GRID_H), dtype=np.int8)
+        self.expires = np.zeros((n, GRID_W, GRID_H), dtype=np.int32)  # 0 = aldrig
+        self.has_normal = np.zeros(n, dtype=bool)
+        self.scores = np.zeros((n, p), dtype=np.int32)
+        self.coins = np.zeros((n, p), dtype=np.int32)  # coins samlet op i runden
+        self.fps = np.zeros(n, dtype=np.int32)
+        self.special_ready = np.zeros(n, dtype=np.int32)
+        self.coin_ready = np.zeros(n, dtype=np.int32)
+        self.mega_timer = np.zeros(n, dtype=np.float64)
+        self.mega_spawned = np.zeros(n, dtype=np.int32)
+        # Hunde: faste pladser per spil; dogs tæller hunde per celle
+        self.enemy_ready = np.zeros(n, dtype=np.int32)
+        self.dog_alive = np.zeros((n, max_dogs), dtype=bool)
+        self.dog_x = np.zeros((n, max_dogs), dtype=np.int32)
+        self.dog_y = np.zeros((n, max_dogs), dtype=np.int32)
+        self.dog_dir = np.zeros((n, max_dogs), dtype=np.int32)
+        self.dog_next = np.zeros((n, max_dogs), dtype=np.int32)
+        self.dogs = np.zeros((n, GRID_W, GRID_H), dtype=np.int8)
+        # Sidst afsluttede runde per spil
+        self.final_scores = np.zeros((n, p), dtype=np.int32)
+        self.final_ticks = np.zeros(n, dtype=np.int32)
+        self._reset(np.arange(n))
+
+    # --- Runder ---
+    def reset(self, envs=None):
+        """Start nye runder i envs (indeks; None = alle) og returnér observationen."""
+        envs = np.arange(self.n) if envs is None else np.asarray(envs)
+        if len(envs):
+            self._reset(envs)
+        return self.observe()
+
+    def _reset(self, envs):
+        self.tick[envs] = 0
+        self.ruins[envs] = self.layouts[self.rng.integers(len(self.layouts), size=len(envs))]
+        self.body[envs] = 0
+        self.items[envs] = 0
+        self.expires[envs] = 0
+        self.has_normal[envs] = False
+        for arr in (self.grow_pending, self.invincible, self.scores, self.coins):
+            arr[envs] = 0
+        self.fps[envs] = self.start_fps
+        for arr in (self.special_ready, self.coin_ready, self.mega_spawned, self.enemy_ready):
+            arr[envs] = 0
+        self.mega_timer[envs] = 0.0
+        self.dog_alive[envs] = False
+        self.dogs[envs] = 0
+        if self.num_players == 2:
+            starts = [((3, 3), RIGHT), ((GRID_W - 4, GRID_H - 4), LEFT)]
+        else:
+            starts = [((GRID_W // 2, GRID_H // 2), RIGHT)]
+        for p, ((x, y), direction) in enumerate(starts):
+            dx, dy = direction
+            self.direction[envs, p] = DIRECTIONS.index(direction)
+            self.length[envs, p] = 3
+            self.head_x[envs, p] = x
+            self.head_y[envs, p] = y
+            for i in range(3):
+                self.body[envs, p, x - dx * i, y - dy * i] = 3 - i
+        self._spawn(envs, CELL_NORMAL)
+
+    # --- Spawn ---
+    def _sample(self, free):
+        """Tilfældig fri celle per række i free[k, x, y] -> (fundet, x, y)."""
+        flat = free.reshape(len(free), -1)
+        r = np.where(flat, self.rng.random(flat.shape), -1.0)
+        idx = r.argmax(axis=1)
+        return flat.any(axis=1), idx // GRID_H, idx % GRID_H
+
+    def _occupied(self, envs):
+        """Celler med slange, ruin eller ting i envs (som OCC_SPAWN_BLOCKED)."""
+        t = self.tick[envs, None, None, None]
+        return self.ruins[envs] | (self.items[envs] != 0) | (self.body[envs] > t).any(axis=1)
+
+    def _spawn(self, envs, code):
+        """Læg en ting af typen code på en tilfældig fri celle i hvert spil i envs."""
+        if not len(envs):
+            return
+        found, x, y = self._sample(~self._occupied(envs))
+        envs, x, y = envs[found], x[found], y[found]
+        self.items[envs, x, y] = code
+        lifetime = CELL_LIFETIME[code]
+        self.expires[envs, x, y] = self.tick[envs] + lifetime if lifetime else 0
+        if code == CELL_NORMAL:
+            self.has_normal[envs] = True
+
+    # --- Game-tick ---
+    def step(self, actions, observe=True):
+        """Kør ét game-tick i alle N spil.
+
+        actions har formen (n, num_players) (eller (n,) med én spiller).
+        rewards er pointene hver spiller fik i ticket, dones hvilke spil der
+        sluttede (og allerede er startet forfra)."""
+        n, players = self.n, self.num_players
+        actions = np.asarray(actions).reshape(n, players)
+        turn = (actions >= 0) & (actions != (self.direction ^ 1))
+        self.direction = np.where(turn, actions, self.direction)
+        prev_scores = self.scores.copy()
+        self.tick += 1
+        t = self.tick
+        rows = np.arange(n)[:, None]
+        cols = np.arange(players)[None, :]
+
+        # Slanger der vokser: alle segmenter lever et tick længere, så halen bliver stående
+        gn, gp = np.nonzero(self.grow_pending > 0)
+        if len(gn):
+            grown = self.body[gn, gp]
+            grown += grown >= t[gn, None, None]
+            self.body[gn, gp] = grown
+            self.grow_pending[gn, gp] -= 1
+            self.length[gn, gp] += 1
+        self.head_x += DIR_DX[self.direction]
+        self.head_y += DIR_DY[self.direction]
+        np.maximum(self.invincible - 1, 0, out=self.invincible)
+        hx, hy = self.head_x, self.head_y
+        inv = self.invincible > 0
+        inside = (hx >= 0) & (hx < GRID_W) & (hy >= 0) & (hy < GRID_H)
+        cx = np.clip(hx, 0, GRID_W - 1)
+        cy = np.clip(hy, 0, GRID_H - 1)
+
+        # Kollisioner med væg, egen krop og ruiner (uovervindelige overlever)
+        self_hit = inside & (self.body[rows, cols, cx, cy] > t[:, None])
+        ruin_hit = inside & self.ruins[rows, cx, cy]
+        alive = inv | (inside & ~self_hit & ~ruin_hit)
+        wn, wp = np.nonzero(inside)
+        self.body[wn, wp, hx[wn, wp], hy[wn, wp]] = t[wn] + self.length[wn, wp]
+
+        if players == 2:
+            both = alive[:, 0] & alive[:, 1]
+            idx = rows[:, 0]
+            s1_hit_s2 = inside[:, 0] & (self.body[idx, 1, cx[:, 0], cy[:, 0]] > t)
+            s2_hit_s1 = inside[:, 1] & (self.body[idx, 0, cx[:, 1], cy[:, 1]] > t)
+            head_on = (hx[:, 0] == hx[:, 1]) & (hy[:, 0] == hy[:, 1])
+            i1, i2 = inv[:, 0], inv[:, 1]
+            kill1 = np.where(head_on, ~i1, (s1_hit_s2 & ~i1) | (s2_hit_s1 & ~i2 & ~i1))
+            kill2 = np.where(head_on, ~i2, (s2_hit_s1 & ~i2) | (s1_hit_s2 & ~i1 & ~i2))
+            alive[:, 0] &= ~(both & kill1)
+            alive[:, 1] &= ~(both & kill2)
+
+        # Mad (spiller 1 spiser før spiller 2, som i Simulation.step)
+        for p in range(players):
+            envs = np.nonzero(alive[:, p] & inside[:, p])[0]
+            x, y = hx[envs, p], hy[envs, p]
+            kind = self.items[envs, x, y]
+            eat = (kind >= CELL_NORMAL) & (kind <= CELL_MEGA)
+            envs, x, y, kind = envs[eat], x[eat], y[eat], kind[eat]
+            self.scores[envs, p] += CELL_POINTS[kind]
+            self.grow_pending[envs, p] += 1
+            self.invincible[envs[kind == CELL_INVINCIBLE], p] = INVINCIBLE_TICKS
+            self.has_normal[envs[kind == CELL_NORMAL]] = False
+            self.items[envs, x, y] = 0
+            self.expires[envs, x, y] = 0
+
+        expired = self.expires == t[:, None, None]
+        self.items[expired] = 0
+        self.expires[expired] = 0
+
+        self._spawn(np.nonzero(~self.has_normal)[0], CELL_NORMAL)
+
+        ready = t >= self.special_ready
+        roll = self.rng.random(n)
+        bonus = ready & (roll < 0.03)
+        invincible = ready & (roll >= 0.03) & (roll < 0.04)
+        self._spawn(np.nonzero(bonus)[0], CELL_BONUS)
+        self.special_ready[bonus] = t[bonus] + 30
+        self._spawn(np.nonzero(invincible)[0], CELL_INVINCIBLE)
+        self.special_ready[invincible] = t[invincible] + 60
+
+        # --- Mega-food ---
+        active = self.mega_spawned < 20
+        self.mega_timer[active] += 1.0 / self.fps[active]
+        due = active & (self.mega_timer >= MEGA_FOOD_INTERVAL)
+        self.mega_timer[due] = 0.0
+        self.mega_spawned[due] += 1
+        self._spawn(np.nonzero(due)[0], CELL_MEGA)
+
+        # --- Coins og pengesedler ---
+        ready = t >= self.coin_ready
+        hit = ready & (self.rng.random(n) < 0.15)
+        self._spawn(np.nonzero(hit)[0], CELL_COIN)
+        self.coin_ready[hit] = t[hit] + 8
+        self.coin_ready[ready & ~hit] = t[ready & ~hit] + 3
+        self._spawn(np.nonzero(self.rng.random(n) < 0.003)[0], CELL_BILL)
+
+        for p in range(players):
+            envs = np.nonzero(alive[:, p] & inside[:, p])[0]
+            x, y = hx[envs, p], hy[envs, p]
+            kind = self.items[envs, x, y]
+            money = kind >= CELL_COIN
+            envs, x, y, kind = envs[money], x[money], y[money], kind[money]
+            self.coins[envs, p] += np.where(kind == CELL_BILL, MONEY_BILL_VALUE, 1)
+            self.items[envs, x, y] = 0
+            self.expires[envs, x, y] = 0
+
+        if self.enemy_spawn is not None:
+            self._step_dogs(alive, inv)
+
+        total = self.scores.sum(axis=1)
+        np.minimum(self.start_fps + total // self.increase_every, self.max_fps, out=self.fps)
+
+        rewards = self.scores - prev_scores
+        dones = ~alive.all(axis=1)
+        ended = np.nonzero(dones)[0]
+        if len(ended):
+            self.final_scores[ended] = self.scores[ended]
+            self.final_ticks[ended] = t[ended]
+            self._reset(ended)
+        return (self.observe() if observe else None), rewards, dones
+
+    # --- Hunde ---
+    def _head_dist(self, envs, x, y, alive):
+        """Manhattan-afstand fra (x, y) til nærmeste levende slangehoved."""
+        dist = np.full(np.broadcast(envs, x).shape, FAR, dtype=np.int32)
+        for p in range(self.num_players):
+            d = np.abs(x - self.head_x[envs, p]) + np.abs(y - self.head_y[envs, p])
+            np.minimum(dist, np.where(alive[envs, p], d, FAR), out=dist)
+        return dist
+
+    def _step_dogs(self, alive, inv):
+        """Spawn, flyt og bid med hundene (Svær + Vanvid); dræbte slanger sættes i alive."""
+        interval, max_dogs = self.enemy_spawn
+        t = self.tick
+        due = t >= self.enemy_ready
+        self.enemy_ready[due] = t[due] + interval
+        envs = np.nonzero(due & (self.dog_alive.sum(axis=1) < max_dogs))[0]
+        if len(envs):
+            free = self.edge & ~self._occupied(envs) & (self.dogs[envs] == 0)
+            found, x, y = self._sample(free)
+            envs, x, y = envs[found], x[found], y[found]
+            slot = (~self.dog_alive[envs]).argmax(axis=1)
+            self.dog_alive[envs, slot] = True
+            self.dog_x[envs, slot] = x
+            self.dog_y[envs, slot] = y
+            self.dog_dir[envs, slot] = self.rng.integers(len(DIRECTIONS), size=len(envs))
+            self.dog_next[envs, slot] = 0
+            self.dogs[envs, x, y] += 1
+
+        # Én plads ad gangen (vektoriseret over spillene), så to hunde i samme
+        # spil ser hinandens nye position ligesom i Simulation
+        has_head = alive.any(axis=1)
+        order = np.empty((self.n, 5), dtype=np.int32)
+        order[:, 1:] = np.arange(len(DIRECTIONS))
+        players = np.arange(self.num_players)
+        for j in range(max_dogs):
+            envs = np.nonzero(self.dog_alive[:, j] & has_head & (t >= self.dog_next[:, j]))[0]
+            if not len(envs):
+                continue
+            self.dog_next[envs, j] = t[envs] + EnemyDog.DOG_MOVE_INTERVAL
+            e = envs[:, None]
+            x, y = self.dog_x[envs, j], self.dog_y[envs, j]
+            # Nuværende retning først, så hunden ikke zig-zagger
+            cand = order[:len(envs)]
+            cand[:, 0] = self.dog_dir[envs, j]
+            nx = x[:, None] + DIR_DX[cand]
+            ny = y[:, None] + DIR_DY[cand]
+            on_board = (nx >= 0) & (nx < GRID_W) & (ny >= 0) & (ny < GRID_H)
+            cx = np.clip(nx, 0, GRID_W - 1)
+            cy = np.clip(ny, 0, GRID_H - 1)
+            ruin = self.ruins[e, cx, cy]
+            # Slangekroppe spærrer, de levende hoveder er målet
+            body = (self.body[e[..., None], players, cx[..., None], cy[..., None]]
+                    > t[envs, None, None]).any(axis=-1)
+            head = ((nx[..., None] == self.head_x[e]) & (ny[..., None] == self.head_y[e])
+                    & alive[e]).any(axis=-1)
+            open_cell = on_board & ~ruin & ~(body & ~head)
+            dist = np.where(open_cell, self._head_dist(e, nx, ny, alive), FAR)
+            closer = dist < self._head_dist(envs, x, y, alive)[:, None]
+            dog_there = self.dogs[e, cx, cy] > 0
+            free_closer = closer & ~dog_there
+            best = np.where(free_closer, dist, FAR).argmin(axis=1)
+            has_best = free_closer.any(axis=1)
+            queued = (closer & dog_there).any(axis=1)
+            # Ingen vej (indespærret): tilfældig retning på banen uden ruin
+            wander = (on_board & ~ruin)[:, 1:]
+            pick = np.where(wander, self.rng.random(wander.shape), -1.0).argmax(axis=1) + 1
+            roam = ~has_best & ~queued & wander.any(axis=1)
+            go = has_best | roam
+            choice = np.where(has_best, best, pick)[go]
+            envs, x, y = envs[go], x[go], y[go]
+            k = np.arange(len(choice))
+            nx, ny = nx[go][k, choice], ny[go][k, choice]
+            self.dogs[envs, x, y] -= 1
+            self.dogs[envs, nx, ny] += 1
+            self.dog_x[envs, j] = nx
+            self.dog_y[envs, j] = ny
+            self.dog_dir[envs, j] = cand[go][k, choice]
+
+        # Hund rammer slange = dræb slangen (medmindre den er uovervindelig) og hunden
+        for p in range(self.num_players):
+            bite = (self.dog_alive & alive[:, p, None]
+                    & (self.dog_x == self.head_x[:, p, None]) & (self.dog_y == self.head_y[:, p, None]))
+            alive[:, p] &= ~(bite.any(axis=1) & ~inv[:, p])
+            dn, dj = np.nonzero(bite)
+            np.subtract.at(self.dogs, (dn, self.dog_x[dn, dj], self.dog_y[dn, dj]), 1)
+            self.dog_alive[dn, dj] = False
+
+    # --- Observationer ---
+    def observe(self):
+        """Observations-grids obs[n, kanal, x, y] (uint8, se OBS_*)."""
+        obs = np.zeros((self.n, OBS_CHANNELS, GRID_W, GRID_H), dtype=np.uint8)
+        t = self.tick[:, None, None]
+        for p in range(self.num_players):
+            obs[:, OBS_SNAKE1 + p] = self.body[:, p] > t
+            envs = np.nonzero((self.head_x[:, p] >= 0) & (self.head_x[:, p] < GRID_W)
+                              & (self.head_y[:, p] >= 0) & (self.head_y[:, p] < GRID_H))[0]
+            obs[envs, OBS_HEADS, self.head_x[envs, p], self.head_y[envs, p]] = 1
+        obs[:, OBS_RUIN] = self.ruins
+        obs[:, OBS_FOOD] = self.items == CELL_NORMAL
+        obs[:, OBS_SPECIAL] = (self.items >= CELL_BONUS) & (self.items <= CELL_MEGA)
+        obs[:, OBS_MONEY] = self.items >= CELL_COIN
+        obs[:, OBS_DOG] = self.dogs > 0
+        return obs
@@ -0,0 +1,146 @@
+"""Highscores: sorterede lister per {num_players}p_{difficulty} med journal.
+
+Hver liste holdes sorteret i hukommelsen (bisect), så indsættelse, plads
+("du kom på plads #342") og bedste score er billige selv med titusindvis af
+scores per liste. En ny score skrives ikke ved at gemme hele filen igen,
+men som én linje bagest i en journal ved siden af highscores.json:
+
+    {"seq": 17, "bucket": "1p_2", "name": "nick", "score": 42}
+
+Når journalen er blevet lang (COMPACT_EVERY linjer), skrives listerne samlet
+til highscores.json (midlertidig fil + os.replace) og journalen tømmes.
+highscores.json har samme format som før - {bucket: [{"name", "score"}, ...]}
+- plus "_seq", nummeret på den sidste journal-linje den indeholder, så et
+nedbrud mellem de to skridt ikke tæller en score med to gange. En linje der
+kun blev halvt skrevet, skæres af journalen når den læses."""
+import json
+import os
+from bisect import bisect_right
+
+HIGHSCORE_LIMIT = 10000  # scores der gemmes per liste; de laveste falder ud
+COMPACT_EVERY = 500      # journal-linjer før listerne skrives samlet
+SEQ_KEY = "_seq"
+
+
+def bucket_key(difficulty, num_players):
+    return f"{num_players}p_{difficulty}"
+
+
+class HighscoreStore:
+    """Highscore-listerne i path (JSON) med journalen i journal_path.
+
+    En liste er (-score, orden, navn)-tupler i stigende orden: højeste score
+    først og ved lige score den ældste først. orden er løbende for hele
+    store'en, så nye scores lander efter gamle med samme score."""
+
+    def __init__(self, path, journal_path=None, limit=HIGHSCORE_LIMIT, compact_every=COMPACT_EVERY,
+                 repair=True):
+        self.path = path
+        self.repair = repair  # skær en halvt skrevet journal-linje af ved indlæsning
+        self.journal_path = journal_path or os.path.splitext(path)[0] + ".journal"
+        self.limit = limit
+        self.compact_every = compact_every
+        self.lists = {}
+        self.order = 0         # næste orden (tie-break) i hukommelsen
+        self.seq = 0           # sidste journal-linje der er skrevet eller læst
+        self.journal_lines = 0  # linjer i journalen siden sidste komprimering
+        self._load()
+
+    # --- Indlæsning og skrivning ---
+    def _load(self):
+        data = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                data = {}
+        self.seq = data.get(SEQ_KEY, 0)
+        for key, entries in data.items():
+            if key == SEQ_KEY:
+                continue
+            for entry in entries:
+                self._insert(key, entry["name"], entry["score"])
+        if not os.path.exists(self.journal_path):
+            return
+        good = 0  # bytes med hele, læste linjer
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break  # sidste linje blev kun halvt skrevet (nedbrud) - resten er ubrugelig
+                    if not line.endswith(b"\n"):
+                        break  # heller ikke linjeskiftet nåede ud - næste add() ville skrive videre på linjen
+                    good += len(line)
+                    self.journal_lines += 1
+                    if rec["seq"] > self.seq:  # ellers står den allerede i highscores.json
+                        self.seq = rec["seq"]
+                        self._insert(rec["bucket"], rec["name"], rec["score"])
+                size = f.seek(0, os.SEEK_END)
+            if size > good and self.repair:
+                # Skær det halve stykke af, så nye linjer ikke havner i forlængelse af det
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good)
+        except OSError:
+            pass
+
+    def compact(self):
+        """Skriv alle lister til path og tøm journalen."""
+        data = {key: [{"name": name, "score": -neg} for neg, _, name in entries]
+                for key, entries in self.lists.items()}
+        data[SEQ_KEY] = self.seq
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+        open(self.journal_path, "w").close()
+        self.journal_lines = 0
+
+    # --- Opslag ---
+    def _insert(self, key, name, score):
+        """Sæt en score ind i listen; returnerer dens plads (0 = bedst) eller None hvis den faldt ud."""
+        entries = self.lists.setdefault(key, [])
+        rec = (-score, self.order, name)
+        self.order += 1
+        place = bisect_right(entries, rec)
+        entries.insert(place, rec)
+        if len(entries) > self.limit:
+            entries.pop()
+            if place == self.limit:
+                return None
+        return place
+
+    def rank(self, key, score):
+        """Pladsen (1 = bedst) score ville få i listen lige nu - efter de lige gode."""
+        return bisect_right(self.lists.get(key, ()), (-score, self.order)) + 1
+
+    def qualifies(self, key, score):
+        """Kommer score på listen? (0 point tæller ikke)"""
+        return score > 0 and self.rank(key, score) <= self.limit
+
+    def best(self, key):
+        entries = self.lists.get(key)
+        return -entries[0][0] if entries else 0
+
+    def top(self, key, count, offset=0):
+        """Side af listen: count scores fra plads offset + 1 som {"name", "score"}."""
+        return [{"name": name, "score": -neg}
+                for neg, _, name in self.lists.get(key, [])[offset:offset + count]]
+
+    def count(self, key):
+        return len(self.lists.get(key, ()))
+
+    # --- Ny score ---
+    def add(self, key, name, score):
+        """Tilføj en score og skriv den i journalen; returnerer pladsen (1 = bedst) eller None."""
+        self.seq += 1
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"seq": self.seq, "bucket": key, "name": name, "score": score},
+                               ensure_ascii=False) + "\n")
+        self.journal_lines += 1
+        place = self._insert(key, name, score)
+        if self.journal_lines >= self.compact_every:
+            self.compact()
+        return None if place is None else place + 1
@@ -1,8 +1,9 @@
 import asyncio
 import platform
+import sys
 
 # Pygbag requires main.py as the entry point
 if __name__ == "__main__":
-    # Import and run the game
+    # Import and run the game (--stress: hundreds of dogs for performance testing)
     from snake import Game
-    asyncio.run(Game().run())
+    asyncio.run(Game(stress="--stress" in sys.argv).run())
@@ -0,0 +1,202 @@
+"""Optagelse og afspilning af runder.
+
+En runde er helt bestemt af Simulation's seed, pengepungen ved start og
+spillernes input per tick. En replay-fil gemmer derfor kun det: en header
+og en delta-kodet strøm af input-events (retningstryk, skud, skydeknap
+ned/op). Et event fylder én byte når der er under 15 ticks siden det
+forrige:
+
+    bit 7-4  ticks siden forrige event (15 = et varint med resten følger)
+    bit 3    spiller (0 = spiller 1, 1 = spiller 2)
+    bit 2-0  EV_* koden
+
+Afspilning kører runden igen uden at tegne og er derfor meget hurtigere end
+realtid; Game kan også vise den med --replay (se snake.py).
+
+    python replay.py last_round.snkr"""
+import struct
+import sys
+import time
+
+from snake_sim import (
+    DIFFICULTIES, UP, DOWN, LEFT, RIGHT,
+    GUN_NONE, GUN_BASIC, GUN_AUTO, GUN_QUAD, GUN_VACUUM,
+    PlayerInput, Simulation,
+)
+
+MAGIC = b"SNKR"
+VERSION = 3
+HEADER = struct.Struct("<4sBQBBBHH")  # magic, version, seed, difficulty, num_players, stress, bredde, højde
+WALLET = struct.Struct("<IIIB")      # coins, ammo, power, kanon (indeks i GUN_CODES) per spiller
+GUN_CODES = (GUN_NONE, GUN_BASIC, GUN_AUTO, GUN_QUAD, GUN_VACUUM)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)  # EV_* 0-3 er et retningstryk
+
+EV_SHOT = 4      # skydeknappen trykket (enkeltskud)
+EV_HOLD = 5      # skydeknappen holdes nede fra dette tick
+EV_RELEASE = 6   # ... og sluppet igen
+EV_END = 7       # rundens sidste tick
+PLAYER_BIT = 8
+DELTA_ESCAPE = 15
+
+
+class ReplayRecorder:
+    """Optager en rundes input; sættes som sim.recorder lige efter new_round()."""
+
+    def __init__(self, sim):
+        self.num_players = sim.num_players
+        self.header = HEADER.pack(MAGIC, VERSION, sim.seed, sim.difficulty, sim.num_players, sim.stress,
+                                  sim.width, sim.height)
+        for pidx in range(2):
+            self.header += WALLET.pack(sim.coins[pidx], sim.ammo[pidx], sim.power[pidx],
+                                       GUN_CODES.index(sim.gun_type[pidx]))
+        self.events = bytearray()
+        self.last_tick = 0
+        self.hold = [False, False]
+
+    def _event(self, tick, player_idx, code):
+        delta = tick - self.last_tick
+        self.last_tick = tick
+        self.events.append(min(delta, DELTA_ESCAPE) << 4 | player_idx * PLAYER_BIT | code)
+        if delta >= DELTA_ESCAPE:
+            rest = delta - DELTA_ESCAPE
+            while rest >= 0x80:
+                self.events.append(rest & 0x7F | 0x80)
+                rest >>= 7
+            self.events.append(rest)
+
+    def record(self, tick, inputs):
+        """Kaldes af Simulation.step med tick før det køres og spillernes PlayerInput."""
+        for pidx in range(self.num_players):
+            inp = inputs[pidx]
+            for direction in inp.turns:
+                self._event(tick, pidx, DIRECTIONS.index(direction))
+            for _ in range(inp.shots):
+                self._event(tick, pidx, EV_SHOT)
+            if inp.hold != self.hold[pidx]:
+                self.hold[pidx] = inp.hold
+                self._event(tick, pidx, EV_HOLD if inp.hold else EV_RELEASE)
+
+    def finish(self, tick):
+        """Den færdige replay som bytes; tick er rundens sidste game_tick."""
+        self._event(tick, 0, EV_END)
+        return bytes(self.header) + bytes(self.events)
+
+    def save(self, path, tick):
+        with open(path, "wb") as f:
+            f.write(self.finish(tick))
+
+
+class Replay:
+    """En indlæst replay: header-felterne og events som (tick, spiller, kode)."""
+
+    def __init__(self, data):
+        magic, version, self.seed, self.difficulty, self.num_players, stress, *size = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("ikke en replay-fil (eller en anden version)")
+        self.stress = bool(stress)
+        self.width, self.height = size
+        self.wallet = [WALLET.unpack_from(data, HEADER.size + pidx * WALLET.size) for pidx in range(2)]
+        self.events = []
+        self.end_tick = None
+        pos = HEADER.size + 2 * WALLET.size
+        tick = 0
+        while pos < len(data):
+            byte = data[pos]
+            pos += 1
+            delta = byte >> 4
+            if delta == DELTA_ESCAPE:
+                shift = 0
+                while True:
+                    part = data[pos]
+                    pos += 1
+                    delta += (part & 0x7F) << shift
+                    shift += 7
+                    if part < 0x80:
+                        break
+            tick += delta
+            code = byte & 7
+            if code == EV_END:
+                self.end_tick = tick
+                break
+            self.events.append((tick, (byte & PLAYER_BIT) // PLAYER_BIT, code))
+        if self.end_tick is None:
+            raise ValueError("replay-filen er afkortet (mangler slut-event)")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def start(self, sim):
+        """Stil sim op som ved optagelsen og start runden."""
+        sim.stress = self.stress
+        sim.difficulty = self.difficulty
+        sim.num_players = self.num_players
+        sim.width, sim.height = self.width, self.height
+        for pidx, (coins, ammo, power, gun) in enumerate(self.wallet):
+            sim.coins[pidx] = coins
+            sim.ammo[pidx] = ammo
+            sim.power[pidx] = power
+            sim.gun_type[pidx] = GUN_CODES[gun]
+        sim.new_round(self.seed)
+
+    def inputs(self):
+        """Spillernes PlayerInput for hvert tick i runden (generator)."""
+        hold = [False, False]
+        events = iter(self.events)
+        pending = next(events, None)
+        for tick in range(self.end_tick):
+            inputs = [PlayerInput(hold=hold[0]), PlayerInput(hold=hold[1])]
+            while pending is not None and pending[0] == tick:
+                _, pidx, code = pending
+                if code < len(DIRECTIONS):
+                    inputs[pidx].turns.append(DIRECTIONS[code])
+                elif code == EV_SHOT:
+                    inputs[pidx].shots += 1
+                else:
+                    hold[pidx] = inputs[pidx].hold = code == EV_HOLD
+                pending = next(events, None)
+            yield inputs
+
+
+def play_back(replay, sim=None, on_tick=None):
+    """Kør en replay igen uden at tegne. on_tick(sim) kaldes efter hvert tick."""
+    sim = sim if sim is not None else Simulation()
+    replay.start(sim)
+    for inputs in replay.inputs():
+        sim.step(inputs)
+        if on_tick is not None:
+            on_tick(sim)
+        if sim.over:
+            break
+    return sim
+
+
+def main(path):
+    replay = Replay.load(path)
+    label = DIFFICULTIES[replay.difficulty][0]
+    print(f"{path}: seed {replay.seed}, {replay.num_players}p {label} {replay.width}x{replay.height}, "
+          f"{replay.end_tick} ticks, {len(replay.events)} events")
+    # Tid per tick, så de langsomme ticks (hak i spillet) kan findes igen
+    times = []
+    last = time.perf_counter()
+
+    def on_tick(sim):
+        nonlocal last
+        now = time.perf_counter()
+        times.append((now - last, sim.game_tick))
+        last = now
+
+    start = time.perf_counter()
+    sim = play_back(replay, on_tick=on_tick)
+    elapsed = time.perf_counter() - start
+    print(f"score {sim.scores[:replay.num_players]} efter {sim.game_tick} ticks "
+          f"på {elapsed * 1000:.1f} ms ({sim.game_tick / max(elapsed, 1e-9):,.0f} ticks/s)")
+    if sim.game_tick != replay.end_tick or not sim.over:
+        print("ADVARSEL: runden endte ikke som ved optagelsen")
+    for dt, tick in sorted(times, reverse=True)[:5]:
+        print(f"  tick {tick}: {dt * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "last_round.snkr")
@@ -4,28 +4,37 @@ import sys
 import math
 import json
 import os
-import struct
 import asyncio
+import time
+from collections import Counter, OrderedDict
+
+from snake_sim import (
+    AMMO_AMOUNT, AMMO_PRICE, DIFFICULTIES, DOWN, FOOD_BONUS, FOOD_INVINCIBLE, FOOD_MEGA,
+    FOOD_NORMAL, GRID_H, GRID_W, GUN_AUTO, GUN_BASIC, GUN_NONE, GUN_PRICES, GUN_QUAD,
+    CHUNK_SIZE, GUN_VACUUM, ITEM_BILL, ITEM_COIN, ITEM_FOOD, LEFT, MAP_SIZES, POWER_AMOUNT,
+    POWER_PRICE, RIGHT, UP, PlayerInput, Simulation,
+)
+from highscores import HighscoreStore, bucket_key
+from replay import Replay, ReplayRecorder
+import synth
 
 # --- Konstanter ---
 CELL_SIZE = 20
-GRID_W = 50
-GRID_H = 30
 SCOREBOARD_H = 50
 WINDOW_W = GRID_W * CELL_SIZE
 WINDOW_H = GRID_H * CELL_SIZE + SCOREBOARD_H
+# Dirty-rect mode: under spillet sendes kun de ændrede områder til skærmen
+DIRTY_RECTS = True
+DIRTY_PAD = 18  # hvor langt en figur højst tegner uden for sin egen celle
 
 HIGHSCORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "highscores.json")
-MAX_HIGHSCORES = 5
+MAX_HIGHSCORES = 5  # pladser der tæller som "NY HIGHSCORE!" (listen gemmer mange flere)
 MAX_NAME_LEN = 12
 
-# Sværhedsgrader: (label, start_fps, max_fps, fps_increase_every)
-DIFFICULTIES = [
-    ("Let", 5, 20, 8),
-    ("Normal", 8, 26, 5),
-    ("Svær", 12, 32, 3),
-    ("Vanvid", 16, 48, 2),
-]
+# Game-loop: simulationen kører med sværhedsgradens tick-rate, tegningen med RENDER_FPS
+RENDER_FPS = 60
+MAX_CATCHUP_STEPS = 5  # max game-ticks per frame efter et hak (resten droppes)
+ANIM_SUBSTEPS = 4      # animationer tegnes i kvarte ticks mellem to game-ticks
 
 # Farver
 BLACK = (0, 0, 0)
@@ -123,53 +132,28 @@ TREE_CANOPY_LIGHT = (55, 120, 45)
 TREE_CANOPY_DARK = (22, 60, 18)
 TREE_CANOPY_SHADOW = (15, 35, 12)
 
-# Retninger
-UP = (0, -1)
-DOWN = (0, 1)
-LEFT = (-1, 0)
-RIGHT = (1, 0)
-
-OPPOSITES = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
-
-FOOD_NORMAL = "normal"
-FOOD_BONUS = "bonus"
-FOOD_INVINCIBLE = "invincible"
-FOOD_MEGA = "mega"          # 100 point - spawner 20 per 10 min
-MEGA_FOOD_INTERVAL = 30     # sekunder mellem mega-food spawns (10 min / 20 = 30s)
-
 # Coin / Bullet / Gun
 COIN_COLOR = (255, 215, 0)
 COIN_COLOR_DARK = (200, 160, 0)
 MONEY_BILL_COLOR = (85, 200, 85)  # Grøn pengeseddel
 MONEY_BILL_DARK = (60, 140, 60)
-MONEY_BILL_VALUE = 10  # Pengesedler giver 10 coins
 BULLET_COLOR = (255, 100, 50)
-BULLET_SPEED = 2  # celler per game-tick
-AMMO_PRICE = 1      # 1 coin = 5 skud
-AMMO_AMOUNT = 5     # skud per køb
 GUN_BARREL_COLOR = (100, 100, 110)
 GUN_BODY_COLOR = (70, 70, 80)
 
 SAVE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "savedata.json")
+SAVE_INTERVAL = 2.0  # sekunder mellem to skrivninger af pengepungen (se WriteBehind)
+WALLET_FIELDS = ("coins", "ammo", "power", "gun", "snake_type")
+REPLAY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "last_round.snkr")
 
-# Kanon-typer: (id, navn, pris, farve)
-GUN_NONE = None
-GUN_BASIC = "basic"       # Manuel skydning, 1 skud
-GUN_AUTO = "auto"         # Automatisk skydning
-GUN_QUAD = "quad"         # 4 skud ad gangen
-GUN_VACUUM = "vacuum"     # Støvsuger - suger mad til sig
+# Kanon-typer i butikken: (id, navn, pris, farve)
 GUN_TYPES = [
-    (GUN_BASIC, "Kanon", 10, GUN_BARREL_COLOR),
-    (GUN_AUTO, "Auto-Kanon", 15, (120, 180, 120)),
-    (GUN_QUAD, "Quad-Kanon", 25, (180, 100, 100)),
-    (GUN_VACUUM, "Støvsuger", 50, (100, 60, 180)),
+    (GUN_BASIC, "Kanon", GUN_PRICES[GUN_BASIC], GUN_BARREL_COLOR),
+    (GUN_AUTO, "Auto-Kanon", GUN_PRICES[GUN_AUTO], (120, 180, 120)),
+    (GUN_QUAD, "Quad-Kanon", GUN_PRICES[GUN_QUAD], (180, 100, 100)),
+    (GUN_VACUUM, "Støvsuger", GUN_PRICES[GUN_VACUUM], (100, 60, 180)),
 ]
 GUN_INFO = {g[0]: g for g in GUN_TYPES}
-AUTO_SHOOT_INTERVAL = 4  # auto-kanon skyder hvert N. tick
-VACUUM_INTERVAL = 12      # støvsuger suger hvert N. tick (langsom forbrug)
-VACUUM_RANGE = 10         # rækkevidde i celler
-POWER_PRICE = 5           # 5 coins for 7 strøm
-POWER_AMOUNT = 7
 
 # Slange-typer (20 stk)
 SNAKE_NORMAL = "normal"
@@ -296,158 +280,92 @@ SNAKE_TYPE_COLORS = {
     },
 }
 
-# --- Ruin-layouts (relative positioner fra anker) ---
-RUIN_TEMPLATES = [
-    # L-form
-    [(0, 0), (1, 0), (2, 0), (0, 1), (0, 2)],
-    # Omvendt L
-    [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2)],
-    # Lille kvadrat
-    [(0, 0), (1, 0), (0, 1), (1, 1)],
-    # Vandret mur
-    [(0, 0), (1, 0), (2, 0), (3, 0)],
-    # Lodret mur
-    [(0, 0), (0, 1), (0, 2), (0, 3)],
-    # T-form
-    [(0, 0), (1, 0), (2, 0), (1, 1), (1, 2)],
-    # Kryds
-    [(1, 0), (0, 1), (1, 1), (2, 1), (1, 2)],
-    # S-form
-    [(1, 0), (2, 0), (0, 1), (1, 1), (0, 2)],
-    # Lille prik-klump
-    [(0, 0), (2, 0), (1, 1), (0, 2), (2, 2)],
-]
-
-# Antal ruiner per sværhedsgrad (mere skov = flere ruiner)
-RUIN_COUNTS = [4, 6, 9, 13]
-
-# Antal dekorative træer per sværhedsgrad
-TREE_COUNTS = [8, 12, 16, 20]
-
-
-def load_highscores():
-    if os.path.exists(HIGHSCORE_FILE):
+def load_savedata():
+    if os.path.exists(SAVE_FILE):
         try:
-            with open(HIGHSCORE_FILE, "r", encoding="utf-8") as f:
+            with open(SAVE_FILE, "r", encoding="utf-8") as f:
                 return json.load(f)
         except (json.JSONDecodeError, OSError):
             pass
     return {}
 
 
-def save_highscores(data):
-    with open(HIGHSCORE_FILE, "w", encoding="utf-8") as f:
+def save_savedata(data):
+    """Skriv til en midlertidig fil og omdøb den over SAVE_FILE, så et nedbrud
+    midt i skrivningen aldrig efterlader en halv savedata.json."""
+    tmp = SAVE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, SAVE_FILE)
 
 
-def get_highscore_list(data, difficulty_idx, num_players):
-    key = f"{num_players}p_{difficulty_idx}"
-    return data.get(key, [])
+class JsonWallets:
+    """Pengepungene i SAVE_FILE som {profil}_{felt}-nøgler (p1_coins, p2_gun, ...).
 
+    Samme metoder som sqlite_store.SqliteStore, der kan vælges i stedet (--db)."""
 
-def add_highscore(data, difficulty_idx, num_players, name, score):
-    key = f"{num_players}p_{difficulty_idx}"
-    entries = data.get(key, [])
-    entries.append({"name": name, "score": score})
-    entries.sort(key=lambda e: e["score"], reverse=True)
-    entries = entries[:MAX_HIGHSCORES]
-    data[key] = entries
-    save_highscores(data)
-    for i, e in enumerate(entries):
-        if e["name"] == name and e["score"] == score:
-            return i
-    return None
+    def profiles(self):
+        """Alle profiler der har mindst ét felt i filen."""
+        names = []
+        for key in load_savedata():
+            for field in WALLET_FIELDS:
+                name = key[:-len(field) - 1]
+                if key.endswith("_" + field) and name and name not in names:
+                    names.append(name)
+        return names
 
+    def load_wallets(self, profiles):
+        """{profil: {coins, ammo, power, gun, snake_type}}; felter der ikke er gemt, mangler."""
+        data = load_savedata()
+        return {name: {field: data[f"{name}_{field}"] for field in WALLET_FIELDS if f"{name}_{field}" in data}
+                for name in profiles}
 
-def is_highscore(data, difficulty_idx, num_players, score):
-    if score <= 0:
-        return False
-    entries = get_highscore_list(data, difficulty_idx, num_players)
-    if len(entries) < MAX_HIGHSCORES:
-        return True
-    return score > entries[-1]["score"]
+    def save_wallets(self, wallets):
+        """Gem {profil: pengepung}; andre profiler i filen bevares."""
+        data = load_savedata()
+        for name, wallet in wallets.items():
+            for field, value in wallet.items():
+                data[f"{name}_{field}"] = value
+        save_savedata(data)
 
+    def record_purchase(self, profile, item, price):
+        pass  # JSON-filen har ingen købshistorik
 
-def load_savedata():
-    if os.path.exists(SAVE_FILE):
-        try:
-            with open(SAVE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError):
-            pass
-    return {}
 
+class WriteBehind:
+    """Skriver data til disk bagud i stedet for midt i et game-tick.
 
-def save_savedata(data):
-    with open(SAVE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    mark() noterer blot at data er ændret; poll() (kaldt én gang per frame,
+    efter tegningen) skriver snapshot() med write() når der er gået mindst
+    interval sekunder siden sidste skrivning, og flush() skriver med det samme
+    (rundeslut, afslutning). Mange ændringer tæt efter hinanden bliver derfor
+    til én skrivning."""
 
+    def __init__(self, snapshot, write, interval=SAVE_INTERVAL):
+        self.snapshot = snapshot
+        self.write = write
+        self.interval = interval
+        self.dirty = False
+        self.last_write = None
+        self.writes = 0
 
-def generate_ruins(count, safe_zones):
-    """Generer tilfældige ruiner på banen. safe_zones er et set af positioner der skal holdes fri."""
-    ruin_cells = set()
-    attempts = 0
-    placed = 0
-    while placed < count and attempts < count * 20:
-        attempts += 1
-        template = random.choice(RUIN_TEMPLATES)
-        # Tilfældig rotation (0, 90, 180, 270)
-        rot = random.randint(0, 3)
-        rotated = template
-        for _ in range(rot):
-            rotated = [(-y, x) for x, y in rotated]
-        # Tilfældig offset
-        min_x = min(x for x, y in rotated)
-        min_y = min(y for x, y in rotated)
-        max_x = max(x for x, y in rotated)
-        max_y = max(y for x, y in rotated)
-        ox = random.randint(2 - min_x, GRID_W - 3 - max_x)
-        oy = random.randint(2 - min_y, GRID_H - 3 - max_y)
-        cells = [(x + ox, y + oy) for x, y in rotated]
-        # Tjek at alle celler er ledige
-        valid = True
-        for cx, cy in cells:
-            if cx < 1 or cx >= GRID_W - 1 or cy < 1 or cy >= GRID_H - 1:
-                valid = False
-                break
-            if (cx, cy) in ruin_cells or (cx, cy) in safe_zones:
-                valid = False
-                break
-            # Hold afstand til andre ruiner
-            for dx in range(-1, 2):
-                for dy in range(-1, 2):
-                    if (cx + dx, cy + dy) in ruin_cells:
-                        valid = False
-                        break
-                if not valid:
-                    break
-        if valid:
-            for c in cells:
-                ruin_cells.add(c)
-            placed += 1
-    return ruin_cells
-
-
-def generate_trees(count, occupied):
-    """Generer tilfældige dekorative træ-positioner (grid-celler). Undgår occuperede celler."""
-    trees = []
-    attempts = 0
-    while len(trees) < count and attempts < count * 30:
-        attempts += 1
-        tx = random.randint(1, GRID_W - 2)
-        ty = random.randint(1, GRID_H - 2)
-        if (tx, ty) in occupied:
-            continue
-        # Hold afstand til andre træer (min 2 celler)
-        too_close = False
-        for ex, ey in trees:
-            if abs(tx - ex) <= 2 and abs(ty - ey) <= 2:
-                too_close = True
-                break
-        if not too_close:
-            trees.append((tx, ty))
-            occupied.add((tx, ty))
-    return trees
+    def mark(self):
+        self.dirty = True
+
+    def poll(self, now=None):
+        if not self.dirty:
+            return
+        now = time.monotonic() if now is None else now
+        if self.last_write is None or now - self.last_write >= self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.write(self.snapshot())
+        self.last_write = time.monotonic() if now is None else now
+        self.writes += 1
 
 
 def draw_map_floor(surface, difficulty=0):
@@ -503,8 +421,26 @@ def draw_map_floor(surface, difficulty=0):
                 pygame.draw.line(surface, (80, 85, 60), (mx, my), (mx + rng.randint(4, 10), my), 1)
 
 
-def draw_decorations(surface, trees, difficulty=0):
-    """Tegn dekorationer baseret på tema: træer/buske/vulkan-klipper/militær-strukturer."""
+def render_map_floor(difficulty=0):
+    """Forudtegn gulvet for et map-tema på en genbrugelig baggrunds-surface.
+
+    Gulvet er deterministisk (fast seed), så det kun skal tegnes én gang per tema
+    og derefter blot blittes hver frame."""
+    layer = pygame.Surface((WINDOW_W, WINDOW_H))
+    layer.fill(BLACK)
+    draw_map_floor(layer, difficulty)
+    if pygame.display.get_surface() is not None:
+        layer = layer.convert()
+    return layer
+
+
+def draw_decorations(surface, trees, difficulty=0, origin=(0, 0), seeded=False):
+    """Tegn dekorationer baseret på tema: træer/buske/vulkan-klipper/militær-strukturer.
+
+    origin er surface'ens øverste venstre hjørne i skærm-koordinater (se
+    draw_ruin_cell). Med seeded får hvert træ sit udseende fra sin egen celle,
+    så et udsnit af træerne (kameraet på en stor bane) ser ens ud uanset
+    hvilke andre træer der tegnes med."""
     theme = MAP_THEMES.get(difficulty, MAP_THEMES[0])
     rng = random.Random(77)
     cs = CELL_SIZE
@@ -516,8 +452,10 @@ def draw_decorations(surface, trees, difficulty=0):
     canopy_dk = theme["canopy_dark"]
 
     for (tx, ty) in trees:
-        px = tx * cs
-        py = ty * cs + SCOREBOARD_H
+        if seeded:
+            rng = _cell_rng(tx, ty, 77)
+        px = tx * cs - origin[0]
+        py = ty * cs + SCOREBOARD_H - origin[1]
         cx = px + cs // 2
         cy = py + cs // 2
 
@@ -658,6 +596,15 @@ def _seg_direction(prev, curr):
     return (curr[0] - prev[0], curr[1] - prev[1])
 
 
+def _lerp_cell_px(prev, curr, alpha, origin=(0, 0)):
+    """Pixel-hjørnet (øverst venstre) for en figur på vej fra celle prev til curr.
+
+    alpha=0 giver prev, alpha=1 giver curr. origin trækkes fra (kameraet)."""
+    x = prev[0] + (curr[0] - prev[0]) * alpha
+    y = prev[1] + (curr[1] - prev[1]) * alpha
+    return int(round(x * CELL_SIZE)) - origin[0], int(round(y * CELL_SIZE)) + SCOREBOARD_H - origin[1]
+
+
 # --- 3D tegne-hjælpere ---
 def _clamp(v, lo=0, hi=255):
     return max(lo, min(hi, int(v)))
@@ -694,32 +641,107 @@ def _blend(c1, c2, t):
     return tuple(_clamp(int(a + (b - a) * t)) for a, b in zip(c1, c2))
 
 
+# --- Cache af skygge- og gradient-stempler ---
+SURFACE_CACHE_MAX = 512    # max antal stempler før de mindst brugte smides ud
+
+
+class SurfaceCache:
+    """Begrænset LRU-cache af forudtegnede surfaces ("stempler").
+
+    build() kaldes kun ved cache-miss, så misses er det antal surfaces der
+    er allokeret gennem cachen."""
+
+    def __init__(self, max_items=SURFACE_CACHE_MAX):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key, build):
+        surf = self.items.get(key)
+        if surf is not None:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return surf
+        surf = build()
+        self.misses += 1
+        self.items[key] = surf
+        if len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def discard(self, key):
+        """Glem én surface (den bygges igen ved næste get)."""
+        self.items.pop(key, None)
+
+    def clear(self):
+        self.items.clear()
+
+    def stats(self):
+        """Kort statuslinje til debug-overlayet."""
+        return f"{len(self.items)}/{self.max_items}  hit {self.hits}  alloc {self.misses}  evict {self.evictions}"
+
+
+STAMP_CACHE = SurfaceCache()
+
+
+def _shadow_stamp(shape, w, h, depth, alpha_base, alpha_step, alpha_max):
+    """Alle skyggelag for et element samlet i ét stempel.
+
+    Lag d (depth..1) ligger forskudt (d, d) fra elementet; stemplet skal
+    derfor blittes ved (x + 1, y + 1)."""
+    def build():
+        stamp = pygame.Surface((w + depth - 1, h + depth - 1), pygame.SRCALPHA)
+        for d in range(depth, 0, -1):
+            alpha = min(alpha_base + (depth - d) * alpha_step, alpha_max)
+            layer = pygame.Surface((w, h), pygame.SRCALPHA)
+            if shape == "circle":
+                pygame.draw.circle(layer, (0, 0, 0, alpha), (w // 2, h // 2), w // 2 - 2)
+            else:
+                layer.fill((0, 0, 0, alpha))
+            stamp.blit(layer, (d - 1, d - 1))
+        return stamp
+    return STAMP_CACHE.get(("shadow", shape, w, h, depth, alpha_base, alpha_step, alpha_max), build)
+
+
+def _gradient_face(w, h, top, bottom, bevel=None):
+    """Flade med vertikal gradient fra top til bottom.
+
+    bevel=(highlight, dark, inner_hl) tegner draw_3d_rect's kanter med i stemplet."""
+    def build():
+        face = pygame.Surface((w, h))
+        for row in range(h):
+            frac = row / max(1, h - 1)
+            pygame.draw.line(face, _blend(top, bottom, frac), (0, row), (w - 1, row), 1)
+        if bevel:
+            highlight, dark, inner_hl = bevel
+            pygame.draw.line(face, highlight, (0, 0), (w - 1, 0), 1)
+            pygame.draw.line(face, highlight, (0, 0), (0, h - 1), 1)
+            pygame.draw.line(face, dark, (0, h - 1), (w - 1, h - 1), 1)
+            pygame.draw.line(face, dark, (w - 1, 0), (w - 1, h - 1), 1)
+            if w > 4 and h > 4:
+                pygame.draw.line(face, inner_hl, (1, 1), (w - 2, 1), 1)
+                pygame.draw.line(face, inner_hl, (1, 1), (1, h - 2), 1)
+        return face
+    return STAMP_CACHE.get(("face", w, h, top, bottom, bevel), build)
+
+
 def draw_3d_rect(surface, color, rect, depth=3):
     """Tegn et realistisk ophøjet rektangel med bløde skygger og gradient."""
     x, y, w, h = rect if isinstance(rect, tuple) else (rect.x, rect.y, rect.w, rect.h)
+    color = tuple(color)
     # Blød skygge (flere lag med alpha)
-    for d in range(depth, 0, -1):
-        alpha = 30 + (depth - d) * 15
-        sh = pygame.Surface((w, h), pygame.SRCALPHA)
-        sh.fill((0, 0, 0, min(alpha, 100)))
-        surface.blit(sh, (x + d, y + d))
-    # Hovedflade med subtle vertikal gradient
-    for row in range(h):
-        frac = row / max(1, h - 1)
-        rc = _blend(_lighten(color, 20), _darken(color, 15), frac)
-        pygame.draw.line(surface, rc, (x, y + row), (x + w - 1, y + row), 1)
-    # Bevelled kanter
-    highlight = _lighten(color, 55)
-    pygame.draw.line(surface, highlight, (x, y), (x + w - 1, y), 1)
-    pygame.draw.line(surface, highlight, (x, y), (x, y + h - 1), 1)
-    dark = _darken(color, 40)
-    pygame.draw.line(surface, dark, (x, y + h - 1), (x + w - 1, y + h - 1), 1)
-    pygame.draw.line(surface, dark, (x + w - 1, y), (x + w - 1, y + h - 1), 1)
-    # Inner glow (subtil lys ramme)
-    inner_hl = _lighten(color, 25)
-    if w > 4 and h > 4:
-        pygame.draw.line(surface, inner_hl, (x + 1, y + 1), (x + w - 2, y + 1), 1)
-        pygame.draw.line(surface, inner_hl, (x + 1, y + 1), (x + 1, y + h - 2), 1)
+    if depth > 0:
+        surface.blit(_shadow_stamp("rect", w, h, depth, 30, 15, 100), (x + 1, y + 1))
+    # Hovedflade med subtle vertikal gradient og bevelled kanter
+    if w > 0 and h > 0:
+        bevel = (_lighten(color, 55), _darken(color, 40), _lighten(color, 25))
+        surface.blit(_gradient_face(w, h, _lighten(color, 20), _darken(color, 15), bevel), (x, y))
 
 
 def draw_3d_circle(surface, color, center, radius, depth=2):
@@ -728,11 +750,9 @@ def draw_3d_circle(surface, color, center, radius, depth=2):
     if radius < 1:
         return
     # Blød skygge
-    for d in range(depth, 0, -1):
-        alpha = 25 + (depth - d) * 20
-        sh = pygame.Surface((radius * 2 + 4, radius * 2 + 4), pygame.SRCALPHA)
-        pygame.draw.circle(sh, (0, 0, 0, min(alpha, 80)), (radius + 2, radius + 2), radius)
-        surface.blit(sh, (cx - radius - 2 + d, cy - radius - 2 + d))
+    if depth > 0:
+        size = radius * 2 + 4
+        surface.blit(_shadow_stamp("circle", size, size, depth, 25, 20, 80), (cx - radius - 1, cy - radius - 1))
     # Basis cirkel
     pygame.draw.circle(surface, color, (cx, cy), radius)
     # Radial gradient (mørkere kant = ambient occlusion)
@@ -759,17 +779,13 @@ def draw_3d_circle(surface, color, center, radius, depth=2):
 def draw_3d_panel(surface, rect, base_color, depth=3):
     """Tegn et realistisk ophøjet panel med gradient og bløde kanter."""
     x, y, w, h = rect if isinstance(rect, tuple) else (rect.x, rect.y, rect.w, rect.h)
+    base_color = tuple(base_color)
     # Blød skygge
-    for d in range(depth, 0, -1):
-        alpha = 20 + (depth - d) * 15
-        sh = pygame.Surface((w, h), pygame.SRCALPHA)
-        sh.fill((0, 0, 0, min(alpha, 80)))
-        surface.blit(sh, (x + d, y + d))
+    if depth > 0:
+        surface.blit(_shadow_stamp("rect", w, h, depth, 20, 15, 80), (x + 1, y + 1))
     # Vertikal gradient panel
-    for row in range(h):
-        frac = row / max(1, h - 1)
-        rc = _blend(_lighten(base_color, 15), _darken(base_color, 10), frac)
-        pygame.draw.line(surface, rc, (x, y + row), (x + w - 1, y + row), 1)
+    if w > 0 and h > 0:
+        surface.blit(_gradient_face(w, h, _lighten(base_color, 15), _darken(base_color, 10)), (x, y))
     # Bevelled kanter
     highlight = _lighten(base_color, 45)
     dark = _darken(base_color, 40)
@@ -797,1412 +813,1193 @@ def draw_3d_tile(surface, x, y, size, base_color, light_dir=(1, 1)):
     pygame.draw.line(surface, hl, (x, y), (x, y + size - 1), 1)
 
 
-class Snake:
-    def __init__(self, start_pos, direction, color, color_dark, color_belly):
-        self.color = color
-        self.color_dark = color_dark
-        self.color_belly = color_belly
-        self.direction = direction
-        self.next_direction = direction
-        self.body = []
-        self.alive = True
-        self.grow_pending = 0
-        self.invincible_timer = 0
-        x, y = start_pos
-        for i in range(3):
-            dx, dy = direction
-            self.body.append((x - dx * i, y - dy * i))
-
-    def reset(self, start_pos, direction):
-        self.direction = direction
-        self.next_direction = direction
-        self.body = []
-        self.alive = True
-        self.grow_pending = 0
-        self.invincible_timer = 0
-        x, y = start_pos
-        for i in range(3):
-            dx, dy = direction
-            self.body.append((x - dx * i, y - dy * i))
-
-    @property
-    def is_invincible(self):
-        return self.invincible_timer > 0
+def draw_snake_segment(surface, role, cx, cy, snake_type, palette, dirs, i, tick, gun_type=GUN_NONE):
+    """Tegn ét slangesegment (hoved/krop/hale) centreret i (cx, cy).
 
-    def set_direction(self, new_dir):
-        if new_dir != OPPOSITES.get(self.direction):
-            self.next_direction = new_dir
-
-    def move(self):
-        if not self.alive:
-            return
-        self.direction = self.next_direction
-        head_x, head_y = self.body[0]
-        dx, dy = self.direction
-        new_head = (head_x + dx, head_y + dy)
-        self.body.insert(0, new_head)
-        if self.grow_pending > 0:
-            self.grow_pending -= 1
+    palette er (main, dark, belly). dirs er slangens retning for hovedet,
+    retningen ind mod kroppen for halen og (d_prev, d_next) for kroppen.
+    i er segmentets indeks (bruges til krop-mønstre)."""
+    cs = CELL_SIZE
+    sd = 2
+    px = cx - cs // 2
+    py = cy - cs // 2
+    body_col, dark_col, belly_col = palette
+
+    if role == SEG_HEAD:
+        # ============ HOVED ============
+        dx, dy = dirs
+        if snake_type in SQUARE_HEAD_TYPES:
+            # --- Firkantet hoved (Tank, Robot) ---
+            draw_3d_rect(surface, body_col, (px + 1, py + 1, cs - 2, cs - 2), depth=sd)
+            pygame.draw.rect(surface, dark_col, (px + 1, py + 1, cs - 2, cs - 2), 2, border_radius=3)
+            eo = cs // 4
+            e1 = (cx - eo, cy) if dx == 0 else (cx, cy - eo)
+            e2 = (cx + eo, cy) if dx == 0 else (cx, cy + eo)
+            if snake_type == SNAKE_TANK:
+                if dx != 0:
+                    pygame.draw.line(surface, dark_col, (cx, py + 3), (cx, py + cs - 3), 1)
+                else:
+                    pygame.draw.line(surface, dark_col, (px + 3, cy), (px + cs - 3, cy), 1)
+                draw_3d_rect(surface, (200, 200, 80), (e1[0] - 2, e1[1] - 1, 4, 2), depth=1)
+                draw_3d_rect(surface, (200, 200, 80), (e2[0] - 2, e2[1] - 1, 4, 2), depth=1)
+                ant_x = cx - dx * (cs // 3)
+                ant_y = cy - dy * (cs // 3)
+                pygame.draw.line(surface, (180, 180, 180), (ant_x, ant_y), (ant_x, ant_y - 9), 1)
+                pr = 2 if tick % 10 < 5 else 3
+                draw_3d_circle(surface, RED, (ant_x, ant_y - 9), pr, depth=1)
+            else:  # ROBOT
+                # LED øjne
+                led_col = (50, 255, 50) if tick % 8 < 4 else (20, 180, 20)
+                draw_3d_rect(surface, led_col, (e1[0] - 2, e1[1] - 2, 4, 4), depth=1)
+                draw_3d_rect(surface, led_col, (e2[0] - 2, e2[1] - 2, 4, 4), depth=1)
+                # Antenne med roterende top
+                ant_x = cx - dx * (cs // 3)
+                ant_y = cy - dy * (cs // 3)
+                pygame.draw.line(surface, (180, 180, 190), (ant_x, ant_y), (ant_x, ant_y - 8), 2)
+                ang = tick * 0.4
+                rx = int(ant_x + 3 * math.cos(ang))
+                ry = int(ant_y - 8 + 2 * math.sin(ang))
+                draw_3d_circle(surface, (100, 200, 255), (rx, ry), 2, depth=1)
+                # Mund-gitter
+                mx = cx + dx * (cs // 3)
+                my = cy + dy * (cs // 3)
+                for off in (-2, 0, 2):
+                    if dx != 0:
+                        pygame.draw.line(surface, (120, 120, 130), (mx, my + off - 1), (mx + dx * 2, my + off - 1), 1)
+                    else:
+                        pygame.draw.line(surface, (120, 120, 130), (mx + off - 1, my), (mx + off - 1, my + dy * 2), 1)
         else:
-            self.body.pop()
-        if self.invincible_timer > 0:
-            self.invincible_timer -= 1
-
-    def grow(self, amount=1):
-        self.grow_pending += amount
-
-    def head(self):
-        return self.body[0]
-
-    def check_wall_collision(self):
-        x, y = self.head()
-        if x < 0 or x >= GRID_W or y < 0 or y >= GRID_H:
-            if not self.is_invincible:
-                self.alive = False
-
-    def check_self_collision(self):
-        if self.head() in self.body[1:]:
-            if not self.is_invincible:
-                self.alive = False
-
-    def check_ruin_collision(self, ruins):
-        if self.head() in ruins:
-            if not self.is_invincible:
-                self.alive = False
-
-    def draw(self, surface, tick, gun_type=GUN_NONE, snake_type=SNAKE_NORMAL):
-        if not self.body:
-            return
-
-        n = len(self.body)
-        cs = CELL_SIZE
-        off_y = SCOREBOARD_H
-        sd = 2
-
-        for i in range(n):
-            x, y = self.body[i]
-            px = x * cs
-            py = y * cs + off_y
-            cx = px + cs // 2
-            cy = py + cs // 2
-
-            if self.is_invincible:
-                pulse = (math.sin(tick * 0.5) + 1) / 2
-                bright = int(180 + 75 * pulse)
-                body_col = (bright, bright, bright)
-                dark_col = (max(0, bright - 50),) * 3
-                belly_col = (min(255, bright + 20),) * 3
-            elif snake_type == SNAKE_RAINBOW:
-                hue = ((i * 18 + tick * 2) % 360) / 360.0
-                body_col = _hsv_to_rgb(hue, 0.75, 0.88)
-                dark_col = _darken(body_col, 40)
-                belly_col = _lighten(body_col, 30)
+            # --- Rund hoved (alle andre 18 typer) ---
+            draw_3d_circle(surface, body_col, (cx, cy), cs // 2, depth=sd)
+            eo = cs // 4
+            if dx == 0:
+                e1, e2 = (cx - eo, cy), (cx + eo, cy)
+                poff = (0, dy * 2)
             else:
-                body_col = self.color
-                dark_col = self.color_dark
-                belly_col = self.color_belly
-
-            if i == 0:
-                # ============ HOVED ============
-                dx, dy = self.direction
-                if snake_type in SQUARE_HEAD_TYPES:
-                    # --- Firkantet hoved (Tank, Robot) ---
-                    draw_3d_rect(surface, body_col, (px + 1, py + 1, cs - 2, cs - 2), depth=sd)
-                    pygame.draw.rect(surface, dark_col, (px + 1, py + 1, cs - 2, cs - 2), 2, border_radius=3)
-                    eo = cs // 4
-                    e1 = (cx - eo, cy) if dx == 0 else (cx, cy - eo)
-                    e2 = (cx + eo, cy) if dx == 0 else (cx, cy + eo)
-                    if snake_type == SNAKE_TANK:
-                        if dx != 0:
-                            pygame.draw.line(surface, dark_col, (cx, py + 3), (cx, py + cs - 3), 1)
-                        else:
-                            pygame.draw.line(surface, dark_col, (px + 3, cy), (px + cs - 3, cy), 1)
-                        draw_3d_rect(surface, (200, 200, 80), (e1[0] - 2, e1[1] - 1, 4, 2), depth=1)
-                        draw_3d_rect(surface, (200, 200, 80), (e2[0] - 2, e2[1] - 1, 4, 2), depth=1)
-                        ant_x = cx - dx * (cs // 3)
-                        ant_y = cy - dy * (cs // 3)
-                        pygame.draw.line(surface, (180, 180, 180), (ant_x, ant_y), (ant_x, ant_y - 9), 1)
-                        pr = 2 if tick % 10 < 5 else 3
-                        draw_3d_circle(surface, RED, (ant_x, ant_y - 9), pr, depth=1)
-                    else:  # ROBOT
-                        # LED øjne
-                        led_col = (50, 255, 50) if tick % 8 < 4 else (20, 180, 20)
-                        draw_3d_rect(surface, led_col, (e1[0] - 2, e1[1] - 2, 4, 4), depth=1)
-                        draw_3d_rect(surface, led_col, (e2[0] - 2, e2[1] - 2, 4, 4), depth=1)
-                        # Antenne med roterende top
-                        ant_x = cx - dx * (cs // 3)
-                        ant_y = cy - dy * (cs // 3)
-                        pygame.draw.line(surface, (180, 180, 190), (ant_x, ant_y), (ant_x, ant_y - 8), 2)
-                        ang = tick * 0.4
-                        rx = int(ant_x + 3 * math.cos(ang))
-                        ry = int(ant_y - 8 + 2 * math.sin(ang))
-                        draw_3d_circle(surface, (100, 200, 255), (rx, ry), 2, depth=1)
-                        # Mund-gitter
-                        mx = cx + dx * (cs // 3)
-                        my = cy + dy * (cs // 3)
-                        for off in (-2, 0, 2):
-                            if dx != 0:
-                                pygame.draw.line(surface, (120, 120, 130), (mx, my + off - 1), (mx + dx * 2, my + off - 1), 1)
-                            else:
-                                pygame.draw.line(surface, (120, 120, 130), (mx + off - 1, my), (mx + off - 1, my + dy * 2), 1)
+                e1, e2 = (cx, cy - eo), (cx, cy + eo)
+                poff = (dx * 2, 0)
+
+            # --- Øjne per type ---
+            if snake_type == SNAKE_DOG:
+                draw_3d_circle(surface, WHITE, e1, 4, depth=1)
+                draw_3d_circle(surface, WHITE, e2, 4, depth=1)
+                pygame.draw.circle(surface, (60, 30, 10), (e1[0] + poff[0], e1[1] + poff[1]), 2)
+                pygame.draw.circle(surface, (60, 30, 10), (e2[0] + poff[0], e2[1] + poff[1]), 2)
+            elif snake_type == SNAKE_CAT:
+                draw_3d_circle(surface, (220, 200, 50), e1, 3, depth=1)
+                draw_3d_circle(surface, (220, 200, 50), e2, 3, depth=1)
+                # Slit-pupiller
+                if dx == 0:
+                    pygame.draw.line(surface, BLACK, (e1[0] + poff[0], e1[1] - 2), (e1[0] + poff[0], e1[1] + 2), 1)
+                    pygame.draw.line(surface, BLACK, (e2[0] + poff[0], e2[1] - 2), (e2[0] + poff[0], e2[1] + 2), 1)
+                else:
+                    pygame.draw.line(surface, BLACK, (e1[0] - 2, e1[1] + poff[1]), (e1[0] + 2, e1[1] + poff[1]), 1)
+                    pygame.draw.line(surface, BLACK, (e2[0] - 2, e2[1] + poff[1]), (e2[0] + 2, e2[1] + poff[1]), 1)
+            elif snake_type == SNAKE_ALIEN:
+                draw_3d_circle(surface, (20, 20, 20), e1, 5, depth=1)
+                draw_3d_circle(surface, (20, 20, 20), e2, 5, depth=1)
+                draw_3d_circle(surface, (0, 255, 100), e1, 3, depth=0)
+                draw_3d_circle(surface, (0, 255, 100), e2, 3, depth=0)
+            elif snake_type == SNAKE_ZOMBIE:
+                draw_3d_circle(surface, (200, 200, 50), e1, 3, depth=1)
+                pygame.draw.circle(surface, (120, 20, 20), (e1[0] + poff[0], e1[1] + poff[1]), 2)
+                # X-øje
+                pygame.draw.line(surface, RED, (e2[0] - 2, e2[1] - 2), (e2[0] + 2, e2[1] + 2), 2)
+                pygame.draw.line(surface, RED, (e2[0] + 2, e2[1] - 2), (e2[0] - 2, e2[1] + 2), 2)
+            elif snake_type == SNAKE_SKELETON:
+                # Tomme øjenhuler
+                pygame.draw.circle(surface, (20, 15, 10), e1, 4)
+                pygame.draw.circle(surface, (20, 15, 10), e2, 4)
+                pygame.draw.circle(surface, (50, 40, 30), e1, 2)
+                pygame.draw.circle(surface, (50, 40, 30), e2, 2)
+            elif snake_type == SNAKE_LAVA:
+                # Glødende øjne
+                glow = (255, 100 + int(50 * math.sin(tick * 0.3)), 20)
+                draw_3d_circle(surface, glow, e1, 3, depth=1)
+                draw_3d_circle(surface, glow, e2, 3, depth=1)
+            elif snake_type == SNAKE_PIRATE:
+                # Normalt øje + klap
+                draw_3d_circle(surface, WHITE, e1, 3, depth=1)
+                pygame.draw.circle(surface, BLACK, (e1[0] + poff[0], e1[1] + poff[1]), 2)
+                pygame.draw.circle(surface, (30, 30, 30), e2, 4)
+                pygame.draw.line(surface, (60, 40, 20), (e2[0] - 4, e2[1] - 5), (e2[0] + 4, e2[1] - 5), 2)
+            elif snake_type == SNAKE_NINJA:
+                # Smalle øjne (maske)
+                pygame.draw.rect(surface, WHITE, (e1[0] - 3, e1[1] - 1, 6, 2))
+                pygame.draw.rect(surface, WHITE, (e2[0] - 3, e2[1] - 1, 6, 2))
+            else:
+                # Standard øjne (Normal, Dragon, Shark, Fire, Ice, Rainbow, Candy, Gold, Electric, Diamond)
+                draw_3d_circle(surface, WHITE, e1, 3, depth=1)
+                draw_3d_circle(surface, WHITE, e2, 3, depth=1)
+                pygame.draw.circle(surface, BLACK, (e1[0] + poff[0], e1[1] + poff[1]), 2)
+                pygame.draw.circle(surface, BLACK, (e2[0] + poff[0], e2[1] + poff[1]), 2)
+
+            # --- Dekorationer per type ---
+            if snake_type == SNAKE_DOG:
+                ear_s = 6
+                if dx != 0:
+                    ea1, ea2 = (cx - dx * 3, cy - cs // 3 - 2), (cx - dx * 3, cy + cs // 3 + 2)
+                else:
+                    ea1, ea2 = (cx - cs // 3 - 2, cy - dy * 3), (cx + cs // 3 + 2, cy - dy * 3)
+                draw_3d_circle(surface, dark_col, ea1, ear_s, depth=sd)
+                draw_3d_circle(surface, dark_col, ea2, ear_s, depth=sd)
+                draw_3d_circle(surface, (20, 20, 20), (cx + dx * (cs // 2), cy + dy * (cs // 2)), 3, depth=1)
+                pink = (255, 130, 150)
+                tmx, tmy = cx + dx * (cs // 2 + 1), cy + dy * (cs // 2 + 1)
+                ttx, tty = cx + dx * (cs // 2 + 4), cy + dy * (cs // 2 + 4)
+                if dx != 0:
+                    pygame.draw.line(surface, pink, (tmx, tmy), (ttx, tty + 3), 3)
+                    draw_3d_circle(surface, pink, (ttx, tty + 4), 2, depth=1)
+                else:
+                    pygame.draw.line(surface, pink, (tmx, tmy), (ttx + 3, tty), 3)
+                    draw_3d_circle(surface, pink, (ttx + 4, tty), 2, depth=1)
+            elif snake_type == SNAKE_CAT:
+                # Spidse ører
+                if dx != 0:
+                    ea1 = [(cx - dx * 4, cy - cs // 2 - 4), (cx - dx * 4 - 3, cy - cs // 4), (cx - dx * 4 + 3, cy - cs // 4)]
+                    ea2 = [(cx - dx * 4, cy + cs // 2 + 4), (cx - dx * 4 - 3, cy + cs // 4), (cx - dx * 4 + 3, cy + cs // 4)]
                 else:
-                    # --- Rund hoved (alle andre 18 typer) ---
-                    draw_3d_circle(surface, body_col, (cx, cy), cs // 2, depth=sd)
-                    eo = cs // 4
-                    if dx == 0:
-                        e1, e2 = (cx - eo, cy), (cx + eo, cy)
-                        poff = (0, dy * 2)
+                    ea1 = [(cx - cs // 2 - 4, cy - dy * 4), (cx - cs // 4, cy - dy * 4 - 3), (cx - cs // 4, cy - dy * 4 + 3)]
+                    ea2 = [(cx + cs // 2 + 4, cy - dy * 4), (cx + cs // 4, cy - dy * 4 - 3), (cx + cs // 4, cy - dy * 4 + 3)]
+                pygame.draw.polygon(surface, dark_col, ea1)
+                pygame.draw.polygon(surface, dark_col, ea2)
+                pygame.draw.polygon(surface, (255, 180, 180), [(p[0], p[1]) for p in ea1[:1]] + [(ea1[1][0] + 1, ea1[1][1]), (ea1[2][0] - 1, ea1[2][1])])
+                # Knurhår
+                nx, ny = cx + dx * (cs // 2), cy + dy * (cs // 2)
+                draw_3d_circle(surface, (255, 150, 170), (nx, ny), 2, depth=1)
+                if dx != 0:
+                    for wy in (-3, 0, 3):
+                        pygame.draw.line(surface, (180, 160, 140), (nx, ny + wy), (nx + dx * 6, ny + wy + (1 if wy > 0 else -1 if wy < 0 else 0)), 1)
+                else:
+                    for wx in (-3, 0, 3):
+                        pygame.draw.line(surface, (180, 160, 140), (nx + wx, ny), (nx + wx + (1 if wx > 0 else -1 if wx < 0 else 0), ny + dy * 6), 1)
+            elif snake_type == SNAKE_DRAGON:
+                # Horn
+                if dx != 0:
+                    draw_3d_circle(surface, (180, 140, 40), (cx - dx * 2, cy - cs // 3 - 3), 3, depth=1)
+                    draw_3d_circle(surface, (180, 140, 40), (cx - dx * 2, cy + cs // 3 + 3), 3, depth=1)
+                else:
+                    draw_3d_circle(surface, (180, 140, 40), (cx - cs // 3 - 3, cy - dy * 2), 3, depth=1)
+                    draw_3d_circle(surface, (180, 140, 40), (cx + cs // 3 + 3, cy - dy * 2), 3, depth=1)
+                # Ild-ånde
+                fx, fy = cx + dx * (cs // 2 + 4), cy + dy * (cs // 2 + 4)
+                draw_3d_circle(surface, (255, 180, 30), (fx, fy), 3, depth=0)
+                draw_3d_circle(surface, (255, 80, 20), (fx + dx * 2, fy + dy * 2), 2, depth=0)
+            elif snake_type == SNAKE_SHARK:
+                # Rygfinne
+                if dx != 0:
+                    fin_pts = [(cx, cy - cs // 2 - 5), (cx - 4, cy - cs // 4), (cx + 4, cy - cs // 4)]
+                else:
+                    fin_pts = [(cx - cs // 2 - 5, cy), (cx - cs // 4, cy - 4), (cx - cs // 4, cy + 4)]
+                pygame.draw.polygon(surface, _darken(body_col, 20), fin_pts)
+                pygame.draw.polygon(surface, _lighten(body_col, 15), fin_pts, 1)
+                # Tænder
+                mx, my = cx + dx * (cs // 2), cy + dy * (cs // 2)
+                for tt in (-3, -1, 1, 3):
+                    if dx != 0:
+                        pygame.draw.polygon(surface, WHITE, [(mx, my + tt), (mx + dx * 2, my + tt - 1), (mx + dx * 2, my + tt + 1)])
                     else:
-                        e1, e2 = (cx, cy - eo), (cx, cy + eo)
-                        poff = (dx * 2, 0)
-
-                    # --- Øjne per type ---
-                    if snake_type == SNAKE_DOG:
-                        draw_3d_circle(surface, WHITE, e1, 4, depth=1)
-                        draw_3d_circle(surface, WHITE, e2, 4, depth=1)
-                        pygame.draw.circle(surface, (60, 30, 10), (e1[0] + poff[0], e1[1] + poff[1]), 2)
-                        pygame.draw.circle(surface, (60, 30, 10), (e2[0] + poff[0], e2[1] + poff[1]), 2)
-                    elif snake_type == SNAKE_CAT:
-                        draw_3d_circle(surface, (220, 200, 50), e1, 3, depth=1)
-                        draw_3d_circle(surface, (220, 200, 50), e2, 3, depth=1)
-                        # Slit-pupiller
-                        if dx == 0:
-                            pygame.draw.line(surface, BLACK, (e1[0] + poff[0], e1[1] - 2), (e1[0] + poff[0], e1[1] + 2), 1)
-                            pygame.draw.line(surface, BLACK, (e2[0] + poff[0], e2[1] - 2), (e2[0] + poff[0], e2[1] + 2), 1)
-                        else:
-                            pygame.draw.line(surface, BLACK, (e1[0] - 2, e1[1] + poff[1]), (e1[0] + 2, e1[1] + poff[1]), 1)
-                            pygame.draw.line(surface, BLACK, (e2[0] - 2, e2[1] + poff[1]), (e2[0] + 2, e2[1] + poff[1]), 1)
-                    elif snake_type == SNAKE_ALIEN:
-                        draw_3d_circle(surface, (20, 20, 20), e1, 5, depth=1)
-                        draw_3d_circle(surface, (20, 20, 20), e2, 5, depth=1)
-                        draw_3d_circle(surface, (0, 255, 100), e1, 3, depth=0)
-                        draw_3d_circle(surface, (0, 255, 100), e2, 3, depth=0)
-                    elif snake_type == SNAKE_ZOMBIE:
-                        draw_3d_circle(surface, (200, 200, 50), e1, 3, depth=1)
-                        pygame.draw.circle(surface, (120, 20, 20), (e1[0] + poff[0], e1[1] + poff[1]), 2)
-                        # X-øje
-                        pygame.draw.line(surface, RED, (e2[0] - 2, e2[1] - 2), (e2[0] + 2, e2[1] + 2), 2)
-                        pygame.draw.line(surface, RED, (e2[0] + 2, e2[1] - 2), (e2[0] - 2, e2[1] + 2), 2)
-                    elif snake_type == SNAKE_SKELETON:
-                        # Tomme øjenhuler
-                        pygame.draw.circle(surface, (20, 15, 10), e1, 4)
-                        pygame.draw.circle(surface, (20, 15, 10), e2, 4)
-                        pygame.draw.circle(surface, (50, 40, 30), e1, 2)
-                        pygame.draw.circle(surface, (50, 40, 30), e2, 2)
-                    elif snake_type == SNAKE_LAVA:
-                        # Glødende øjne
-                        glow = (255, 100 + int(50 * math.sin(tick * 0.3)), 20)
-                        draw_3d_circle(surface, glow, e1, 3, depth=1)
-                        draw_3d_circle(surface, glow, e2, 3, depth=1)
-                    elif snake_type == SNAKE_PIRATE:
-                        # Normalt øje + klap
-                        draw_3d_circle(surface, WHITE, e1, 3, depth=1)
-                        pygame.draw.circle(surface, BLACK, (e1[0] + poff[0], e1[1] + poff[1]), 2)
-                        pygame.draw.circle(surface, (30, 30, 30), e2, 4)
-                        pygame.draw.line(surface, (60, 40, 20), (e2[0] - 4, e2[1] - 5), (e2[0] + 4, e2[1] - 5), 2)
-                    elif snake_type == SNAKE_NINJA:
-                        # Smalle øjne (maske)
-                        pygame.draw.rect(surface, WHITE, (e1[0] - 3, e1[1] - 1, 6, 2))
-                        pygame.draw.rect(surface, WHITE, (e2[0] - 3, e2[1] - 1, 6, 2))
+                        pygame.draw.polygon(surface, WHITE, [(mx + tt, my), (mx + tt - 1, my + dy * 2), (mx + tt + 1, my + dy * 2)])
+            elif snake_type == SNAKE_FIRE:
+                # Flamme-aura
+                for _ in range(3):
+                    fa = tick * 0.3 + _ * 2.1
+                    fr = cs // 2 + 2 + int(2 * math.sin(fa))
+                    fax = cx + int(fr * 0.7 * math.cos(fa))
+                    fay = cy + int(fr * 0.7 * math.sin(fa))
+                    draw_3d_circle(surface, (255, 160 + int(40 * math.sin(fa)), 20), (fax, fay), 2, depth=0)
+                # Ild-tunge
+                pygame.draw.line(surface, (255, 200, 40), (cx + dx * (cs // 2), cy + dy * (cs // 2)),
+                                 (cx + dx * (cs // 2 + 4), cy + dy * (cs // 2 + 4)), 2)
+            elif snake_type == SNAKE_ICE:
+                # Iskrystaller på toppen
+                for off in (-3, 0, 3):
+                    ix = cx - dx * 3 + (off if dx != 0 else 0)
+                    iy = cy - dy * 3 + (off if dy != 0 else 0)
+                    pygame.draw.polygon(surface, (200, 230, 255), [(ix, iy - 5), (ix - 2, iy), (ix + 2, iy)])
+            elif snake_type == SNAKE_ZOMBIE:
+                # Sting over hovedet
+                pygame.draw.line(surface, (80, 60, 50), (cx - 4, cy - 2), (cx + 4, cy - 2), 1)
+                for sx in range(-3, 4, 2):
+                    pygame.draw.line(surface, (80, 60, 50), (cx + sx, cy - 3), (cx + sx, cy - 1), 1)
+            elif snake_type == SNAKE_NINJA:
+                # Pandebånd
+                if dx != 0:
+                    pygame.draw.line(surface, RED, (cx - dx * 2, cy - cs // 2 + 1), (cx - dx * 2, cy + cs // 2 - 1), 2)
+                    # Bånd-ender
+                    pygame.draw.line(surface, RED, (cx - dx * 3, cy - cs // 2), (cx - dx * 6, cy - cs // 2 - 3), 1)
+                    pygame.draw.line(surface, RED, (cx - dx * 3, cy + cs // 2), (cx - dx * 6, cy + cs // 2 + 3), 1)
+                else:
+                    pygame.draw.line(surface, RED, (cx - cs // 2 + 1, cy - dy * 2), (cx + cs // 2 - 1, cy - dy * 2), 2)
+            elif snake_type == SNAKE_PIRATE:
+                # Bandana
+                if dx != 0:
+                    pygame.draw.line(surface, (180, 30, 30), (cx - dx * 3, cy - cs // 2), (cx - dx * 3, cy + cs // 2), 2)
+                else:
+                    pygame.draw.line(surface, (180, 30, 30), (cx - cs // 2, cy - dy * 3), (cx + cs // 2, cy - dy * 3), 2)
+            elif snake_type == SNAKE_ALIEN:
+                # Antenner
+                for side in (-1, 1):
+                    if dx != 0:
+                        ax, ay = cx - dx * 4, cy + side * (cs // 3)
+                        pygame.draw.line(surface, (100, 255, 100), (ax, ay), (ax - dx * 3, ay + side * 5), 1)
+                        draw_3d_circle(surface, (150, 255, 150), (ax - dx * 3, ay + side * 5), 2, depth=0)
                     else:
-                        # Standard øjne (Normal, Dragon, Shark, Fire, Ice, Rainbow, Candy, Gold, Electric, Diamond)
-                        draw_3d_circle(surface, WHITE, e1, 3, depth=1)
-                        draw_3d_circle(surface, WHITE, e2, 3, depth=1)
-                        pygame.draw.circle(surface, BLACK, (e1[0] + poff[0], e1[1] + poff[1]), 2)
-                        pygame.draw.circle(surface, BLACK, (e2[0] + poff[0], e2[1] + poff[1]), 2)
-
-                    # --- Dekorationer per type ---
-                    if snake_type == SNAKE_DOG:
-                        ear_s = 6
-                        if dx != 0:
-                            ea1, ea2 = (cx - dx * 3, cy - cs // 3 - 2), (cx - dx * 3, cy + cs // 3 + 2)
-                        else:
-                            ea1, ea2 = (cx - cs // 3 - 2, cy - dy * 3), (cx + cs // 3 + 2, cy - dy * 3)
-                        draw_3d_circle(surface, dark_col, ea1, ear_s, depth=sd)
-                        draw_3d_circle(surface, dark_col, ea2, ear_s, depth=sd)
-                        draw_3d_circle(surface, (20, 20, 20), (cx + dx * (cs // 2), cy + dy * (cs // 2)), 3, depth=1)
-                        pink = (255, 130, 150)
-                        tmx, tmy = cx + dx * (cs // 2 + 1), cy + dy * (cs // 2 + 1)
-                        ttx, tty = cx + dx * (cs // 2 + 4), cy + dy * (cs // 2 + 4)
-                        if dx != 0:
-                            pygame.draw.line(surface, pink, (tmx, tmy), (ttx, tty + 3), 3)
-                            draw_3d_circle(surface, pink, (ttx, tty + 4), 2, depth=1)
-                        else:
-                            pygame.draw.line(surface, pink, (tmx, tmy), (ttx + 3, tty), 3)
-                            draw_3d_circle(surface, pink, (ttx + 4, tty), 2, depth=1)
-                    elif snake_type == SNAKE_CAT:
-                        # Spidse ører
-                        if dx != 0:
-                            ea1 = [(cx - dx * 4, cy - cs // 2 - 4), (cx - dx * 4 - 3, cy - cs // 4), (cx - dx * 4 + 3, cy - cs // 4)]
-                            ea2 = [(cx - dx * 4, cy + cs // 2 + 4), (cx - dx * 4 - 3, cy + cs // 4), (cx - dx * 4 + 3, cy + cs // 4)]
-                        else:
-                            ea1 = [(cx - cs // 2 - 4, cy - dy * 4), (cx - cs // 4, cy - dy * 4 - 3), (cx - cs // 4, cy - dy * 4 + 3)]
-                            ea2 = [(cx + cs // 2 + 4, cy - dy * 4), (cx + cs // 4, cy - dy * 4 - 3), (cx + cs // 4, cy - dy * 4 + 3)]
-                        pygame.draw.polygon(surface, dark_col, ea1)
-                        pygame.draw.polygon(surface, dark_col, ea2)
-                        pygame.draw.polygon(surface, (255, 180, 180), [(p[0], p[1]) for p in ea1[:1]] + [(ea1[1][0] + 1, ea1[1][1]), (ea1[2][0] - 1, ea1[2][1])])
-                        # Knurhår
-                        nx, ny = cx + dx * (cs // 2), cy + dy * (cs // 2)
-                        draw_3d_circle(surface, (255, 150, 170), (nx, ny), 2, depth=1)
-                        if dx != 0:
-                            for wy in (-3, 0, 3):
-                                pygame.draw.line(surface, (180, 160, 140), (nx, ny + wy), (nx + dx * 6, ny + wy + (1 if wy > 0 else -1 if wy < 0 else 0)), 1)
-                        else:
-                            for wx in (-3, 0, 3):
-                                pygame.draw.line(surface, (180, 160, 140), (nx + wx, ny), (nx + wx + (1 if wx > 0 else -1 if wx < 0 else 0), ny + dy * 6), 1)
-                    elif snake_type == SNAKE_DRAGON:
-                        # Horn
-                        if dx != 0:
-                            draw_3d_circle(surface, (180, 140, 40), (cx - dx * 2, cy - cs // 3 - 3), 3, depth=1)
-                            draw_3d_circle(surface, (180, 140, 40), (cx - dx * 2, cy + cs // 3 + 3), 3, depth=1)
-                        else:
-                            draw_3d_circle(surface, (180, 140, 40), (cx - cs // 3 - 3, cy - dy * 2), 3, depth=1)
-                            draw_3d_circle(surface, (180, 140, 40), (cx + cs // 3 + 3, cy - dy * 2), 3, depth=1)
-                        # Ild-ånde
-                        fx, fy = cx + dx * (cs // 2 + 4), cy + dy * (cs // 2 + 4)
-                        draw_3d_circle(surface, (255, 180, 30), (fx, fy), 3, depth=0)
-                        draw_3d_circle(surface, (255, 80, 20), (fx + dx * 2, fy + dy * 2), 2, depth=0)
-                    elif snake_type == SNAKE_SHARK:
-                        # Rygfinne
-                        if dx != 0:
-                            fin_pts = [(cx, cy - cs // 2 - 5), (cx - 4, cy - cs // 4), (cx + 4, cy - cs // 4)]
-                        else:
-                            fin_pts = [(cx - cs // 2 - 5, cy), (cx - cs // 4, cy - 4), (cx - cs // 4, cy + 4)]
-                        pygame.draw.polygon(surface, _darken(body_col, 20), fin_pts)
-                        pygame.draw.polygon(surface, _lighten(body_col, 15), fin_pts, 1)
-                        # Tænder
-                        mx, my = cx + dx * (cs // 2), cy + dy * (cs // 2)
-                        for tt in (-3, -1, 1, 3):
-                            if dx != 0:
-                                pygame.draw.polygon(surface, WHITE, [(mx, my + tt), (mx + dx * 2, my + tt - 1), (mx + dx * 2, my + tt + 1)])
-                            else:
-                                pygame.draw.polygon(surface, WHITE, [(mx + tt, my), (mx + tt - 1, my + dy * 2), (mx + tt + 1, my + dy * 2)])
-                    elif snake_type == SNAKE_FIRE:
-                        # Flamme-aura
-                        for _ in range(3):
-                            fa = tick * 0.3 + _ * 2.1
-                            fr = cs // 2 + 2 + int(2 * math.sin(fa))
-                            fax = cx + int(fr * 0.7 * math.cos(fa))
-                            fay = cy + int(fr * 0.7 * math.sin(fa))
-                            draw_3d_circle(surface, (255, 160 + int(40 * math.sin(fa)), 20), (fax, fay), 2, depth=0)
-                        # Ild-tunge
-                        pygame.draw.line(surface, (255, 200, 40), (cx + dx * (cs // 2), cy + dy * (cs // 2)),
-                                         (cx + dx * (cs // 2 + 4), cy + dy * (cs // 2 + 4)), 2)
-                    elif snake_type == SNAKE_ICE:
-                        # Iskrystaller på toppen
-                        for off in (-3, 0, 3):
-                            ix = cx - dx * 3 + (off if dx != 0 else 0)
-                            iy = cy - dy * 3 + (off if dy != 0 else 0)
-                            pygame.draw.polygon(surface, (200, 230, 255), [(ix, iy - 5), (ix - 2, iy), (ix + 2, iy)])
-                    elif snake_type == SNAKE_ZOMBIE:
-                        # Sting over hovedet
-                        pygame.draw.line(surface, (80, 60, 50), (cx - 4, cy - 2), (cx + 4, cy - 2), 1)
-                        for sx in range(-3, 4, 2):
-                            pygame.draw.line(surface, (80, 60, 50), (cx + sx, cy - 3), (cx + sx, cy - 1), 1)
-                    elif snake_type == SNAKE_NINJA:
-                        # Pandebånd
-                        if dx != 0:
-                            pygame.draw.line(surface, RED, (cx - dx * 2, cy - cs // 2 + 1), (cx - dx * 2, cy + cs // 2 - 1), 2)
-                            # Bånd-ender
-                            pygame.draw.line(surface, RED, (cx - dx * 3, cy - cs // 2), (cx - dx * 6, cy - cs // 2 - 3), 1)
-                            pygame.draw.line(surface, RED, (cx - dx * 3, cy + cs // 2), (cx - dx * 6, cy + cs // 2 + 3), 1)
-                        else:
-                            pygame.draw.line(surface, RED, (cx - cs // 2 + 1, cy - dy * 2), (cx + cs // 2 - 1, cy - dy * 2), 2)
-                    elif snake_type == SNAKE_PIRATE:
-                        # Bandana
-                        if dx != 0:
-                            pygame.draw.line(surface, (180, 30, 30), (cx - dx * 3, cy - cs // 2), (cx - dx * 3, cy + cs // 2), 2)
-                        else:
-                            pygame.draw.line(surface, (180, 30, 30), (cx - cs // 2, cy - dy * 3), (cx + cs // 2, cy - dy * 3), 2)
-                    elif snake_type == SNAKE_ALIEN:
-                        # Antenner
-                        for side in (-1, 1):
-                            if dx != 0:
-                                ax, ay = cx - dx * 4, cy + side * (cs // 3)
-                                pygame.draw.line(surface, (100, 255, 100), (ax, ay), (ax - dx * 3, ay + side * 5), 1)
-                                draw_3d_circle(surface, (150, 255, 150), (ax - dx * 3, ay + side * 5), 2, depth=0)
-                            else:
-                                ax, ay = cx + side * (cs // 3), cy - dy * 4
-                                pygame.draw.line(surface, (100, 255, 100), (ax, ay), (ax + side * 5, ay - dy * 3), 1)
-                                draw_3d_circle(surface, (150, 255, 150), (ax + side * 5, ay - dy * 3), 2, depth=0)
-                    elif snake_type == SNAKE_CANDY:
-                        # Lille sløjfe
-                        bx, by = cx - dx * 3, cy - dy * 3 - 3
-                        pygame.draw.circle(surface, (255, 80, 120), (bx - 2, by), 2)
-                        pygame.draw.circle(surface, (255, 80, 120), (bx + 2, by), 2)
-                        pygame.draw.circle(surface, (255, 200, 220), (bx, by), 1)
-                    elif snake_type == SNAKE_GOLD:
-                        # Krone (3 trekanter)
-                        crown_y = cy - cs // 2 - 2
-                        for coff in (-3, 0, 3):
-                            pygame.draw.polygon(surface, GOLD, [
-                                (cx + coff, crown_y - 4), (cx + coff - 2, crown_y + 1), (cx + coff + 2, crown_y + 1)])
-                        pygame.draw.rect(surface, (200, 160, 0), (cx - 5, crown_y, 10, 2))
-                    elif snake_type == SNAKE_SKELETON:
-                        # Næse-hul + revner
-                        nx, ny = cx + dx * 2, cy + dy * 2
-                        pygame.draw.polygon(surface, (40, 35, 30), [(nx, ny), (nx - 1, ny + 2), (nx + 1, ny + 2)])
-                        pygame.draw.line(surface, (140, 130, 120), (cx - 3, cy - 4), (cx + 1, cy - 2), 1)
-                    elif snake_type == SNAKE_LAVA:
-                        # Glødende revner
-                        for loff in (-3, 3):
-                            pygame.draw.line(surface, (255, 120, 20), (cx + loff, cy - 3), (cx + loff + 1, cy + 3), 1)
-                    elif snake_type == SNAKE_ELECTRIC:
-                        # Gnister
-                        for _ in range(2):
-                            sa = tick * 0.5 + _ * 3.14
-                            sr = cs // 2 + 2
-                            sx = cx + int(sr * math.cos(sa))
-                            sy = cy + int(sr * math.sin(sa))
-                            pygame.draw.line(surface, (255, 255, 100), (sx, sy), (sx + 2, sy - 2), 2)
-                    elif snake_type == SNAKE_DIAMOND:
-                        # Glans-facetter
-                        pygame.draw.line(surface, (255, 255, 255), (cx - 4, cy - 3), (cx, cy - 6), 1)
-                        pygame.draw.line(surface, (255, 255, 255), (cx + 2, cy - 4), (cx + 5, cy - 1), 1)
-                        draw_3d_circle(surface, (255, 255, 240), (cx - 2, cy - 3), 1, depth=0)
-                    elif snake_type == SNAKE_NORMAL:
-                        # Splittet tunge
-                        tmx, tmy = cx + dx * (cs // 2), cy + dy * (cs // 2)
-                        ttx, tty = cx + dx * (cs // 2 + 3), cy + dy * (cs // 2 + 3)
-                        pygame.draw.line(surface, RED, (tmx, tmy), (ttx, tty), 2)
-                        if dx != 0:
-                            pygame.draw.line(surface, RED, (ttx, tty), (ttx + dx * 2, tty - 2), 1)
-                            pygame.draw.line(surface, RED, (ttx, tty), (ttx + dx * 2, tty + 2), 1)
-                        else:
-                            pygame.draw.line(surface, RED, (ttx, tty), (ttx - 2, tty + dy * 2), 1)
-                            pygame.draw.line(surface, RED, (ttx, tty), (ttx + 2, tty + dy * 2), 1)
-
-                # --- MASKINKANON (3D, uændret) ---
-                if gun_type is not GUN_NONE:
-                    gun_cx = cx + dx * 2
-                    gun_cy = cy + dy * 2
-                    barrel_len = cs // 2 + 4
-                    if gun_type == GUN_BASIC:
-                        bx1 = gun_cx + dx * barrel_len
-                        by1 = gun_cy + dy * barrel_len
-                        pygame.draw.line(surface, _darken(GUN_BARREL_COLOR, 40), (gun_cx + 1, gun_cy + 1), (bx1 + 1, by1 + 1), 4)
-                        pygame.draw.line(surface, GUN_BARREL_COLOR, (gun_cx, gun_cy), (bx1, by1), 3)
-                        pygame.draw.line(surface, _lighten(GUN_BARREL_COLOR, 40), (gun_cx, gun_cy), (bx1, by1), 1)
-                        draw_3d_circle(surface, YELLOW, (bx1, by1), 2, depth=1)
-                        draw_3d_rect(surface, GUN_BODY_COLOR, (gun_cx - 3, gun_cy - 3, 6, 6), depth=2)
-                    elif gun_type == GUN_AUTO:
-                        auto_col = (100, 200, 100)
-                        bx1 = gun_cx + dx * (barrel_len + 2)
-                        by1 = gun_cy + dy * (barrel_len + 2)
-                        if dx != 0:
-                            pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx + 1, gun_cy - 1), (bx1 + 1, by1 - 1), 3)
-                            pygame.draw.line(surface, auto_col, (gun_cx, gun_cy - 2), (bx1, by1 - 2), 2)
-                            pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx + 1, gun_cy + 3), (bx1 + 1, by1 + 3), 3)
-                            pygame.draw.line(surface, auto_col, (gun_cx, gun_cy + 2), (bx1, by1 + 2), 2)
-                        else:
-                            pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx - 1, gun_cy + 1), (bx1 - 1, by1 + 1), 3)
-                            pygame.draw.line(surface, auto_col, (gun_cx - 2, gun_cy), (bx1 - 2, by1), 2)
-                            pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx + 3, gun_cy + 1), (bx1 + 3, by1 + 1), 3)
-                            pygame.draw.line(surface, auto_col, (gun_cx + 2, gun_cy), (bx1 + 2, by1), 2)
-                        draw_3d_circle(surface, (150, 255, 150), (bx1, by1), 2, depth=1)
-                        draw_3d_circle(surface, (40, 60, 40), (gun_cx, gun_cy), 5, depth=2)
-                        pygame.draw.circle(surface, auto_col, (gun_cx, gun_cy), 4, 1)
-                        pulse = int(3 + 2 * math.sin(tick * 0.4))
-                        pygame.draw.circle(surface, (80, 220, 80), (gun_cx, gun_cy), pulse, 1)
-                        ang = tick * 0.3
-                        pygame.draw.circle(surface, (180, 255, 180), (int(gun_cx + 3 * math.cos(ang)), int(gun_cy + 3 * math.sin(ang))), 1)
-                    elif gun_type == GUN_QUAD:
-                        quad_col, quad_tip, bl = (200, 80, 80), (255, 120, 60), barrel_len + 2
-                        for dd in (UP, DOWN, LEFT, RIGHT):
-                            bx, by = gun_cx + dd[0] * bl, gun_cy + dd[1] * bl
-                            pygame.draw.line(surface, _darken(quad_col, 40), (gun_cx + 1, gun_cy + 1), (bx + 1, by + 1), 5)
-                            pygame.draw.line(surface, quad_col, (gun_cx, gun_cy), (bx, by), 4)
-                            pygame.draw.line(surface, _lighten(quad_col, 30), (gun_cx, gun_cy), (bx, by), 1)
-                            draw_3d_circle(surface, quad_tip, (bx, by), 3, depth=1)
-                            pygame.draw.circle(surface, YELLOW, (bx, by), 1)
-                        draw_3d_circle(surface, (80, 30, 30), (gun_cx, gun_cy), 6, depth=2)
-                        pygame.draw.circle(surface, quad_col, (gun_cx, gun_cy), 5, 1)
-                        pygame.draw.line(surface, YELLOW, (gun_cx - 2, gun_cy), (gun_cx + 2, gun_cy), 1)
-                        pygame.draw.line(surface, YELLOW, (gun_cx, gun_cy - 2), (gun_cx, gun_cy + 2), 1)
-                    elif gun_type == GUN_VACUUM:
-                        # Støvsuger: bred tragt foran hovedet
-                        vac_col = (100, 60, 180)
-                        vac_light = (140, 100, 220)
-                        vac_dark = (60, 30, 120)
-                        # Motorhus bag hovedet
-                        draw_3d_circle(surface, vac_dark, (gun_cx, gun_cy), 5, depth=2)
-                        pygame.draw.circle(surface, vac_col, (gun_cx, gun_cy), 4, 1)
-                        # Sugerør
-                        end_x = gun_cx + dx * (barrel_len + 4)
-                        end_y = gun_cy + dy * (barrel_len + 4)
-                        pygame.draw.line(surface, vac_dark, (gun_cx + 1, gun_cy + 1), (end_x + 1, end_y + 1), 5)
-                        pygame.draw.line(surface, vac_col, (gun_cx, gun_cy), (end_x, end_y), 4)
-                        pygame.draw.line(surface, vac_light, (gun_cx, gun_cy), (end_x, end_y), 1)
-                        # Tragt/mundstykke (bred åbning)
-                        perp_x, perp_y = -dy, dx  # vinkelret retning
-                        t1 = (end_x + perp_x * 5, end_y + perp_y * 5)
-                        t2 = (end_x - perp_x * 5, end_y - perp_y * 5)
-                        t3 = (end_x + dx * 4, end_y + dy * 4)
-                        pygame.draw.polygon(surface, vac_col, [t1, t2, t3])
-                        pygame.draw.polygon(surface, vac_light, [t1, t2, t3], 1)
-                        # Suge-effekt (pulserende cirkler når aktiv)
-                        pulse = int(2 + 2 * math.sin(tick * 0.5))
-                        pygame.draw.circle(surface, (180, 140, 255), (end_x + dx * 2, end_y + dy * 2), pulse, 1)
-
-            elif i == n - 1:
-                # ============ HALE ============
-                prev = self.body[i - 1]
-                d = _seg_direction(self.body[i], prev)
-                if snake_type in SQUARE_HEAD_TYPES:
-                    # Flad hale (Tank, Robot)
-                    draw_3d_rect(surface, dark_col, (px + 2, py + 2, cs - 4, cs - 4), depth=sd)
-                    draw_3d_rect(surface, body_col, (px + 3, py + 3, cs - 6, cs - 6), depth=1)
-                    ex_x = cx - d[0] * (cs // 2 - 1)
-                    ex_y = cy - d[1] * (cs // 2 - 1)
-                    if snake_type == SNAKE_TANK:
-                        draw_3d_circle(surface, (50, 50, 50), (ex_x, ex_y), 3, depth=1)
-                        draw_3d_circle(surface, (80, 80, 80), (ex_x, ex_y), 2, depth=1)
-                    else:  # Robot: lille lys
-                        led = (255, 50, 50) if tick % 6 < 3 else (100, 20, 20)
-                        draw_3d_circle(surface, led, (ex_x, ex_y), 2, depth=1)
-                elif snake_type in (SNAKE_DOG, SNAKE_CAT, SNAKE_CANDY, SNAKE_ALIEN):
-                    # Rund/fluffy hale
-                    wag = int(3 * math.sin(tick * 0.6))
-                    tip_x = cx - d[0] * (cs // 2) + (wag if d[0] == 0 else 0)
-                    tip_y = cy - d[1] * (cs // 2) + (wag if d[1] == 0 else 0)
-                    base_x = cx + d[0] * (cs // 4)
-                    base_y = cy + d[1] * (cs // 4)
-                    pygame.draw.line(surface, _darken(dark_col, 30), (base_x + 1, base_y + 1), (tip_x + 1, tip_y + 1), 5)
-                    pygame.draw.line(surface, dark_col, (base_x, base_y), (tip_x, tip_y), 4)
-                    pygame.draw.line(surface, _lighten(body_col, 30), (base_x, base_y), (tip_x, tip_y), 1)
-                    r = 4 if snake_type == SNAKE_CAT else 3
-                    draw_3d_circle(surface, body_col, (tip_x, tip_y), r, depth=1)
+                        ax, ay = cx + side * (cs // 3), cy - dy * 4
+                        pygame.draw.line(surface, (100, 255, 100), (ax, ay), (ax + side * 5, ay - dy * 3), 1)
+                        draw_3d_circle(surface, (150, 255, 150), (ax + side * 5, ay - dy * 3), 2, depth=0)
+            elif snake_type == SNAKE_CANDY:
+                # Lille sløjfe
+                bx, by = cx - dx * 3, cy - dy * 3 - 3
+                pygame.draw.circle(surface, (255, 80, 120), (bx - 2, by), 2)
+                pygame.draw.circle(surface, (255, 80, 120), (bx + 2, by), 2)
+                pygame.draw.circle(surface, (255, 200, 220), (bx, by), 1)
+            elif snake_type == SNAKE_GOLD:
+                # Krone (3 trekanter)
+                crown_y = cy - cs // 2 - 2
+                for coff in (-3, 0, 3):
+                    pygame.draw.polygon(surface, GOLD, [
+                        (cx + coff, crown_y - 4), (cx + coff - 2, crown_y + 1), (cx + coff + 2, crown_y + 1)])
+                pygame.draw.rect(surface, (200, 160, 0), (cx - 5, crown_y, 10, 2))
+            elif snake_type == SNAKE_SKELETON:
+                # Næse-hul + revner
+                nx, ny = cx + dx * 2, cy + dy * 2
+                pygame.draw.polygon(surface, (40, 35, 30), [(nx, ny), (nx - 1, ny + 2), (nx + 1, ny + 2)])
+                pygame.draw.line(surface, (140, 130, 120), (cx - 3, cy - 4), (cx + 1, cy - 2), 1)
+            elif snake_type == SNAKE_LAVA:
+                # Glødende revner
+                for loff in (-3, 3):
+                    pygame.draw.line(surface, (255, 120, 20), (cx + loff, cy - 3), (cx + loff + 1, cy + 3), 1)
+            elif snake_type == SNAKE_ELECTRIC:
+                # Gnister
+                for _ in range(2):
+                    sa = tick * 0.5 + _ * 3.14
+                    sr = cs // 2 + 2
+                    sx = cx + int(sr * math.cos(sa))
+                    sy = cy + int(sr * math.sin(sa))
+                    pygame.draw.line(surface, (255, 255, 100), (sx, sy), (sx + 2, sy - 2), 2)
+            elif snake_type == SNAKE_DIAMOND:
+                # Glans-facetter
+                pygame.draw.line(surface, (255, 255, 255), (cx - 4, cy - 3), (cx, cy - 6), 1)
+                pygame.draw.line(surface, (255, 255, 255), (cx + 2, cy - 4), (cx + 5, cy - 1), 1)
+                draw_3d_circle(surface, (255, 255, 240), (cx - 2, cy - 3), 1, depth=0)
+            elif snake_type == SNAKE_NORMAL:
+                # Splittet tunge
+                tmx, tmy = cx + dx * (cs // 2), cy + dy * (cs // 2)
+                ttx, tty = cx + dx * (cs // 2 + 3), cy + dy * (cs // 2 + 3)
+                pygame.draw.line(surface, RED, (tmx, tmy), (ttx, tty), 2)
+                if dx != 0:
+                    pygame.draw.line(surface, RED, (ttx, tty), (ttx + dx * 2, tty - 2), 1)
+                    pygame.draw.line(surface, RED, (ttx, tty), (ttx + dx * 2, tty + 2), 1)
                 else:
-                    # Spids trekant (alle andre)
-                    tip_x = cx - d[0] * (cs // 2)
-                    tip_y = cy - d[1] * (cs // 2)
+                    pygame.draw.line(surface, RED, (ttx, tty), (ttx - 2, tty + dy * 2), 1)
+                    pygame.draw.line(surface, RED, (ttx, tty), (ttx + 2, tty + dy * 2), 1)
+
+        # --- MASKINKANON (3D, uændret) ---
+        if gun_type is not GUN_NONE:
+            gun_cx = cx + dx * 2
+            gun_cy = cy + dy * 2
+            barrel_len = cs // 2 + 4
+            if gun_type == GUN_BASIC:
+                bx1 = gun_cx + dx * barrel_len
+                by1 = gun_cy + dy * barrel_len
+                pygame.draw.line(surface, _darken(GUN_BARREL_COLOR, 40), (gun_cx + 1, gun_cy + 1), (bx1 + 1, by1 + 1), 4)
+                pygame.draw.line(surface, GUN_BARREL_COLOR, (gun_cx, gun_cy), (bx1, by1), 3)
+                pygame.draw.line(surface, _lighten(GUN_BARREL_COLOR, 40), (gun_cx, gun_cy), (bx1, by1), 1)
+                draw_3d_circle(surface, YELLOW, (bx1, by1), 2, depth=1)
+                draw_3d_rect(surface, GUN_BODY_COLOR, (gun_cx - 3, gun_cy - 3, 6, 6), depth=2)
+            elif gun_type == GUN_AUTO:
+                auto_col = (100, 200, 100)
+                bx1 = gun_cx + dx * (barrel_len + 2)
+                by1 = gun_cy + dy * (barrel_len + 2)
+                if dx != 0:
+                    pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx + 1, gun_cy - 1), (bx1 + 1, by1 - 1), 3)
+                    pygame.draw.line(surface, auto_col, (gun_cx, gun_cy - 2), (bx1, by1 - 2), 2)
+                    pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx + 1, gun_cy + 3), (bx1 + 1, by1 + 3), 3)
+                    pygame.draw.line(surface, auto_col, (gun_cx, gun_cy + 2), (bx1, by1 + 2), 2)
+                else:
+                    pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx - 1, gun_cy + 1), (bx1 - 1, by1 + 1), 3)
+                    pygame.draw.line(surface, auto_col, (gun_cx - 2, gun_cy), (bx1 - 2, by1), 2)
+                    pygame.draw.line(surface, _darken(auto_col, 40), (gun_cx + 3, gun_cy + 1), (bx1 + 3, by1 + 1), 3)
+                    pygame.draw.line(surface, auto_col, (gun_cx + 2, gun_cy), (bx1 + 2, by1), 2)
+                draw_3d_circle(surface, (150, 255, 150), (bx1, by1), 2, depth=1)
+                draw_3d_circle(surface, (40, 60, 40), (gun_cx, gun_cy), 5, depth=2)
+                pygame.draw.circle(surface, auto_col, (gun_cx, gun_cy), 4, 1)
+                pulse = int(3 + 2 * math.sin(tick * 0.4))
+                pygame.draw.circle(surface, (80, 220, 80), (gun_cx, gun_cy), pulse, 1)
+                ang = tick * 0.3
+                pygame.draw.circle(surface, (180, 255, 180), (int(gun_cx + 3 * math.cos(ang)), int(gun_cy + 3 * math.sin(ang))), 1)
+            elif gun_type == GUN_QUAD:
+                quad_col, quad_tip, bl = (200, 80, 80), (255, 120, 60), barrel_len + 2
+                for dd in (UP, DOWN, LEFT, RIGHT):
+                    bx, by = gun_cx + dd[0] * bl, gun_cy + dd[1] * bl
+                    pygame.draw.line(surface, _darken(quad_col, 40), (gun_cx + 1, gun_cy + 1), (bx + 1, by + 1), 5)
+                    pygame.draw.line(surface, quad_col, (gun_cx, gun_cy), (bx, by), 4)
+                    pygame.draw.line(surface, _lighten(quad_col, 30), (gun_cx, gun_cy), (bx, by), 1)
+                    draw_3d_circle(surface, quad_tip, (bx, by), 3, depth=1)
+                    pygame.draw.circle(surface, YELLOW, (bx, by), 1)
+                draw_3d_circle(surface, (80, 30, 30), (gun_cx, gun_cy), 6, depth=2)
+                pygame.draw.circle(surface, quad_col, (gun_cx, gun_cy), 5, 1)
+                pygame.draw.line(surface, YELLOW, (gun_cx - 2, gun_cy), (gun_cx + 2, gun_cy), 1)
+                pygame.draw.line(surface, YELLOW, (gun_cx, gun_cy - 2), (gun_cx, gun_cy + 2), 1)
+            elif gun_type == GUN_VACUUM:
+                # Støvsuger: bred tragt foran hovedet
+                vac_col = (100, 60, 180)
+                vac_light = (140, 100, 220)
+                vac_dark = (60, 30, 120)
+                # Motorhus bag hovedet
+                draw_3d_circle(surface, vac_dark, (gun_cx, gun_cy), 5, depth=2)
+                pygame.draw.circle(surface, vac_col, (gun_cx, gun_cy), 4, 1)
+                # Sugerør
+                end_x = gun_cx + dx * (barrel_len + 4)
+                end_y = gun_cy + dy * (barrel_len + 4)
+                pygame.draw.line(surface, vac_dark, (gun_cx + 1, gun_cy + 1), (end_x + 1, end_y + 1), 5)
+                pygame.draw.line(surface, vac_col, (gun_cx, gun_cy), (end_x, end_y), 4)
+                pygame.draw.line(surface, vac_light, (gun_cx, gun_cy), (end_x, end_y), 1)
+                # Tragt/mundstykke (bred åbning)
+                perp_x, perp_y = -dy, dx  # vinkelret retning
+                t1 = (end_x + perp_x * 5, end_y + perp_y * 5)
+                t2 = (end_x - perp_x * 5, end_y - perp_y * 5)
+                t3 = (end_x + dx * 4, end_y + dy * 4)
+                pygame.draw.polygon(surface, vac_col, [t1, t2, t3])
+                pygame.draw.polygon(surface, vac_light, [t1, t2, t3], 1)
+                # Suge-effekt (pulserende cirkler når aktiv)
+                pulse = int(2 + 2 * math.sin(tick * 0.5))
+                pygame.draw.circle(surface, (180, 140, 255), (end_x + dx * 2, end_y + dy * 2), pulse, 1)
+
+    elif role == SEG_TAIL:
+        # ============ HALE ============
+        d = dirs
+        if snake_type in SQUARE_HEAD_TYPES:
+            # Flad hale (Tank, Robot)
+            draw_3d_rect(surface, dark_col, (px + 2, py + 2, cs - 4, cs - 4), depth=sd)
+            draw_3d_rect(surface, body_col, (px + 3, py + 3, cs - 6, cs - 6), depth=1)
+            ex_x = cx - d[0] * (cs // 2 - 1)
+            ex_y = cy - d[1] * (cs // 2 - 1)
+            if snake_type == SNAKE_TANK:
+                draw_3d_circle(surface, (50, 50, 50), (ex_x, ex_y), 3, depth=1)
+                draw_3d_circle(surface, (80, 80, 80), (ex_x, ex_y), 2, depth=1)
+            else:  # Robot: lille lys
+                led = (255, 50, 50) if tick % 6 < 3 else (100, 20, 20)
+                draw_3d_circle(surface, led, (ex_x, ex_y), 2, depth=1)
+        elif snake_type in (SNAKE_DOG, SNAKE_CAT, SNAKE_CANDY, SNAKE_ALIEN):
+            # Rund/fluffy hale
+            wag = int(3 * math.sin(tick * 0.6))
+            tip_x = cx - d[0] * (cs // 2) + (wag if d[0] == 0 else 0)
+            tip_y = cy - d[1] * (cs // 2) + (wag if d[1] == 0 else 0)
+            base_x = cx + d[0] * (cs // 4)
+            base_y = cy + d[1] * (cs // 4)
+            pygame.draw.line(surface, _darken(dark_col, 30), (base_x + 1, base_y + 1), (tip_x + 1, tip_y + 1), 5)
+            pygame.draw.line(surface, dark_col, (base_x, base_y), (tip_x, tip_y), 4)
+            pygame.draw.line(surface, _lighten(body_col, 30), (base_x, base_y), (tip_x, tip_y), 1)
+            r = 4 if snake_type == SNAKE_CAT else 3
+            draw_3d_circle(surface, body_col, (tip_x, tip_y), r, depth=1)
+        else:
+            # Spids trekant (alle andre)
+            tip_x = cx - d[0] * (cs // 2)
+            tip_y = cy - d[1] * (cs // 2)
+            if d[0] != 0:
+                p1 = (cx + d[0] * (cs // 2), cy - cs // 3)
+                p2 = (cx + d[0] * (cs // 2), cy + cs // 3)
+            else:
+                p1 = (cx - cs // 3, cy + d[1] * (cs // 2))
+                p2 = (cx + cs // 3, cy + d[1] * (cs // 2))
+            shadow_pts = [(tip_x + sd, tip_y + sd), (p1[0] + sd, p1[1] + sd), (p2[0] + sd, p2[1] + sd)]
+            pygame.draw.polygon(surface, _darken(dark_col, 50), shadow_pts)
+            pygame.draw.polygon(surface, dark_col, [(tip_x, tip_y), p1, p2])
+            pygame.draw.line(surface, _lighten(dark_col, 30), (tip_x, tip_y), p1, 1)
+            # Type-specifik hale-dekoration
+            if snake_type == SNAKE_FIRE:
+                draw_3d_circle(surface, (255, 180, 30), (tip_x, tip_y), 3, depth=0)
+                draw_3d_circle(surface, (255, 100, 20), (tip_x - d[0] * 2, tip_y - d[1] * 2), 2, depth=0)
+            elif snake_type == SNAKE_DRAGON:
+                for side in (-1, 1):
                     if d[0] != 0:
-                        p1 = (cx + d[0] * (cs // 2), cy - cs // 3)
-                        p2 = (cx + d[0] * (cs // 2), cy + cs // 3)
+                        pygame.draw.polygon(surface, _darken(body_col, 20), [(tip_x, tip_y), (tip_x - d[0] * 3, tip_y + side * 4), (tip_x - d[0] * 1, tip_y + side * 2)])
                     else:
-                        p1 = (cx - cs // 3, cy + d[1] * (cs // 2))
-                        p2 = (cx + cs // 3, cy + d[1] * (cs // 2))
-                    shadow_pts = [(tip_x + sd, tip_y + sd), (p1[0] + sd, p1[1] + sd), (p2[0] + sd, p2[1] + sd)]
-                    pygame.draw.polygon(surface, _darken(dark_col, 50), shadow_pts)
-                    pygame.draw.polygon(surface, dark_col, [(tip_x, tip_y), p1, p2])
-                    pygame.draw.line(surface, _lighten(dark_col, 30), (tip_x, tip_y), p1, 1)
-                    # Type-specifik hale-dekoration
-                    if snake_type == SNAKE_FIRE:
-                        draw_3d_circle(surface, (255, 180, 30), (tip_x, tip_y), 3, depth=0)
-                        draw_3d_circle(surface, (255, 100, 20), (tip_x - d[0] * 2, tip_y - d[1] * 2), 2, depth=0)
-                    elif snake_type == SNAKE_DRAGON:
-                        for side in (-1, 1):
-                            if d[0] != 0:
-                                pygame.draw.polygon(surface, _darken(body_col, 20), [(tip_x, tip_y), (tip_x - d[0] * 3, tip_y + side * 4), (tip_x - d[0] * 1, tip_y + side * 2)])
-                            else:
-                                pygame.draw.polygon(surface, _darken(body_col, 20), [(tip_x, tip_y), (tip_x + side * 4, tip_y - d[1] * 3), (tip_x + side * 2, tip_y - d[1] * 1)])
-                    elif snake_type == SNAKE_ELECTRIC:
-                        pygame.draw.line(surface, (255, 255, 100), (tip_x, tip_y), (tip_x - d[0] * 4, tip_y - d[1] * 4), 2)
-                    elif snake_type == SNAKE_SKELETON:
-                        draw_3d_circle(surface, belly_col, (tip_x, tip_y), 2, depth=1)
-
-            else:
-                # ============ KROP ============
-                prev = self.body[i - 1]
-                nxt = self.body[i + 1] if i + 1 < n else self.body[i]
-                d_prev = _seg_direction(prev, self.body[i])
-                d_next = _seg_direction(self.body[i], nxt)
-                is_h = (d_prev[0] != 0 or d_next[0] != 0)
-
-                if snake_type in SQUARE_HEAD_TYPES:
-                    # --- Firkantet krop (Tank, Robot) ---
-                    draw_3d_rect(surface, body_col, (px + 1, py + 1, cs - 2, cs - 2), depth=sd)
-                    shine = _lighten(body_col, 35)
-                    pygame.draw.rect(surface, shine, (px + cs // 3, py + 2, cs // 3, cs - 4), border_radius=1)
-                    if snake_type == SNAKE_TANK:
-                        if d_prev[0] != 0:
-                            for ty in [py + 2, py + cs - 3]:
-                                for tx in range(px + 2, px + cs - 2, 4):
-                                    pygame.draw.line(surface, dark_col, (tx, ty), (tx + 2, ty), 1)
-                        else:
-                            for tx in [px + 2, px + cs - 3]:
-                                for ty in range(py + 2, py + cs - 2, 4):
-                                    pygame.draw.line(surface, dark_col, (tx, ty), (tx, ty + 2), 1)
-                        if i % 3 == 0:
-                            pygame.draw.rect(surface, belly_col, (px + 4, py + 4, cs - 8, cs - 8), 1)
-                        if i % 2 == 0:
-                            draw_3d_circle(surface, _lighten(dark_col, 20), (px + 3, py + 3), 1, depth=1)
-                            draw_3d_circle(surface, _lighten(dark_col, 20), (px + cs - 4, py + cs - 4), 1, depth=1)
-                    else:  # Robot
-                        # Grid-mønster
-                        if i % 2 == 0:
-                            pygame.draw.line(surface, dark_col, (px + 3, cy), (px + cs - 3, cy), 1)
-                            pygame.draw.line(surface, dark_col, (cx, py + 3), (cx, py + cs - 3), 1)
-                        # Bolte i hjørner
-                        for bx, by in [(px + 3, py + 3), (px + cs - 4, py + cs - 4)]:
-                            draw_3d_circle(surface, _lighten(dark_col, 30), (bx, by), 1, depth=1)
+                        pygame.draw.polygon(surface, _darken(body_col, 20), [(tip_x, tip_y), (tip_x + side * 4, tip_y - d[1] * 3), (tip_x + side * 2, tip_y - d[1] * 1)])
+            elif snake_type == SNAKE_ELECTRIC:
+                pygame.draw.line(surface, (255, 255, 100), (tip_x, tip_y), (tip_x - d[0] * 4, tip_y - d[1] * 4), 2)
+            elif snake_type == SNAKE_SKELETON:
+                draw_3d_circle(surface, belly_col, (tip_x, tip_y), 2, depth=1)
+
+    else:
+        # ============ KROP ============
+        d_prev, d_next = dirs
+        is_h = (d_prev[0] != 0 or d_next[0] != 0)
+
+        if snake_type in SQUARE_HEAD_TYPES:
+            # --- Firkantet krop (Tank, Robot) ---
+            draw_3d_rect(surface, body_col, (px + 1, py + 1, cs - 2, cs - 2), depth=sd)
+            shine = _lighten(body_col, 35)
+            pygame.draw.rect(surface, shine, (px + cs // 3, py + 2, cs // 3, cs - 4), border_radius=1)
+            if snake_type == SNAKE_TANK:
+                if d_prev[0] != 0:
+                    for ty in [py + 2, py + cs - 3]:
+                        for tx in range(px + 2, px + cs - 2, 4):
+                            pygame.draw.line(surface, dark_col, (tx, ty), (tx + 2, ty), 1)
                 else:
-                    # --- Rund krop (18 typer) ---
-                    br = 8 if snake_type == SNAKE_DOG else 6
-                    pygame.draw.rect(surface, _darken(dark_col, 60), (px + 1 + sd, py + 1 + sd, cs - 2, cs - 2), border_radius=br)
-                    pygame.draw.rect(surface, dark_col, (px + 1, py + 1, cs - 2, cs - 2), border_radius=br)
-                    # Cylindrisk highlight
-                    hl = _lighten(body_col, 45)
-                    if is_h:
-                        pygame.draw.rect(surface, hl, (px + 2, cy - 3, cs - 4, 3), border_radius=2)
-                    else:
-                        pygame.draw.rect(surface, hl, (cx - 3, py + 2, 3, cs - 4), border_radius=2)
-                    pygame.draw.circle(surface, _lighten(body_col, 65), (cx - 2, cy - 3), 2)
-                    # Bug
-                    if is_h:
-                        pygame.draw.rect(surface, belly_col, (px + 2, cy + 2, cs - 4, 4), border_radius=2)
-                    else:
-                        pygame.draw.rect(surface, belly_col, (cx + 2, py + 2, 4, cs - 4), border_radius=2)
-                    pygame.draw.rect(surface, _darken(dark_col, 25), (px + 1, py + 1, cs - 2, cs - 2), 1, border_radius=br)
-
-                    # --- Type-specifik krop-mønster ---
-                    if snake_type == SNAKE_NORMAL and i % 2 == 0:
-                        sc = tuple(max(0, c - 25) for c in dark_col)
-                        pygame.draw.arc(surface, sc, (px + 2, py + 2, cs // 2 - 2, cs // 2 - 2), 0, math.pi, 1)
-                        pygame.draw.arc(surface, sc, (px + cs // 2, py + cs // 2, cs // 2 - 2, cs // 2 - 2), math.pi, 2 * math.pi, 1)
-                    elif snake_type == SNAKE_DOG and i % 3 == 0:
-                        draw_3d_circle(surface, dark_col, (cx + (3 if i % 2 == 0 else -3), cy + (2 if i % 4 == 0 else -2)), 3, depth=1)
-                    elif snake_type == SNAKE_CAT and i % 2 == 0:
-                        # Tiger-striber
-                        pygame.draw.line(surface, dark_col, (px + 3, py + 2), (px + cs - 5, py + cs // 2), 1)
-                        pygame.draw.line(surface, dark_col, (px + 3, py + cs - 3), (px + cs - 5, cy), 1)
-                    elif snake_type == SNAKE_DRAGON and i % 2 == 0:
-                        # Rygspigge
-                        if is_h:
-                            pygame.draw.polygon(surface, _darken(body_col, 15), [(cx, py), (cx - 2, py + 3), (cx + 2, py + 3)])
-                        else:
-                            pygame.draw.polygon(surface, _darken(body_col, 15), [(px, cy), (px + 3, cy - 2), (px + 3, cy + 2)])
-                    elif snake_type == SNAKE_SHARK and i % 2 == 0:
-                        # Gælle-streger
-                        if is_h:
-                            for gy in range(py + 4, py + cs - 3, 3):
-                                pygame.draw.line(surface, _darken(dark_col, 15), (cx - 2, gy), (cx + 2, gy), 1)
-                        else:
-                            for gx in range(px + 4, px + cs - 3, 3):
-                                pygame.draw.line(surface, _darken(dark_col, 15), (gx, cy - 2), (gx, cy + 2), 1)
-                    elif snake_type == SNAKE_FIRE:
-                        if i % 2 == 0:
-                            off = int(2 * math.sin(tick * 0.4 + i))
-                            draw_3d_circle(surface, (255, 180, 40), (px + 2, cy + off), 2, depth=0)
-                    elif snake_type == SNAKE_ICE and i % 3 == 0:
-                        pygame.draw.polygon(surface, (200, 230, 255), [(cx, py + 2), (cx - 2, cy), (cx + 2, cy)])
-                    elif snake_type == SNAKE_ZOMBIE and i % 2 == 0:
-                        # Sting
-                        pygame.draw.line(surface, (80, 60, 50), (px + 3, cy - 2), (px + cs - 4, cy - 2), 1)
-                        for sx in range(px + 4, px + cs - 3, 3):
-                            pygame.draw.line(surface, (80, 60, 50), (sx, cy - 3), (sx, cy - 1), 1)
-                    elif snake_type == SNAKE_PIRATE and i % 3 == 0:
-                        # Kryds-mærke
-                        pygame.draw.line(surface, dark_col, (cx - 2, cy - 2), (cx + 2, cy + 2), 1)
-                        pygame.draw.line(surface, dark_col, (cx + 2, cy - 2), (cx - 2, cy + 2), 1)
-                    elif snake_type == SNAKE_ALIEN and i % 2 == 0:
-                        draw_3d_circle(surface, _lighten(body_col, 30), (cx - 2, cy - 2), 1, depth=0)
-                        draw_3d_circle(surface, _lighten(body_col, 30), (cx + 2, cy + 2), 1, depth=0)
-                    elif snake_type == SNAKE_CANDY and i % 2 == 0:
-                        # Spiralstriber
-                        pygame.draw.line(surface, _lighten(body_col, 40), (px + 2, py + 2), (px + cs - 3, py + cs - 3), 2)
-                    elif snake_type == SNAKE_GOLD and i % 3 == 0:
-                        # Diamant-glimt
-                        pygame.draw.polygon(surface, _lighten(body_col, 40), [(cx, cy - 3), (cx + 2, cy), (cx, cy + 3), (cx - 2, cy)])
-                    elif snake_type == SNAKE_SKELETON:
-                        # Ribben-knogler
-                        if is_h:
-                            pygame.draw.line(surface, belly_col, (cx, py + 3), (cx, py + cs - 3), 1)
-                            if i % 2 == 0:
-                                pygame.draw.line(surface, belly_col, (cx - 3, cy), (cx + 3, cy), 1)
-                        else:
-                            pygame.draw.line(surface, belly_col, (px + 3, cy), (px + cs - 3, cy), 1)
-                            if i % 2 == 0:
-                                pygame.draw.line(surface, belly_col, (cx, cy - 3), (cx, cy + 3), 1)
-                    elif snake_type == SNAKE_LAVA and i % 2 == 0:
-                        # Glødende revner
-                        glow = (255, 120 + int(40 * math.sin(tick * 0.3 + i)), 20)
-                        pygame.draw.line(surface, glow, (px + 3, py + 3), (px + cs - 4, py + cs - 4), 1)
-                        pygame.draw.line(surface, glow, (px + cs - 4, py + 3), (px + 3, py + cs - 4), 1)
-                    elif snake_type == SNAKE_ELECTRIC and i % 2 == 0:
-                        # Lyn-zigzag
-                        bolt_col = (255, 255, 100)
-                        if is_h:
-                            pygame.draw.lines(surface, bolt_col, False, [(px + 2, cy - 3), (cx, cy), (px + cs - 3, cy - 3)], 1)
-                        else:
-                            pygame.draw.lines(surface, bolt_col, False, [(cx - 3, py + 2), (cx, cy), (cx - 3, py + cs - 3)], 1)
-                    elif snake_type == SNAKE_DIAMOND and i % 2 == 0:
-                        # Facet-linjer
-                        pygame.draw.line(surface, _lighten(body_col, 35), (px + 3, py + 3), (px + cs - 4, py + cs - 4), 1)
-                        pygame.draw.line(surface, _lighten(body_col, 25), (px + cs - 4, py + 3), (px + 3, py + cs - 4), 1)
-
-
-class FoodItem:
-    def __init__(self, food_type, pos):
-        self.food_type = food_type
-        self.pos = pos
-        self.lifetime = None
-        self.age = 0
-        if food_type == FOOD_BONUS:
-            self.color = GOLD
-            self.points = 3
-            self.lifetime = 80
-        elif food_type == FOOD_INVINCIBLE:
-            self.color = PURPLE
-            self.points = 0
-            self.lifetime = 60
-        elif food_type == FOOD_MEGA:
-            self.color = (255, 50, 255)  # hot pink/magenta
-            self.points = 100
-            self.lifetime = 120  # forsvinder efter 120 ticks
+                    for tx in [px + 2, px + cs - 3]:
+                        for ty in range(py + 2, py + cs - 2, 4):
+                            pygame.draw.line(surface, dark_col, (tx, ty), (tx, ty + 2), 1)
+                if i % 3 == 0:
+                    pygame.draw.rect(surface, belly_col, (px + 4, py + 4, cs - 8, cs - 8), 1)
+                if i % 2 == 0:
+                    draw_3d_circle(surface, _lighten(dark_col, 20), (px + 3, py + 3), 1, depth=1)
+                    draw_3d_circle(surface, _lighten(dark_col, 20), (px + cs - 4, py + cs - 4), 1, depth=1)
+            else:  # Robot
+                # Grid-mønster
+                if i % 2 == 0:
+                    pygame.draw.line(surface, dark_col, (px + 3, cy), (px + cs - 3, cy), 1)
+                    pygame.draw.line(surface, dark_col, (cx, py + 3), (cx, py + cs - 3), 1)
+                # Bolte i hjørner
+                for bx, by in [(px + 3, py + 3), (px + cs - 4, py + cs - 4)]:
+                    draw_3d_circle(surface, _lighten(dark_col, 30), (bx, by), 1, depth=1)
         else:
-            self.color = RED
-            self.points = 1
-            self.lifetime = None
+            # --- Rund krop (18 typer) ---
+            br = 8 if snake_type == SNAKE_DOG else 6
+            pygame.draw.rect(surface, _darken(dark_col, 60), (px + 1 + sd, py + 1 + sd, cs - 2, cs - 2), border_radius=br)
+            pygame.draw.rect(surface, dark_col, (px + 1, py + 1, cs - 2, cs - 2), border_radius=br)
+            # Cylindrisk highlight
+            hl = _lighten(body_col, 45)
+            if is_h:
+                pygame.draw.rect(surface, hl, (px + 2, cy - 3, cs - 4, 3), border_radius=2)
+            else:
+                pygame.draw.rect(surface, hl, (cx - 3, py + 2, 3, cs - 4), border_radius=2)
+            pygame.draw.circle(surface, _lighten(body_col, 65), (cx - 2, cy - 3), 2)
+            # Bug
+            if is_h:
+                pygame.draw.rect(surface, belly_col, (px + 2, cy + 2, cs - 4, 4), border_radius=2)
+            else:
+                pygame.draw.rect(surface, belly_col, (cx + 2, py + 2, 4, cs - 4), border_radius=2)
+            pygame.draw.rect(surface, _darken(dark_col, 25), (px + 1, py + 1, cs - 2, cs - 2), 1, border_radius=br)
+
+            # --- Type-specifik krop-mønster ---
+            if snake_type == SNAKE_NORMAL and i % 2 == 0:
+                sc = tuple(max(0, c - 25) for c in dark_col)
+                pygame.draw.arc(surface, sc, (px + 2, py + 2, cs // 2 - 2, cs // 2 - 2), 0, math.pi, 1)
+                pygame.draw.arc(surface, sc, (px + cs // 2, py + cs // 2, cs // 2 - 2, cs // 2 - 2), math.pi, 2 * math.pi, 1)
+            elif snake_type == SNAKE_DOG and i % 3 == 0:
+                draw_3d_circle(surface, dark_col, (cx + (3 if i % 2 == 0 else -3), cy + (2 if i % 4 == 0 else -2)), 3, depth=1)
+            elif snake_type == SNAKE_CAT and i % 2 == 0:
+                # Tiger-striber
+                pygame.draw.line(surface, dark_col, (px + 3, py + 2), (px + cs - 5, py + cs // 2), 1)
+                pygame.draw.line(surface, dark_col, (px + 3, py + cs - 3), (px + cs - 5, cy), 1)
+            elif snake_type == SNAKE_DRAGON and i % 2 == 0:
+                # Rygspigge
+                if is_h:
+                    pygame.draw.polygon(surface, _darken(body_col, 15), [(cx, py), (cx - 2, py + 3), (cx + 2, py + 3)])
+                else:
+                    pygame.draw.polygon(surface, _darken(body_col, 15), [(px, cy), (px + 3, cy - 2), (px + 3, cy + 2)])
+            elif snake_type == SNAKE_SHARK and i % 2 == 0:
+                # Gælle-streger
+                if is_h:
+                    for gy in range(py + 4, py + cs - 3, 3):
+                        pygame.draw.line(surface, _darken(dark_col, 15), (cx - 2, gy), (cx + 2, gy), 1)
+                else:
+                    for gx in range(px + 4, px + cs - 3, 3):
+                        pygame.draw.line(surface, _darken(dark_col, 15), (gx, cy - 2), (gx, cy + 2), 1)
+            elif snake_type == SNAKE_FIRE:
+                if i % 2 == 0:
+                    off = int(2 * math.sin(tick * 0.4 + i))
+                    draw_3d_circle(surface, (255, 180, 40), (px + 2, cy + off), 2, depth=0)
+            elif snake_type == SNAKE_ICE and i % 3 == 0:
+                pygame.draw.polygon(surface, (200, 230, 255), [(cx, py + 2), (cx - 2, cy), (cx + 2, cy)])
+            elif snake_type == SNAKE_ZOMBIE and i % 2 == 0:
+                # Sting
+                pygame.draw.line(surface, (80, 60, 50), (px + 3, cy - 2), (px + cs - 4, cy - 2), 1)
+                for sx in range(px + 4, px + cs - 3, 3):
+                    pygame.draw.line(surface, (80, 60, 50), (sx, cy - 3), (sx, cy - 1), 1)
+            elif snake_type == SNAKE_PIRATE and i % 3 == 0:
+                # Kryds-mærke
+                pygame.draw.line(surface, dark_col, (cx - 2, cy - 2), (cx + 2, cy + 2), 1)
+                pygame.draw.line(surface, dark_col, (cx + 2, cy - 2), (cx - 2, cy + 2), 1)
+            elif snake_type == SNAKE_ALIEN and i % 2 == 0:
+                draw_3d_circle(surface, _lighten(body_col, 30), (cx - 2, cy - 2), 1, depth=0)
+                draw_3d_circle(surface, _lighten(body_col, 30), (cx + 2, cy + 2), 1, depth=0)
+            elif snake_type == SNAKE_CANDY and i % 2 == 0:
+                # Spiralstriber
+                pygame.draw.line(surface, _lighten(body_col, 40), (px + 2, py + 2), (px + cs - 3, py + cs - 3), 2)
+            elif snake_type == SNAKE_GOLD and i % 3 == 0:
+                # Diamant-glimt
+                pygame.draw.polygon(surface, _lighten(body_col, 40), [(cx, cy - 3), (cx + 2, cy), (cx, cy + 3), (cx - 2, cy)])
+            elif snake_type == SNAKE_SKELETON:
+                # Ribben-knogler
+                if is_h:
+                    pygame.draw.line(surface, belly_col, (cx, py + 3), (cx, py + cs - 3), 1)
+                    if i % 2 == 0:
+                        pygame.draw.line(surface, belly_col, (cx - 3, cy), (cx + 3, cy), 1)
+                else:
+                    pygame.draw.line(surface, belly_col, (px + 3, cy), (px + cs - 3, cy), 1)
+                    if i % 2 == 0:
+                        pygame.draw.line(surface, belly_col, (cx, cy - 3), (cx, cy + 3), 1)
+            elif snake_type == SNAKE_LAVA and i % 2 == 0:
+                # Glødende revner
+                glow = (255, 120 + int(40 * math.sin(tick * 0.3 + i)), 20)
+                pygame.draw.line(surface, glow, (px + 3, py + 3), (px + cs - 4, py + cs - 4), 1)
+                pygame.draw.line(surface, glow, (px + cs - 4, py + 3), (px + 3, py + cs - 4), 1)
+            elif snake_type == SNAKE_ELECTRIC and i % 2 == 0:
+                # Lyn-zigzag
+                bolt_col = (255, 255, 100)
+                if is_h:
+                    pygame.draw.lines(surface, bolt_col, False, [(px + 2, cy - 3), (cx, cy), (px + cs - 3, cy - 3)], 1)
+                else:
+                    pygame.draw.lines(surface, bolt_col, False, [(cx - 3, py + 2), (cx, cy), (cx - 3, py + cs - 3)], 1)
+            elif snake_type == SNAKE_DIAMOND and i % 2 == 0:
+                # Facet-linjer
+                pygame.draw.line(surface, _lighten(body_col, 35), (px + 3, py + 3), (px + cs - 4, py + cs - 4), 1)
+                pygame.draw.line(surface, _lighten(body_col, 25), (px + cs - 4, py + 3), (px + 3, py + cs - 4), 1)
+
+
+# --- Sprite-atlas for slangesegmenter ---
+SEG_HEAD = "head"
+SEG_BODY = "body"
+SEG_TAIL = "tail"
+SNAKE_SPRITE_PAD = 18      # plads omkring cellen til ører, tunger, antenner og kanoner
+SNAKE_ATLAS_MAX = 4096     # max antal bagte sprites (de mindst brugte smides ud)
+# Krop-mønstre gentager sig for i % N (fx striber på hvert 2. eller 3. segment)
+SNAKE_BODY_PATTERN = {
+    SNAKE_DOG: 12, SNAKE_TANK: 6, SNAKE_ICE: 3, SNAKE_PIRATE: 3, SNAKE_GOLD: 3, SNAKE_RAINBOW: 1,
+}
 
-    @property
-    def expired(self):
-        return self.lifetime is not None and self.age >= self.lifetime
-
-    def tick(self):
-        self.age += 1
-
-    def draw(self, surface, game_tick):
-        x, y = self.pos
-        base_x = x * CELL_SIZE
-        base_y = y * CELL_SIZE + SCOREBOARD_H
-
-        if self.food_type == FOOD_NORMAL:
-            # 3D Æble-look
-            cx = base_x + CELL_SIZE // 2
-            cy = base_y + CELL_SIZE // 2
-            r = CELL_SIZE // 2 - 3
-            draw_3d_circle(surface, self.color, (cx, cy + 1), r, depth=2)
-            # Lys plet for glans
-            draw_3d_circle(surface, (180, 30, 30), (cx - 2, cy - 1), r - 2, depth=1)
-            # 3D Blad
-            pygame.draw.ellipse(surface, _darken((50, 160, 50), 30), (cx + 1, cy - CELL_SIZE // 2 + 2, 6, 4))
-            pygame.draw.ellipse(surface, (50, 160, 50), (cx, cy - CELL_SIZE // 2 + 1, 6, 4))
-            pygame.draw.ellipse(surface, _lighten((50, 160, 50), 30), (cx + 1, cy - CELL_SIZE // 2 + 1, 3, 2))
-
-        elif self.food_type == FOOD_BONUS:
-            pulse = (math.sin(game_tick * 0.15) + 1) / 2
-            size_offset = int(2 * pulse)
-            rect = pygame.Rect(
-                base_x + 2 - size_offset, base_y + 2 - size_offset,
-                CELL_SIZE - 4 + size_offset * 2, CELL_SIZE - 4 + size_offset * 2
-            )
-            draw_3d_rect(surface, self.color, rect, depth=3)
-            font = pygame.font.SysFont("Consolas", 12, bold=True)
-            txt = font.render("3", True, BLACK)
-            surface.blit(txt, txt.get_rect(center=rect.center))
-
-        elif self.food_type == FOOD_INVINCIBLE:
-            blink = (math.sin(game_tick * 0.3) + 1) / 2
-            alpha = int(100 + 155 * blink)
-            r, g, b = self.color
-            blended = (
-                min(255, int(r * alpha / 255)),
-                min(255, int(g * alpha / 255)),
-                min(255, int(b * alpha / 255)),
-            )
-            cx = base_x + CELL_SIZE // 2
-            cy = base_y + CELL_SIZE // 2
-            s = CELL_SIZE // 2 - 2
-            # 3D diamant med skygge
-            shadow_pts = [(cx + 2, cy - s + 2), (cx + s + 2, cy + 2), (cx + 2, cy + s + 2), (cx - s + 2, cy + 2)]
-            pygame.draw.polygon(surface, _darken(blended, 60), shadow_pts)
-            points = [(cx, cy - s), (cx + s, cy), (cx, cy + s), (cx - s, cy)]
-            pygame.draw.polygon(surface, blended, points)
-            # Highlight top-facet
-            pygame.draw.line(surface, _lighten(blended, 60), (cx, cy - s), (cx + s, cy), 1)
-            pygame.draw.line(surface, _lighten(blended, 60), (cx - s, cy), (cx, cy - s), 1)
-            draw_3d_circle(surface, WHITE, (cx, cy), 2, depth=1)
-
-        elif self.food_type == FOOD_MEGA:
-            # Mega-mad: glødende stjerne, 100 point
-            cx = base_x + CELL_SIZE // 2
-            cy = base_y + CELL_SIZE // 2
-            pulse = (math.sin(game_tick * 0.2) + 1) / 2
-            glow_r = int(CELL_SIZE // 2 + 3 * pulse)
-            # Ydre glow
-            glow_col = (
-                min(255, int(180 + 75 * pulse)),
-                min(255, int(30 + 50 * pulse)),
-                min(255, int(200 + 55 * pulse)),
-            )
-            pygame.draw.circle(surface, _darken(glow_col, 60), (cx, cy), glow_r, 1)
-            pygame.draw.circle(surface, _darken(glow_col, 30), (cx, cy), glow_r - 1, 1)
-            # Stjerne (6 spidser)
-            s = CELL_SIZE // 2 - 1
-            inner = s // 2
-            pts = []
-            for j in range(12):
-                ang = math.pi / 2 + j * math.pi / 6
-                r = s if j % 2 == 0 else inner
-                pts.append((int(cx + r * math.cos(ang)), int(cy - r * math.sin(ang))))
-            # Skygge
-            shadow_pts = [(p[0] + 1, p[1] + 1) for p in pts]
-            pygame.draw.polygon(surface, _darken(self.color, 60), shadow_pts)
-            # Hovedform
-            pygame.draw.polygon(surface, self.color, pts)
-            # Highlight
-            pygame.draw.polygon(surface, _lighten(self.color, 40), pts, 1)
-            # "100" tekst
-            font = pygame.font.SysFont("Consolas", 8, bold=True)
-            txt = font.render("100", True, WHITE)
-            surface.blit(txt, txt.get_rect(center=(cx, cy)))
-            # Glans-prik
-            draw_3d_circle(surface, WHITE, (cx - 2, cy - 3), 2, depth=1)
-
-
-class Coin:
-    _font = None
-
-    def __init__(self, pos):
-        self.pos = pos
-        self.age = 0
-        self.lifetime = 120  # forsvinder efter 120 ticks
 
-    @property
-    def expired(self):
-        return self.age >= self.lifetime
-
-    def tick(self):
-        self.age += 1
-
-    def draw(self, surface, game_tick):
-        x, y = self.pos
-        px = x * CELL_SIZE
-        py = y * CELL_SIZE + SCOREBOARD_H
-        cx = px + CELL_SIZE // 2
-        cy = py + CELL_SIZE // 2
-        # 3D spinnende mønt-effekt
-        phase = math.sin(game_tick * 0.15)
-        w = max(2, int((CELL_SIZE // 2 - 2) * abs(phase)))
-        h = CELL_SIZE // 2 - 2
-        rect = pygame.Rect(cx - w, cy - h, w * 2, h * 2)
-        col = COIN_COLOR if phase > 0 else COIN_COLOR_DARK
-        # Skygge
-        shadow_rect = pygame.Rect(cx - w + 2, cy - h + 2, w * 2, h * 2)
-        pygame.draw.ellipse(surface, _darken(col, 70), shadow_rect)
-        # Mønt
-        pygame.draw.ellipse(surface, col, rect)
-        # Highlight bue øverst
-        if w > 3:
-            hl_rect = pygame.Rect(cx - w + 2, cy - h + 1, w * 2 - 4, h)
-            pygame.draw.ellipse(surface, _lighten(col, 50), hl_rect)
-        # Kant
-        pygame.draw.ellipse(surface, _darken(col, 30), rect, 1)
-        # "$" symbol
-        if abs(phase) > 0.3:
-            if Coin._font is None:
-                Coin._font = pygame.font.SysFont("Consolas", 11, bold=True)
-            txt = Coin._font.render("$", True, (100, 70, 0))
-            surface.blit(txt, txt.get_rect(center=(cx, cy)))
-
-
-class MoneyBill:
-    """Pengeseddel der giver 10 coins når den samles op."""
-    _font = None
+def _segment_anim(snake_type, role, gun_type, tick, i):
+    """De tick-afhængige heltal et segment tegnes med (animationsfasen).
+
+    To ticks med samme værdi giver pixel-identiske segmenter, så værdien kan
+    bruges direkte i atlas-nøglen."""
+    if role == SEG_HEAD:
+        if snake_type == SNAKE_TANK:
+            anim = (tick % 10 < 5,)
+        elif snake_type == SNAKE_ROBOT:
+            ang = tick * 0.4
+            anim = (tick % 8 < 4, math.floor(3 * math.cos(ang)), math.floor(2 * math.sin(ang)))
+        elif snake_type == SNAKE_LAVA:
+            anim = (int(50 * math.sin(tick * 0.3)),)
+        elif snake_type == SNAKE_FIRE:
+            anim = ()
+            for k in range(3):
+                fa = tick * 0.3 + k * 2.1
+                fr = CELL_SIZE // 2 + 2 + int(2 * math.sin(fa))
+                anim += (int(fr * 0.7 * math.cos(fa)), int(fr * 0.7 * math.sin(fa)), int(40 * math.sin(fa)))
+        elif snake_type == SNAKE_ELECTRIC:
+            anim = ()
+            for k in range(2):
+                sa = tick * 0.5 + k * 3.14
+                sr = CELL_SIZE // 2 + 2
+                anim += (int(sr * math.cos(sa)), int(sr * math.sin(sa)))
+        else:
+            anim = ()
+        if gun_type == GUN_AUTO:
+            ang = tick * 0.3
+            anim += (int(3 + 2 * math.sin(tick * 0.4)), math.floor(3 * math.cos(ang)), math.floor(3 * math.sin(ang)))
+        elif gun_type == GUN_VACUUM:
+            anim += (int(2 + 2 * math.sin(tick * 0.5)),)
+        return anim
+    if role == SEG_TAIL:
+        if snake_type == SNAKE_ROBOT:
+            return (tick % 6 < 3,)
+        if snake_type in (SNAKE_DOG, SNAKE_CAT, SNAKE_CANDY, SNAKE_ALIEN):
+            return (int(3 * math.sin(tick * 0.6)),)
+        return ()
+    if i % 2 == 0:
+        if snake_type == SNAKE_FIRE:
+            return (int(2 * math.sin(tick * 0.4 + i)),)
+        if snake_type == SNAKE_LAVA:
+            return (int(40 * math.sin(tick * 0.3 + i)),)
+    return ()
+
+
+class SnakeAtlas:
+    """Cache af forudtegnede slangesegmenter.
+
+    Nøglen er (type, rolle, farver, retning, mønster, animationsfase, kanon), så
+    et segment tegnes med ét blit i stedet for dusinvis af draw-kald. Knæk
+    (hjørner) i kroppen har deres egen nøgle via ind- og udgangsretningen."""
+
+    def __init__(self, max_sprites=SNAKE_ATLAS_MAX):
+        self.sprites = SurfaceCache(max_sprites)
+
+    def sprite(self, snake_type, role, palette, dirs, i, tick, gun_type=GUN_NONE):
+        """Returnér (nøgle, sprite). Nøglen ændrer sig præcis når segmentets pixels gør."""
+        if role == SEG_BODY:
+            d_prev, d_next = dirs
+            dirs_key = (d_prev[0] != 0, d_next[0] != 0)
+            pattern = i % SNAKE_BODY_PATTERN.get(snake_type, 2)
+        else:
+            dirs_key = dirs
+            pattern = 0
+        if role != SEG_HEAD:
+            gun_type = GUN_NONE
+        anim = _segment_anim(snake_type, role, gun_type, tick, i)
+        key = (snake_type, role, palette, dirs_key, pattern, anim, gun_type)
+
+        def build():
+            size = CELL_SIZE + SNAKE_SPRITE_PAD * 2
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            c = SNAKE_SPRITE_PAD + CELL_SIZE // 2
+            draw_snake_segment(sprite, role, c, c, snake_type, palette, dirs, i, tick, gun_type)
+            return sprite
+        return key, self.sprites.get(key, build)
+
+
+SNAKE_ATLAS = SnakeAtlas()
+
+
+def _snake_palette(snake, colors, snake_type, i, tick):
+    """Farver (main, dark, belly) for segment i - pulserer når uovervindelig."""
+    if snake.is_invincible:
+        pulse = (math.sin(tick * 0.5) + 1) / 2
+        bright = int(180 + 75 * pulse)
+        return (bright, bright, bright), (max(0, bright - 50),) * 3, (min(255, bright + 20),) * 3
+    if snake_type == SNAKE_RAINBOW:
+        hue = ((i * 18 + tick * 2) % 360) / 360.0
+        body_col = _hsv_to_rgb(hue, 0.75, 0.88)
+        return body_col, _darken(body_col, 40), _lighten(body_col, 30)
+    return colors
+
+
+def draw_snake(surface, snake, colors, tick, gun_type=GUN_NONE, snake_type=SNAKE_NORMAL, frame=None, alpha=1.0,
+               origin=(0, 0), cells=None):
+    """Tegn slangen med ét blit per segment fra sprite-atlasset.
+
+    colors er spillerens (main, dark, belly). Er frame en liste, tilføjes
+    (x, y, w, h, nøgle) for hvert segment (dirty rects). alpha (0..1)
+    interpolerer hvert segment fra dets celle i forrige tick; et segment
+    kommer fra cellen det næste segment står på nu. cells = (x0, y0, x1, y1)
+    springer segmenter uden for kameraets udsnit over."""
+    if not snake.body:
+        return
 
-    def __init__(self, pos):
-        self.pos = pos
-        self.age = 0
-        self.lifetime = 180  # forsvinder efter 180 ticks (lidt længere end coins)
+    n = len(snake.body)
+    cs = CELL_SIZE
+    pad = SNAKE_SPRITE_PAD
+    size = cs + pad * 2
+    body = list(snake.body)  # deque-indeksering midt i kroppen er O(n); kopier én gang
+    for i in range(n):
+        cell = body[i]
+        if cells is not None and not (cells[0] <= cell[0] < cells[2] and cells[1] <= cell[1] < cells[3]):
+            continue
+        if i == 0:
+            role, dirs = SEG_HEAD, snake.direction
+        elif i == n - 1:
+            role, dirs = SEG_TAIL, _seg_direction(body[i], body[i - 1])
+        else:
+            role = SEG_BODY
+            dirs = (_seg_direction(body[i - 1], body[i]), _seg_direction(body[i], body[i + 1]))
+        palette = _snake_palette(snake, colors, snake_type, i, tick)
+        key, sprite = SNAKE_ATLAS.sprite(snake_type, role, palette, dirs, i, tick, gun_type)
+        if not snake.moved:
+            prev = cell
+        elif i < n - 1:
+            prev = body[i + 1]
+        else:
+            prev = snake.prev_tail or cell
+        sx, sy = _lerp_cell_px(prev, cell, alpha, origin)
+        sx -= pad
+        sy -= pad
+        surface.blit(sprite, (sx, sy))
+        if frame is not None:
+            frame.append((sx, sy, size, size, key))
+
+
+# Madens farve per type
+FOOD_COLORS = {
+    FOOD_NORMAL: RED,
+    FOOD_BONUS: GOLD,
+    FOOD_INVINCIBLE: PURPLE,
+    FOOD_MEGA: (255, 50, 255),  # hot pink/magenta
+}
 
-    @property
-    def expired(self):
-        return self.age >= self.lifetime
 
-    def tick(self):
-        self.age += 1
+def draw_food(surface, food, game_tick, origin=(0, 0)):
+    base_x, base_y = _lerp_cell_px(food.pos, food.pos, 0, origin)
+    color = FOOD_COLORS[food.food_type]
+
+    if food.food_type == FOOD_NORMAL:
+        # 3D Æble-look
+        cx = base_x + CELL_SIZE // 2
+        cy = base_y + CELL_SIZE // 2
+        r = CELL_SIZE // 2 - 3
+        draw_3d_circle(surface, color, (cx, cy + 1), r, depth=2)
+        # Lys plet for glans
+        draw_3d_circle(surface, (180, 30, 30), (cx - 2, cy - 1), r - 2, depth=1)
+        # 3D Blad
+        pygame.draw.ellipse(surface, _darken((50, 160, 50), 30), (cx + 1, cy - CELL_SIZE // 2 + 2, 6, 4))
+        pygame.draw.ellipse(surface, (50, 160, 50), (cx, cy - CELL_SIZE // 2 + 1, 6, 4))
+        pygame.draw.ellipse(surface, _lighten((50, 160, 50), 30), (cx + 1, cy - CELL_SIZE // 2 + 1, 3, 2))
+
+    elif food.food_type == FOOD_BONUS:
+        pulse = (math.sin(game_tick * 0.15) + 1) / 2
+        size_offset = int(2 * pulse)
+        rect = pygame.Rect(
+            base_x + 2 - size_offset, base_y + 2 - size_offset,
+            CELL_SIZE - 4 + size_offset * 2, CELL_SIZE - 4 + size_offset * 2
+        )
+        draw_3d_rect(surface, color, rect, depth=3)
+        font = pygame.font.SysFont("Consolas", 12, bold=True)
+        txt = font.render("3", True, BLACK)
+        surface.blit(txt, txt.get_rect(center=rect.center))
+
+    elif food.food_type == FOOD_INVINCIBLE:
+        blink = (math.sin(game_tick * 0.3) + 1) / 2
+        alpha = int(100 + 155 * blink)
+        r, g, b = color
+        blended = (
+            min(255, int(r * alpha / 255)),
+            min(255, int(g * alpha / 255)),
+            min(255, int(b * alpha / 255)),
+        )
+        cx = base_x + CELL_SIZE // 2
+        cy = base_y + CELL_SIZE // 2
+        s = CELL_SIZE // 2 - 2
+        # 3D diamant med skygge
+        shadow_pts = [(cx + 2, cy - s + 2), (cx + s + 2, cy + 2), (cx + 2, cy + s + 2), (cx - s + 2, cy + 2)]
+        pygame.draw.polygon(surface, _darken(blended, 60), shadow_pts)
+        points = [(cx, cy - s), (cx + s, cy), (cx, cy + s), (cx - s, cy)]
+        pygame.draw.polygon(surface, blended, points)
+        # Highlight top-facet
+        pygame.draw.line(surface, _lighten(blended, 60), (cx, cy - s), (cx + s, cy), 1)
+        pygame.draw.line(surface, _lighten(blended, 60), (cx - s, cy), (cx, cy - s), 1)
+        draw_3d_circle(surface, WHITE, (cx, cy), 2, depth=1)
+
+    elif food.food_type == FOOD_MEGA:
+        # Mega-mad: glødende stjerne, 100 point
+        cx = base_x + CELL_SIZE // 2
+        cy = base_y + CELL_SIZE // 2
+        pulse = (math.sin(game_tick * 0.2) + 1) / 2
+        glow_r = int(CELL_SIZE // 2 + 3 * pulse)
+        # Ydre glow
+        glow_col = (
+            min(255, int(180 + 75 * pulse)),
+            min(255, int(30 + 50 * pulse)),
+            min(255, int(200 + 55 * pulse)),
+        )
+        pygame.draw.circle(surface, _darken(glow_col, 60), (cx, cy), glow_r, 1)
+        pygame.draw.circle(surface, _darken(glow_col, 30), (cx, cy), glow_r - 1, 1)
+        # Stjerne (6 spidser)
+        s = CELL_SIZE // 2 - 1
+        inner = s // 2
+        pts = []
+        for j in range(12):
+            ang = math.pi / 2 + j * math.pi / 6
+            r = s if j % 2 == 0 else inner
+            pts.append((int(cx + r * math.cos(ang)), int(cy - r * math.sin(ang))))
+        # Skygge
+        shadow_pts = [(p[0] + 1, p[1] + 1) for p in pts]
+        pygame.draw.polygon(surface, _darken(color, 60), shadow_pts)
+        # Hovedform
+        pygame.draw.polygon(surface, color, pts)
+        # Highlight
+        pygame.draw.polygon(surface, _lighten(color, 40), pts, 1)
+        # "100" tekst
+        font = pygame.font.SysFont("Consolas", 8, bold=True)
+        txt = font.render("100", True, WHITE)
+        surface.blit(txt, txt.get_rect(center=(cx, cy)))
+        # Glans-prik
+        draw_3d_circle(surface, WHITE, (cx - 2, cy - 3), 2, depth=1)
+
+
+_item_fonts = {}  # skrift-størrelse -> font til tal og tegn på mønter og sedler
+
+
+def _item_font(size):
+    font = _item_fonts.get(size)
+    if font is None:
+        font = _item_fonts[size] = pygame.font.SysFont("Consolas", size, bold=True)
+    return font
+
+
+def draw_coin(surface, coin, game_tick, origin=(0, 0)):
+    px, py = _lerp_cell_px(coin.pos, coin.pos, 0, origin)
+    cx = px + CELL_SIZE // 2
+    cy = py + CELL_SIZE // 2
+    # 3D spinnende mønt-effekt
+    phase = math.sin(game_tick * 0.15)
+    w = max(2, int((CELL_SIZE // 2 - 2) * abs(phase)))
+    h = CELL_SIZE // 2 - 2
+    rect = pygame.Rect(cx - w, cy - h, w * 2, h * 2)
+    col = COIN_COLOR if phase > 0 else COIN_COLOR_DARK
+    # Skygge
+    shadow_rect = pygame.Rect(cx - w + 2, cy - h + 2, w * 2, h * 2)
+    pygame.draw.ellipse(surface, _darken(col, 70), shadow_rect)
+    # Mønt
+    pygame.draw.ellipse(surface, col, rect)
+    # Highlight bue øverst
+    if w > 3:
+        hl_rect = pygame.Rect(cx - w + 2, cy - h + 1, w * 2 - 4, h)
+        pygame.draw.ellipse(surface, _lighten(col, 50), hl_rect)
+    # Kant
+    pygame.draw.ellipse(surface, _darken(col, 30), rect, 1)
+    # "$" symbol
+    if abs(phase) > 0.3:
+        txt = _item_font(11).render("$", True, (100, 70, 0))
+        surface.blit(txt, txt.get_rect(center=(cx, cy)))
 
-    def draw(self, surface, game_tick):
-        x, y = self.pos
-        px = x * CELL_SIZE
-        py = y * CELL_SIZE + SCOREBOARD_H
-        cx = px + CELL_SIZE // 2
-        cy = py + CELL_SIZE // 2
 
-        # Svævende/vibrerende effekt
-        float_offset = int(math.sin(game_tick * 0.1) * 2)
-        cy += float_offset
+def draw_money_bill(surface, bill, game_tick, origin=(0, 0)):
+    """Pengeseddel der giver 10 coins når den samles op."""
+    px, py = _lerp_cell_px(bill.pos, bill.pos, 0, origin)
+    cx = px + CELL_SIZE // 2
+    cy = py + CELL_SIZE // 2
 
-        # Pengeseddel størrelse (rektangulær)
-        bill_w = CELL_SIZE - 4
-        bill_h = int(CELL_SIZE * 0.6)
+    # Svævende/vibrerende effekt
+    float_offset = int(math.sin(game_tick * 0.1) * 2)
+    cy += float_offset
 
-        # Skygge
-        shadow_rect = pygame.Rect(cx - bill_w // 2 + 2, cy - bill_h // 2 + 2, bill_w, bill_h)
-        pygame.draw.rect(surface, _darken(MONEY_BILL_COLOR, 100), shadow_rect, border_radius=2)
+    # Pengeseddel størrelse (rektangulær)
+    bill_w = CELL_SIZE - 4
+    bill_h = int(CELL_SIZE * 0.6)
 
-        # Pengeseddel baggrund
-        bill_rect = pygame.Rect(cx - bill_w // 2, cy - bill_h // 2, bill_w, bill_h)
-        pygame.draw.rect(surface, MONEY_BILL_COLOR, bill_rect, border_radius=2)
+    # Skygge
+    shadow_rect = pygame.Rect(cx - bill_w // 2 + 2, cy - bill_h // 2 + 2, bill_w, bill_h)
+    pygame.draw.rect(surface, _darken(MONEY_BILL_COLOR, 100), shadow_rect, border_radius=2)
 
-        # Mørk kant
-        pygame.draw.rect(surface, MONEY_BILL_DARK, bill_rect, 2, border_radius=2)
+    # Pengeseddel baggrund
+    bill_rect = pygame.Rect(cx - bill_w // 2, cy - bill_h // 2, bill_w, bill_h)
+    pygame.draw.rect(surface, MONEY_BILL_COLOR, bill_rect, border_radius=2)
 
-        # Dekorativ kant indeni
-        inner_rect = pygame.Rect(cx - bill_w // 2 + 3, cy - bill_h // 2 + 2, bill_w - 6, bill_h - 4)
-        pygame.draw.rect(surface, _darken(MONEY_BILL_COLOR, 30), inner_rect, 1, border_radius=1)
+    # Mørk kant
+    pygame.draw.rect(surface, MONEY_BILL_DARK, bill_rect, 2, border_radius=2)
 
-        # "10" tekst i midten
-        if MoneyBill._font is None:
-            MoneyBill._font = pygame.font.SysFont("Consolas", 10, bold=True)
-        txt = MoneyBill._font.render("10", True, (30, 80, 30))
-        surface.blit(txt, txt.get_rect(center=(cx, cy)))
+    # Dekorativ kant indeni
+    inner_rect = pygame.Rect(cx - bill_w // 2 + 3, cy - bill_h // 2 + 2, bill_w - 6, bill_h - 4)
+    pygame.draw.rect(surface, _darken(MONEY_BILL_COLOR, 30), inner_rect, 1, border_radius=1)
 
+    # "10" tekst i midten
+    txt = _item_font(10).render("10", True, (30, 80, 30))
+    surface.blit(txt, txt.get_rect(center=(cx, cy)))
 
-class EnemyDog:
-    """Fjendtlig hund der jager slangen og dræber ved kontakt."""
-    DOG_MOVE_INTERVAL = 3  # bevæger sig hvert N. game-tick (langsommere end slangen)
-    DOG_BODY = (140, 90, 45)
-    DOG_BODY_DARK = (100, 65, 30)
-    DOG_EAR = (110, 70, 35)
-    DOG_EYE = (30, 30, 30)
-    DOG_NOSE = (20, 15, 15)
-    DOG_TONGUE = (220, 80, 80)
-
-    def __init__(self, pos):
-        self.x, self.y = pos
-        self.alive = True
-        self.move_cd = 0
-        self.direction = random.choice([UP, DOWN, LEFT, RIGHT])
-
-    def pos(self):
-        return (self.x, self.y)
-
-    def update(self, target_pos, ruins, occupied):
-        """Bevæg hunden mod target (slangens hoved)."""
-        self.move_cd -= 1
-        if self.move_cd > 0:
-            return
-        self.move_cd = self.DOG_MOVE_INTERVAL
-        tx, ty = target_pos
-        # Simpel AI: bevæg mod target, undgå ruiner
-        dx = (1 if tx > self.x else -1) if tx != self.x else 0
-        dy = (1 if ty > self.y else -1) if ty != self.y else 0
-        # Prøv primær retning (største afstand først)
-        moves = []
-        if abs(tx - self.x) >= abs(ty - self.y):
-            moves = [(dx, 0), (0, dy), (-dx, 0), (0, -dy)]
-        else:
-            moves = [(0, dy), (dx, 0), (0, -dy), (-dx, 0)]
-        for mx, my in moves:
-            if mx == 0 and my == 0:
-                continue
-            nx, ny = self.x + mx, self.y + my
-            if 0 <= nx < GRID_W and 0 <= ny < GRID_H and (nx, ny) not in ruins and (nx, ny) not in occupied:
-                self.x, self.y = nx, ny
-                self.direction = (mx, my)
-                return
-        # Sidst: tilfældig retning
-        random.shuffle(moves)
-        for mx, my in moves:
-            if mx == 0 and my == 0:
-                continue
-            nx, ny = self.x + mx, self.y + my
-            if 0 <= nx < GRID_W and 0 <= ny < GRID_H and (nx, ny) not in ruins:
-                self.x, self.y = nx, ny
-                self.direction = (mx, my)
-                return
 
-    def draw(self, surface, game_tick):
-        """Tegn realistisk 3D-hund med pels-tekstur og animerede detaljer."""
-        px = self.x * CELL_SIZE
-        py = self.y * CELL_SIZE + SCOREBOARD_H
-        cs = CELL_SIZE
-        cx = px + cs // 2
-        cy = py + cs // 2
-        dx, dy = self.direction
-        body_r = cs // 2 - 1
-        # Blød skygge på jorden
-        sh = pygame.Surface((body_r * 2 + 4, body_r + 2), pygame.SRCALPHA)
-        pygame.draw.ellipse(sh, (0, 0, 0, 45), (0, 0, body_r * 2 + 4, body_r + 2))
-        surface.blit(sh, (cx - body_r - 2, cy + body_r // 2))
-        # Bagben (animerede - bag kroppen)
-        leg_anim = math.sin(game_tick * 0.6) * 2
-        for side in [-1, 1]:
-            lx = cx + side * 3 - dx * 3
-            ly = cy - dy * 3 + side * (1 if dx != 0 else 0)
-            lo = int(leg_anim * side)
-            pygame.draw.line(surface, self.DOG_BODY_DARK, (lx, ly), (lx + lo, ly + 3), 2)
-            pygame.draw.circle(surface, _darken(self.DOG_BODY_DARK, 15), (lx + lo, ly + 3), 1)
-        # Krop (oval med pels-gradient)
-        draw_3d_circle(surface, self.DOG_BODY, (cx, cy), body_r, depth=2)
-        # Pels-tekstur (subtile streger)
-        rng_fur = random.Random(self.x * 100 + self.y)
-        for _ in range(5):
-            fx = cx + rng_fur.randint(-body_r + 2, body_r - 2)
-            fy = cy + rng_fur.randint(-body_r + 2, body_r - 2)
-            pygame.draw.line(surface, _darken(self.DOG_BODY, 12), (fx, fy), (fx + rng_fur.randint(-2, 2), fy + rng_fur.randint(-2, 2)), 1)
-        # Mave (lysere underside)
-        belly_s = pygame.Surface((body_r, body_r // 2 + 2), pygame.SRCALPHA)
-        pygame.draw.ellipse(belly_s, (*_lighten(self.DOG_BODY, 25), 100), (0, 0, body_r, body_r // 2 + 2))
-        surface.blit(belly_s, (cx - body_r // 2, cy))
-        # Forben (foran kroppen)
-        for side in [-1, 1]:
-            lx = cx + side * 3 + dx * 2
-            ly = cy + dy * 2 + side * (1 if dx != 0 else 0)
-            lo = int(-leg_anim * side)
-            pygame.draw.line(surface, self.DOG_BODY_DARK, (lx, ly), (lx + lo, ly + 3), 2)
-            pygame.draw.circle(surface, _darken(self.DOG_BODY_DARK, 15), (lx + lo, ly + 3), 1)
-        # Hale (vipper)
-        tail_wag = math.sin(game_tick * 0.8) * 3
-        tail_x = cx - dx * (body_r - 1)
-        tail_y = cy - dy * (body_r - 1)
-        tail_end_x = tail_x - dx * 4 + int(tail_wag * (-dy if dy == 0 else 0))
-        tail_end_y = tail_y - dy * 4 + int(tail_wag * (-dx if dx == 0 else 0))
-        pygame.draw.line(surface, self.DOG_BODY_DARK, (tail_x, tail_y), (tail_end_x, tail_end_y), 2)
-        # Ører (triangulære, realistiske)
-        ear_off = 4
-        for side in [-1, 1]:
-            ex = cx + side * ear_off - dx * 3
-            ey = cy + side * (0 if dx != 0 else ear_off) - dy * 3
-            pts = [(ex, ey - 3), (ex + side * 2, ey - 5), (ex + side * 3, ey)]
-            pygame.draw.polygon(surface, self.DOG_EAR, pts)
-            pygame.draw.polygon(surface, _darken(self.DOG_EAR, 20), pts, 1)
-            # Indre øre
-            pygame.draw.polygon(surface, _lighten(self.DOG_EAR, 30), [(ex, ey - 2), (ex + side * 1, ey - 4), (ex + side * 2, ey)])
-        # Snude (lidt frem fra hovedet)
-        snout_x = cx + dx * 4
-        snout_y = cy + dy * 4
-        draw_3d_circle(surface, _lighten(self.DOG_BODY, 15), (snout_x, snout_y), 3, depth=1)
-        # Øjne (røde, glødende - fjendtlige!)
-        for side in [-1, 1]:
-            eye_x = cx + dx * 3 + side * (-dy) * 2
-            eye_y = cy + dy * 3 + side * dx * 2
-            # Øjenhule
-            pygame.draw.circle(surface, (30, 10, 10), (eye_x, eye_y), 3)
-            # Rød iris
-            pygame.draw.circle(surface, (200, 30, 30), (eye_x, eye_y), 2)
-            # Lysende pupil
-            glow = int(200 + 55 * math.sin(game_tick * 0.3))
-            pygame.draw.circle(surface, (glow, 60, 60), (eye_x, eye_y), 1)
-        # Næse (blank, realistisk)
-        nose_x = cx + dx * 6
-        nose_y = cy + dy * 6
-        pygame.draw.circle(surface, (15, 10, 10), (nose_x, nose_y), 2)
-        pygame.draw.circle(surface, (40, 30, 30), (nose_x - 1, nose_y - 1), 1)
-        # Tunge (animeret, blødt)
-        if game_tick % 10 < 5:
-            tongue_len = 2 + int(math.sin(game_tick * 0.4) * 1)
-            tongue_x = nose_x + dx * tongue_len
-            tongue_y = nose_y + dy * tongue_len + 1
-            pygame.draw.line(surface, self.DOG_TONGUE, (nose_x, nose_y + 1), (tongue_x, tongue_y), 2)
-            pygame.draw.circle(surface, _lighten(self.DOG_TONGUE, 30), (tongue_x, tongue_y), 1)
-
-
-class Bullet:
-    def __init__(self, pos, direction, owner_idx, gun_type=GUN_BASIC):
-        self.x, self.y = pos
-        self.direction = direction
-        self.owner_idx = owner_idx  # 0 = spiller 1, 1 = spiller 2
-        self.gun_type = gun_type
-        self.alive = True
-        self.age = 0
-
-    def move(self):
-        dx, dy = self.direction
-        self.x += dx
-        self.y += dy
-        self.age += 1
-
-    def pos(self):
-        return (self.x, self.y)
-
-    def is_out_of_bounds(self):
-        return self.x < 0 or self.x >= GRID_W or self.y < 0 or self.y >= GRID_H
-
-    def draw(self, surface):
-        px = self.x * CELL_SIZE + CELL_SIZE // 2
-        py = self.y * CELL_SIZE + SCOREBOARD_H + CELL_SIZE // 2
-        if self.gun_type == GUN_AUTO:
-            # Auto: 3D grøn energi-kugle med hale
-            draw_3d_circle(surface, (80, 220, 80), (px, py), 4, depth=2)
-            draw_3d_circle(surface, (150, 255, 150), (px, py), 2, depth=1)
-            dx, dy = self.direction
-            draw_3d_circle(surface, (60, 160, 60), (px - dx * 4, py - dy * 4), 2, depth=1)
-        elif self.gun_type == GUN_QUAD:
-            # Quad: 3D rød plasma med glow
-            draw_3d_circle(surface, (220, 60, 60), (px, py), 5, depth=2)
-            draw_3d_circle(surface, (255, 150, 80), (px, py), 3, depth=1)
-            pygame.draw.circle(surface, YELLOW, (px, py), 1)
-        else:
-            # Basic: 3D orange kugle
-            draw_3d_circle(surface, BULLET_COLOR, (px, py), 4, depth=2)
-            draw_3d_circle(surface, YELLOW, (px, py), 2, depth=1)
+# Fjendtlige hunde
+DOG_BODY = (140, 90, 45)
+DOG_BODY_DARK = (100, 65, 30)
+DOG_EAR = (110, 70, 35)
+DOG_EYE = (30, 30, 30)
+DOG_NOSE = (20, 15, 15)
+DOG_TONGUE = (220, 80, 80)
 
 
-def draw_ruins(surface, ruins, difficulty=0):
-    """Tegn realistiske 3D-ruiner med sten-tekstur, revner, mos og forvitring."""
+def draw_enemy_dog(surface, dog, game_tick, alpha=1.0, origin=(0, 0)):
+    """Tegn realistisk 3D-hund med pels-tekstur og animerede detaljer."""
+    px, py = _lerp_cell_px(dog.prev_pos, dog.pos(), alpha, origin)
+    cs = CELL_SIZE
+    cx = px + cs // 2
+    cy = py + cs // 2
+    dx, dy = dog.direction
+    body_r = cs // 2 - 1
+    # Blød skygge på jorden
+    sh = pygame.Surface((body_r * 2 + 4, body_r + 2), pygame.SRCALPHA)
+    pygame.draw.ellipse(sh, (0, 0, 0, 45), (0, 0, body_r * 2 + 4, body_r + 2))
+    surface.blit(sh, (cx - body_r - 2, cy + body_r // 2))
+    # Bagben (animerede - bag kroppen)
+    leg_anim = math.sin(game_tick * 0.6) * 2
+    for side in [-1, 1]:
+        lx = cx + side * 3 - dx * 3
+        ly = cy - dy * 3 + side * (1 if dx != 0 else 0)
+        lo = int(leg_anim * side)
+        pygame.draw.line(surface, DOG_BODY_DARK, (lx, ly), (lx + lo, ly + 3), 2)
+        pygame.draw.circle(surface, _darken(DOG_BODY_DARK, 15), (lx + lo, ly + 3), 1)
+    # Krop (oval med pels-gradient)
+    draw_3d_circle(surface, DOG_BODY, (cx, cy), body_r, depth=2)
+    # Pels-tekstur (subtile streger)
+    rng_fur = random.Random(dog.x * 100 + dog.y)
+    for _ in range(5):
+        fx = cx + rng_fur.randint(-body_r + 2, body_r - 2)
+        fy = cy + rng_fur.randint(-body_r + 2, body_r - 2)
+        pygame.draw.line(surface, _darken(DOG_BODY, 12), (fx, fy), (fx + rng_fur.randint(-2, 2), fy + rng_fur.randint(-2, 2)), 1)
+    # Mave (lysere underside)
+    belly_s = pygame.Surface((body_r, body_r // 2 + 2), pygame.SRCALPHA)
+    pygame.draw.ellipse(belly_s, (*_lighten(DOG_BODY, 25), 100), (0, 0, body_r, body_r // 2 + 2))
+    surface.blit(belly_s, (cx - body_r // 2, cy))
+    # Forben (foran kroppen)
+    for side in [-1, 1]:
+        lx = cx + side * 3 + dx * 2
+        ly = cy + dy * 2 + side * (1 if dx != 0 else 0)
+        lo = int(-leg_anim * side)
+        pygame.draw.line(surface, DOG_BODY_DARK, (lx, ly), (lx + lo, ly + 3), 2)
+        pygame.draw.circle(surface, _darken(DOG_BODY_DARK, 15), (lx + lo, ly + 3), 1)
+    # Hale (vipper)
+    tail_wag = math.sin(game_tick * 0.8) * 3
+    tail_x = cx - dx * (body_r - 1)
+    tail_y = cy - dy * (body_r - 1)
+    tail_end_x = tail_x - dx * 4 + int(tail_wag * (-dy if dy == 0 else 0))
+    tail_end_y = tail_y - dy * 4 + int(tail_wag * (-dx if dx == 0 else 0))
+    pygame.draw.line(surface, DOG_BODY_DARK, (tail_x, tail_y), (tail_end_x, tail_end_y), 2)
+    # Ører (triangulære, realistiske)
+    ear_off = 4
+    for side in [-1, 1]:
+        ex = cx + side * ear_off - dx * 3
+        ey = cy + side * (0 if dx != 0 else ear_off) - dy * 3
+        pts = [(ex, ey - 3), (ex + side * 2, ey - 5), (ex + side * 3, ey)]
+        pygame.draw.polygon(surface, DOG_EAR, pts)
+        pygame.draw.polygon(surface, _darken(DOG_EAR, 20), pts, 1)
+        # Indre øre
+        pygame.draw.polygon(surface, _lighten(DOG_EAR, 30), [(ex, ey - 2), (ex + side * 1, ey - 4), (ex + side * 2, ey)])
+    # Snude (lidt frem fra hovedet)
+    snout_x = cx + dx * 4
+    snout_y = cy + dy * 4
+    draw_3d_circle(surface, _lighten(DOG_BODY, 15), (snout_x, snout_y), 3, depth=1)
+    # Øjne (røde, glødende - fjendtlige!)
+    for side in [-1, 1]:
+        eye_x = cx + dx * 3 + side * (-dy) * 2
+        eye_y = cy + dy * 3 + side * dx * 2
+        # Øjenhule
+        pygame.draw.circle(surface, (30, 10, 10), (eye_x, eye_y), 3)
+        # Rød iris
+        pygame.draw.circle(surface, (200, 30, 30), (eye_x, eye_y), 2)
+        # Lysende pupil
+        glow = int(200 + 55 * math.sin(game_tick * 0.3))
+        pygame.draw.circle(surface, (glow, 60, 60), (eye_x, eye_y), 1)
+    # Næse (blank, realistisk)
+    nose_x = cx + dx * 6
+    nose_y = cy + dy * 6
+    pygame.draw.circle(surface, (15, 10, 10), (nose_x, nose_y), 2)
+    pygame.draw.circle(surface, (40, 30, 30), (nose_x - 1, nose_y - 1), 1)
+    # Tunge (animeret, blødt)
+    if game_tick % 10 < 5:
+        tongue_len = 2 + int(math.sin(game_tick * 0.4) * 1)
+        tongue_x = nose_x + dx * tongue_len
+        tongue_y = nose_y + dy * tongue_len + 1
+        pygame.draw.line(surface, DOG_TONGUE, (nose_x, nose_y + 1), (tongue_x, tongue_y), 2)
+        pygame.draw.circle(surface, _lighten(DOG_TONGUE, 30), (tongue_x, tongue_y), 1)
+
+
+def draw_bullet(surface, bullet, alpha=1.0, origin=(0, 0)):
+    px, py = _lerp_cell_px(bullet.prev_pos, bullet.pos(), alpha, origin)
+    px += CELL_SIZE // 2
+    py += CELL_SIZE // 2
+    if bullet.gun_type == GUN_AUTO:
+        # Auto: 3D grøn energi-kugle med hale
+        draw_3d_circle(surface, (80, 220, 80), (px, py), 4, depth=2)
+        draw_3d_circle(surface, (150, 255, 150), (px, py), 2, depth=1)
+        dx, dy = bullet.direction
+        draw_3d_circle(surface, (60, 160, 60), (px - dx * 4, py - dy * 4), 2, depth=1)
+    elif bullet.gun_type == GUN_QUAD:
+        # Quad: 3D rød plasma med glow
+        draw_3d_circle(surface, (220, 60, 60), (px, py), 5, depth=2)
+        draw_3d_circle(surface, (255, 150, 80), (px, py), 3, depth=1)
+        pygame.draw.circle(surface, YELLOW, (px, py), 1)
+    else:
+        # Basic: 3D orange kugle
+        draw_3d_circle(surface, BULLET_COLOR, (px, py), 4, depth=2)
+        draw_3d_circle(surface, YELLOW, (px, py), 2, depth=1)
+
+
+# Hvor mange pixels en ruin-celle maksimalt tegner uden for sin egen celle (revner/mos/skygge)
+RUIN_OVERDRAW = 12
+
+
+def _cell_rng(x, y, salt=0):
+    """Deterministisk RNG for en grid-celle (stabilt udseende uanset tegne-rækkefølge)."""
+    return random.Random((x * 73856093) ^ (y * 19349663) ^ salt)
+
+
+def draw_ruin_cell(surface, x, y, difficulty=0, origin=(0, 0)):
+    """Tegn én realistisk 3D-ruinblok. Udseendet er seedet af cellens koordinat.
+
+    origin er surface'ens øverste venstre hjørne i skærm-koordinater."""
     theme = MAP_THEMES.get(difficulty, MAP_THEMES[0])
     r_med = theme["ruin_med"]
     r_dark = theme["ruin_dark"]
     r_light = theme.get("ruin_light", _lighten(r_med, 20))  # bruges i sten-fuger
     r_moss = theme["ruin_moss"]
-    rng = random.Random(42)
+    rng = _cell_rng(x, y, 42)
     depth = 3
-    for (x, y) in ruins:
-        px = x * CELL_SIZE
-        py = y * CELL_SIZE + SCOREBOARD_H
+    px = x * CELL_SIZE - origin[0]
+    py = y * CELL_SIZE + SCOREBOARD_H - origin[1]
+    cs = CELL_SIZE
+    draw_3d_rect(surface, r_med, (px, py, cs, cs), depth=depth)
+    # Sten-tekstur (vandrette og lodrette fuger med highlight)
+    for fy in range(py + 3, py + cs - 2, 5):
+        offset = rng.randint(0, 4)
+        pygame.draw.line(surface, r_dark, (px + 2 + offset, fy), (px + cs - 3, fy), 1)
+        pygame.draw.line(surface, r_light, (px + 2 + offset, fy + 1), (px + cs - 3, fy + 1), 1)
+    for fx in range(px + 4, px + cs - 2, 6):
+        fy_start = py + rng.randint(2, 5)
+        pygame.draw.line(surface, r_dark, (fx, fy_start), (fx, fy_start + rng.randint(3, 6)), 1)
+    # Revner (realistiske uregelmæssige)
+    if rng.random() < 0.5:
+        cx = px + rng.randint(4, cs - 4)
+        cy = py + rng.randint(4, cs - 4)
+        for _ in range(rng.randint(2, 4)):
+            nx = cx + rng.randint(-4, 4)
+            ny = cy + rng.randint(-4, 4)
+            pygame.draw.line(surface, _darken(r_dark, 15), (cx, cy), (nx, ny), 1)
+            cx, cy = nx, ny
+    # Forvitring (mørke pletter)
+    for _ in range(rng.randint(1, 3)):
+        wx = px + rng.randint(3, cs - 4)
+        wy = py + rng.randint(3, cs - 4)
+        wr = rng.randint(1, 2)
+        ws = pygame.Surface((wr * 2, wr * 2), pygame.SRCALPHA)
+        pygame.draw.circle(ws, (*_darken(r_med, 25), 80), (wr, wr), wr)
+        surface.blit(ws, (wx - wr, wy - wr))
+    # Mos med alpha-blending
+    if rng.random() < 0.4:
+        mx = px + rng.randint(2, cs - 6)
+        my = py + rng.randint(2, cs - 6)
+        mr = rng.randint(2, 4)
+        ms = pygame.Surface((mr * 2 + 2, mr * 2 + 2), pygame.SRCALPHA)
+        pygame.draw.circle(ms, (*r_moss, 160), (mr + 1, mr + 1), mr)
+        pygame.draw.circle(ms, (*_lighten(r_moss, 20), 100), (mr, mr), max(1, mr - 1))
+        surface.blit(ms, (mx - mr - 1, my - mr - 1))
+
+
+def draw_ruins(surface, ruins, difficulty=0):
+    """Tegn alle ruiner (i fast rækkefølge, så overlap mellem naboer er stabilt)."""
+    for (x, y) in sorted(ruins):
+        draw_ruin_cell(surface, x, y, difficulty)
+
+
+def render_map_layer(floor_layer, ruins, difficulty=0):
+    """Bag gulv + ruiner sammen til rundens statiske baggrundslag."""
+    layer = floor_layer.copy()
+    draw_ruins(layer, ruins, difficulty)
+    return layer
+
+
+def _ruin_extent(pos, origin=(0, 0)):
+    """Skærm-rektangel som en ruin-celle (inkl. revner/skygge) kan tegne i."""
+    x, y = pos
+    return pygame.Rect(x * CELL_SIZE - RUIN_OVERDRAW - origin[0],
+                       y * CELL_SIZE + SCOREBOARD_H - RUIN_OVERDRAW - origin[1],
+                       CELL_SIZE + RUIN_OVERDRAW * 2, CELL_SIZE + RUIN_OVERDRAW * 2)
+
+
+def repaint_ruin_area(layer, floor_layer, ruins, pos, difficulty=0, origin=(0, 0)):
+    """Gentegn kun området omkring én ruin-celle (fx efter den er skudt i stykker).
+
+    Gulvet genskabes i cellens område, og de naboruiner der rører området
+    tegnes igen i samme rækkefølge som ved den fulde bagning. Naboerne tegnes
+    uden clipping på en lille kladde-surface (clipping kan flytte pixels i
+    liniernes rasterisering), og kun det berørte område kopieres tilbage.
+    origin er lagenes øverste venstre hjørne i skærm-koordinater."""
+    x, y = pos
+    area = _ruin_extent(pos, origin).clip(layer.get_rect())
+    reach = -(-2 * RUIN_OVERDRAW // CELL_SIZE)  # naboceller hvis tegning kan nå området
+    neighbours = sorted(
+        (x + dx, y + dy) for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)
+        if (x + dx, y + dy) in ruins
+    )
+    if not neighbours:
+        layer.blit(floor_layer, area.topleft, area)
+        return area
+    scratch_rect = area.unionall([_ruin_extent(n, origin) for n in neighbours])
+    scratch = pygame.Surface(scratch_rect.size)
+    scratch.blit(floor_layer, (0, 0), scratch_rect)
+    scratch_origin = (scratch_rect.x + origin[0], scratch_rect.y + origin[1])
+    for nx, ny in neighbours:
+        draw_ruin_cell(scratch, nx, ny, difficulty, origin=scratch_origin)
+    layer.blit(scratch, area.topleft, area.move(-scratch_rect.x, -scratch_rect.y))
+    return area
+
+
+# --- Kamera og terræn-chunks (store baner) ---
+CHUNK_CACHE_MAX = 48  # forudtegnede chunks (gulv + ruiner); de længst usete smides ud
+
+
+def render_chunk(terrain, key, floor, difficulty=0):
+    """Forudtegn et terræn-chunk (gulv + ruiner) på sin egen surface.
+
+    Gulvet klippes ud af floor (standardbanens gulv) som var det lagt fliser
+    over hele banen, og ruinerne kommer fra terrænets seed - så chunket ser
+    ens ud hver gang det tegnes igen efter at være smidt ud af cachen.
+    Ruiner holder afstand til chunkets kant, så intet tegnes over kanten."""
+    x0, y0, x1, y1 = terrain.chunk_rect(key)
+    cs = CELL_SIZE
+    surf = pygame.Surface(((x1 - x0) * cs, (y1 - y0) * cs))
+    tw, th = floor.get_size()
+    ox, oy = x0 * cs % tw, y0 * cs % th
+    for fx in range(-ox, surf.get_width(), tw):
+        for fy in range(-oy, surf.get_height(), th):
+            surf.blit(floor, (fx, fy))
+    chunk = terrain.chunks.get(key) or terrain.generate(key)
+    origin = (x0 * cs, y0 * cs + SCOREBOARD_H)
+    for x, y in sorted(chunk[0]):
+        draw_ruin_cell(surf, x, y, difficulty, origin)
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert()
+    return surf
+
+
+class Viewport:
+    """Et kamera der viser et udsnit af en stor bane i rect på skærmen.
+
+    cam er udsnittets øverste venstre hjørne i bane-pixels (uden scoreboardet).
+    Baggrunden er de forudtegnede terræn-chunks der rører udsnittet."""
+
+    def __init__(self, rect, width, height):
+        self.rect = rect
+        self.board_w = width * CELL_SIZE
+        self.board_h = height * CELL_SIZE
+        self.cam = (0, 0)
+
+    def follow(self, px, py):
+        """Centrér kameraet på bane-pixel (px, py), holdt inden for banen."""
+        x = min(max(0, px - self.rect.w // 2), max(0, self.board_w - self.rect.w))
+        y = min(max(0, py - self.rect.h // 2), max(0, self.board_h - self.rect.h))
+        self.cam = (x, y)
+
+    @property
+    def origin(self):
+        """origin til tegnefunktionerne, så banen står under kameraet i rect."""
+        return self.cam[0] - self.rect.x, self.cam[1] + SCOREBOARD_H - self.rect.y
+
+    def cells(self, margin=1):
+        """Synlige celler (x0, y0, x1, y1) plus margin, så figurer i kanten kommer med."""
         cs = CELL_SIZE
-        draw_3d_rect(surface, r_med, (px, py, cs, cs), depth=depth)
-        # Sten-tekstur (vandrette og lodrette fuger med highlight)
-        for fy in range(py + 3, py + cs - 2, 5):
-            offset = rng.randint(0, 4)
-            pygame.draw.line(surface, r_dark, (px + 2 + offset, fy), (px + cs - 3, fy), 1)
-            pygame.draw.line(surface, r_light, (px + 2 + offset, fy + 1), (px + cs - 3, fy + 1), 1)
-        for fx in range(px + 4, px + cs - 2, 6):
-            fy_start = py + rng.randint(2, 5)
-            pygame.draw.line(surface, r_dark, (fx, fy_start), (fx, fy_start + rng.randint(3, 6)), 1)
-        # Revner (realistiske uregelmæssige)
-        if rng.random() < 0.5:
-            cx = px + rng.randint(4, cs - 4)
-            cy = py + rng.randint(4, cs - 4)
-            for _ in range(rng.randint(2, 4)):
-                nx = cx + rng.randint(-4, 4)
-                ny = cy + rng.randint(-4, 4)
-                pygame.draw.line(surface, _darken(r_dark, 15), (cx, cy), (nx, ny), 1)
-                cx, cy = nx, ny
-        # Forvitring (mørke pletter)
-        for _ in range(rng.randint(1, 3)):
-            wx = px + rng.randint(3, cs - 4)
-            wy = py + rng.randint(3, cs - 4)
-            wr = rng.randint(1, 2)
-            ws = pygame.Surface((wr * 2, wr * 2), pygame.SRCALPHA)
-            pygame.draw.circle(ws, (*_darken(r_med, 25), 80), (wr, wr), wr)
-            surface.blit(ws, (wx - wr, wy - wr))
-        # Mos med alpha-blending
-        if rng.random() < 0.4:
-            mx = px + rng.randint(2, cs - 6)
-            my = py + rng.randint(2, cs - 6)
-            mr = rng.randint(2, 4)
-            ms = pygame.Surface((mr * 2 + 2, mr * 2 + 2), pygame.SRCALPHA)
-            pygame.draw.circle(ms, (*r_moss, 160), (mr + 1, mr + 1), mr)
-            pygame.draw.circle(ms, (*_lighten(r_moss, 20), 100), (mr, mr), max(1, mr - 1))
-            surface.blit(ms, (mx - mr - 1, my - mr - 1))
+        cx, cy = self.cam
+        return (max(0, cx // cs - margin), max(0, cy // cs - margin),
+                min(self.board_w // cs, (cx + self.rect.w) // cs + 1 + margin),
+                min(self.board_h // cs, (cy + self.rect.h) // cs + 1 + margin))
+
+    def chunks(self, margin=0):
+        """Nøglerne for de chunks der rører de synlige celler (plus margin)."""
+        x0, y0, x1, y1 = self.cells(margin)
+        return [(cx, cy)
+                for cx in range(x0 // CHUNK_SIZE, (x1 - 1) // CHUNK_SIZE + 1)
+                for cy in range(y0 // CHUNK_SIZE, (y1 - 1) // CHUNK_SIZE + 1)]
+
+    def draw(self, surface, chunk_surface):
+        """Blit chunk-surfaces (chunk_surface(nøgle) -> surface) under kameraet til rect."""
+        span = CHUNK_SIZE * CELL_SIZE
+        ox, oy = self.cam[0] - self.rect.x, self.cam[1] - self.rect.y
+        for key in self.chunks(margin=0):
+            surface.blit(chunk_surface(key), (key[0] * span - ox, key[1] * span - oy))
 
 
 def _make_sound(sample_rate=22050):
-    """Generer lyd-effekter som pygame Sound-objekter."""
-    sounds = {}
-
-    # --- BASIC skud: SHOTGUN BLAST - massiv eksplosion ---
-    dur = 0.35
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    rng_s = random.Random(99)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        # Massiv noise-eksplosion de første 60ms
-        noise_env = max(0.0, 1.0 - frac * 5) if frac < 0.18 else max(0.0, 0.3 * (1.0 - frac * 2))
-        noise = noise_env * (rng_s.random() * 2 - 1)
-        # Dyb tone-sweep 1500->60Hz
-        freq = 1500 * (1.0 - frac) ** 2 + 60
-        tone_env = max(0.0, 1.0 - frac * 2.0)
-        tone = tone_env * math.sin(2 * math.pi * freq * t)
-        # Distorted bass-punch 55Hz
-        bass_env = max(0.0, 1.0 - frac * 3) if frac < 0.35 else 0.0
-        bass_raw = math.sin(2 * math.pi * 55 * t)
-        bass = bass_env * 0.8 * max(-1.0, min(1.0, bass_raw * 3.0))
-        # Mid-crunch 300Hz
-        crunch_env = max(0.0, 1.0 - frac * 4) if frac < 0.25 else 0.0
-        crunch = crunch_env * 0.4 * math.sin(2 * math.pi * 300 * t)
-        s = (0.40 * noise + 0.30 * tone + 0.20 * bass + 0.10 * crunch) * 1.3
-        val = int(s * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["shoot_basic"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- AUTO skud: EXPLOSIVE BURST - distorted laser-eksplosion ---
-    dur = 0.18
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    rng_a = random.Random(55)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        # Noise-blast
-        noise_env = max(0.0, 1.0 - frac * 6) if frac < 0.15 else 0.0
-        noise = noise_env * (rng_a.random() * 2 - 1)
-        # Dobbelt distorted laser-sweep
-        f1 = 2800 - 2400 * frac
-        f2 = 1800 - 1500 * frac
-        env = max(0.0, 1.0 - frac * 2.5)
-        raw1 = math.sin(2 * math.pi * f1 * t)
-        raw2 = math.sin(2 * math.pi * f2 * t)
-        zap = env * (0.35 * max(-1.0, min(1.0, raw1 * 2.5)) + 0.25 * max(-1.0, min(1.0, raw2 * 2.0)))
-        # Bass-thump
-        bass_env = max(0.0, 1.0 - frac * 5) if frac < 0.2 else 0.0
-        bass = bass_env * 0.5 * math.sin(2 * math.pi * 90 * t)
-        s = (0.35 * noise + 0.45 * zap + 0.20 * bass) * 1.2
-        val = int(s * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["shoot_auto"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- QUAD skud: MEGA-BOOM - massiv eksplosion med sub-bass og ekko ---
-    dur = 0.55
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    rng_q = random.Random(77)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        # Full-clip noise-eksplosion
-        noise_env = max(0.0, 1.0 - frac * 4) if frac < 0.25 else max(0.0, 0.2 * (1.0 - frac * 1.5))
-        noise = noise_env * (rng_q.random() * 2 - 1)
-        # Cubic sweep 800->25Hz for ekstra tyngde
-        sweep_frac = min(1.0, frac * 1.5)
-        freq = 800 * (1.0 - sweep_frac) ** 3 + 25
-        tone_env = max(0.0, 1.0 - frac * 1.5)
-        tone = tone_env * math.sin(2 * math.pi * freq * t)
-        # Sub-bass vibrato 35Hz med tremolo
-        sub_env = max(0.0, 1.0 - frac * 1.8)
-        sub = sub_env * 0.7 * math.sin(2 * math.pi * 35 * t) * (1.0 + 0.5 * math.sin(2 * math.pi * 8 * t))
-        # Distorted mid-crunch
-        crunch_env = max(0.0, 1.0 - frac * 3) if frac < 0.3 else 0.0
-        crunch_raw = math.sin(2 * math.pi * 200 * t) + 0.5 * math.sin(2 * math.pi * 150 * t)
-        crunch = crunch_env * 0.4 * max(-1.0, min(1.0, crunch_raw * 3.0))
-        # Ekko-bølge efter 120ms
-        echo = 0.0
-        if t > 0.12:
-            te = t - 0.12
-            echo_frac = te / (dur - 0.12)
-            echo_env = max(0.0, 0.5 * (1.0 - echo_frac * 2))
-            echo = echo_env * math.sin(2 * math.pi * (300 - 250 * echo_frac) * te)
-        s = (0.30 * noise + 0.25 * tone + 0.20 * sub + 0.15 * crunch + 0.10 * echo) * 1.5
-        val = int(s * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["shoot_quad"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- VACUUM skud: STØVSUGER-HVINEN - stigende sug med luft-woosh ---
-    dur = 0.25
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    rng_v = random.Random(33)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        # Luftstrøm-noise (konstant sugelyd)
-        air_env = 0.6 * (0.8 + 0.2 * math.sin(2 * math.pi * 12 * t))
-        air = air_env * (rng_v.random() * 2 - 1)
-        # Stigende hvine-tone 200->800Hz (sugelyd)
-        whine_freq = 200 + 600 * frac
-        whine_env = 0.5 + 0.3 * frac
-        whine = whine_env * math.sin(2 * math.pi * whine_freq * t)
-        # Dyb motor-brummen 60Hz
-        motor = 0.3 * math.sin(2 * math.pi * 60 * t) * (1.0 + 0.4 * math.sin(2 * math.pi * 6 * t))
-        # Fade in/out
-        fade = min(1.0, frac * 8) * min(1.0, (1.0 - frac) * 5)
-        s = fade * (0.35 * air + 0.40 * whine + 0.25 * motor)
-        val = int(s * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["shoot_vacuum"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # Død-lyd: faldende tone (0.4s, 500->80Hz)
-    dur = 0.4
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        freq = 500 - 420 * frac
-        vol = 0.3 * (1 - frac * 0.7)
-        val = int(vol * 32767 * math.sin(2 * math.pi * freq * t))
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["death"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- Coin pling: kort krystalklart pling ---
-    dur = 0.15
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        env = max(0.0, 1.0 - frac * 3) if frac < 0.33 else max(0.0, (1.0 - frac) * 1.5)
-        # Høj klar tone 1200Hz + overtone 2400Hz
-        s = env * (0.5 * math.sin(2 * math.pi * 1200 * t) +
-                   0.3 * math.sin(2 * math.pi * 2400 * t) +
-                   0.2 * math.sin(2 * math.pi * 3600 * t))
-        val = int(s * 0.4 * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["coin_pling"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- Æble nam-nam: to korte bløde "nam" lyde ---
-    dur = 0.3
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    rng_nom = random.Random(42)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        # To "nam" bumps ved 0.0-0.12s og 0.15-0.27s
-        if frac < 0.4:
-            bite_t = frac / 0.4
-            env = math.sin(math.pi * bite_t) * 0.8
-        elif frac < 0.5:
-            env = 0.0
-        else:
-            bite_t = (frac - 0.5) / 0.4
-            env = math.sin(math.pi * min(1.0, bite_t)) * 0.6
-        # Blød crunch-lyd (lav tone + lidt noise)
-        tone = math.sin(2 * math.pi * 180 * t) + 0.5 * math.sin(2 * math.pi * 300 * t)
-        noise = (rng_nom.random() * 2 - 1) * 0.3
-        s = env * (0.6 * tone + 0.4 * noise)
-        val = int(s * 0.35 * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["eat_apple"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- Mega food spawn fanfare: majestætisk stigende akkord ---
-    dur = 1.2
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        # Fade in hurtigt, hold, fade ud blødt
-        if frac < 0.05:
-            env = frac / 0.05
-        elif frac < 0.7:
-            env = 1.0
-        else:
-            env = max(0.0, (1.0 - frac) / 0.3)
-        # Tre toner der kommer ind forskudt: C5, E5, G5 (dur-akkord)
-        c5 = 523.25
-        e5 = 659.25
-        g5 = 783.99
-        c6 = 1046.50
-        t1 = math.sin(2 * math.pi * c5 * t) * min(1.0, t * 8)
-        t2 = math.sin(2 * math.pi * e5 * t) * min(1.0, max(0.0, (t - 0.1) * 6))
-        t3 = math.sin(2 * math.pi * g5 * t) * min(1.0, max(0.0, (t - 0.2) * 5))
-        t4 = math.sin(2 * math.pi * c6 * t) * min(1.0, max(0.0, (t - 0.35) * 4))
-        # Shimmer
-        shimmer = 0.15 * math.sin(2 * math.pi * 12 * t) * math.sin(2 * math.pi * g5 * 2 * t)
-        s = env * (0.25 * t1 + 0.25 * t2 + 0.25 * t3 + 0.15 * t4 + 0.10 * shimmer)
-        val = int(s * 0.5 * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["mega_spawn"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- Fjendtlig hund: aggressivt gø ---
-    dur = 0.2
-    n = int(sample_rate * dur)
-    buf = bytearray(n * 2)
-    rng_bark = random.Random(66)
-    for i in range(n):
-        t = i / sample_rate
-        frac = i / n
-        # To hurtige "vov"-bumps
-        if frac < 0.4:
-            env = math.sin(math.pi * frac / 0.4) * 0.9
-        elif frac < 0.5:
-            env = 0.0
-        else:
-            env = math.sin(math.pi * (frac - 0.5) / 0.4) * 0.7 if frac < 0.9 else 0.0
-        # Rå tone 150Hz + noise for gø-lyd
-        tone = math.sin(2 * math.pi * 150 * t) + 0.6 * math.sin(2 * math.pi * 250 * t)
-        noise = (rng_bark.random() * 2 - 1) * 0.4
-        s = env * (0.55 * tone + 0.45 * noise)
-        val = int(s * 0.45 * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["enemy_bark"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- Hjælper: generer melodi-samples fra nodeliste ---
-    def _melody_samples(notes, vol, attack=0.08, release=0.15):
-        """notes: [(freq, dur_sek), ...]. Returnerer list of float samples."""
-        out = []
-        for freq, dur in notes:
-            ns = int(sample_rate * dur)
-            att_s = int(sample_rate * attack)
-            rel_s = int(sample_rate * release)
-            for j in range(ns):
-                t = j / sample_rate
-                # Envelope: attack + sustain + release
-                if j < att_s:
-                    env = j / att_s
-                elif j > ns - rel_s:
-                    env = (ns - j) / rel_s
-                else:
-                    env = 1.0
-                if freq > 0:
-                    s = vol * env * math.sin(2 * math.pi * freq * t)
-                else:
-                    s = 0.0
-                out.append(s)
-        return out
-
-    # --- MENU-MUSIK: rolig C-dur melodi med pad (ca. 10 sek loop) ---
-    # Noder: (frekvens, varighed)
-    _C4, _D4, _E4, _F4, _G4 = 261.63, 293.66, 329.63, 349.23, 392.00
-    _A4, _B4, _C5, _D5 = 440.00, 493.88, 523.25, 587.33
-    _C3, _G3 = 130.81, 196.00
-    _R = 0  # pause
-    menu_notes = [
-        (_E4, 0.45), (_G4, 0.45), (_C5, 0.6), (_B4, 0.3), (_G4, 0.45),
-        (_E4, 0.45), (_F4, 0.45), (_A4, 0.6), (_G4, 0.3), (_E4, 0.45),
-        (_C4, 0.45), (_D4, 0.45), (_F4, 0.45), (_E4, 0.6), (_R, 0.2),
-        (_C4, 0.45), (_D4, 0.45), (_E4, 0.45), (_G4, 0.45), (_C5, 0.6),
-        (_A4, 0.3), (_G4, 0.45), (_E4, 0.45), (_D4, 0.45), (_C4, 0.6),
-        (_R, 0.3),
-    ]
-    mel = _melody_samples(menu_notes, 0.10, attack=0.06, release=0.12)
-    total_n = len(mel)
-    buf = bytearray(total_n * 2)
-    for i in range(total_n):
-        t = i / sample_rate
-        frac = i / total_n
-        # Blød pad underneden
-        pad_env = math.sin(math.pi * frac)
-        pad = 0.025 * pad_env * (
-            math.sin(2 * math.pi * _C3 * t)
-            + 0.7 * math.sin(2 * math.pi * _G3 * t)
-            + 0.4 * math.sin(2 * math.pi * _E4 * t * 0.5)
-        )
-        # Melodi fader lidt ind/ud ved loop-grænsen
-        mel_env = min(1.0, frac * 8, (1.0 - frac) * 8)
-        s = mel[i] * mel_env + pad
-        val = int(s * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["menu_music"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    # --- SPIL-MUSIK: intens A-mol melodi med pulserende bas (ca. 5 sek loop) ---
-    _A3, _C4g, _D4g, _E4g, _F4g, _G4g = 220.00, 261.63, 293.66, 329.63, 349.23, 392.00
-    _E3, _G3g, _B3 = 164.81, 196.00, 246.94
-    _A4g = 440.00
-    game_notes = [
-        (_A3, 0.16), (_C4g, 0.16), (_E4g, 0.16), (_A4g, 0.12), (_E4g, 0.12),
-        (_C4g, 0.16), (_D4g, 0.16), (_F4g, 0.16), (_D4g, 0.12), (_A3, 0.12),
-        (_E3, 0.16), (_G3g, 0.16), (_B3, 0.16), (_E4g, 0.12), (_B3, 0.12),
-        (_A3, 0.22), (_R, 0.06), (_G3g, 0.16), (_E3, 0.16), (_A3, 0.22),
-        (_R, 0.08),
-        (_A3, 0.12), (_E4g, 0.12), (_C4g, 0.16), (_A3, 0.12), (_E3, 0.16),
-        (_G3g, 0.16), (_A3, 0.22), (_R, 0.06),
-    ]
-    mel = _melody_samples(game_notes, 0.12, attack=0.02, release=0.05)
-    total_n = len(mel)
-    buf = bytearray(total_n * 2)
-    bpm = 140
-    beat_samples = int(sample_rate * 60.0 / bpm)
-    rng_hat = random.Random(42)
-    for i in range(total_n):
-        t = i / sample_rate
-        # Pulserende bas (A2 = 110 Hz)
-        bp = i % beat_samples
-        bf = bp / beat_samples
-        bass_env = max(0.0, 1.0 - bf * 2.5)
-        bass = 0.10 * bass_env * math.sin(2 * math.pi * 110 * t)
-        # Hi-hat
-        bp3 = i % (beat_samples // 2)
-        bf3 = bp3 / (beat_samples // 2)
-        hat_env = max(0.0, 1.0 - bf3 * 8)
-        hat = 0.018 * hat_env * (rng_hat.random() * 2 - 1)
-        s = mel[i] + bass + hat
-        val = int(s * 32767)
-        struct.pack_into('<h', buf, i * 2, max(-32768, min(32767, val)))
-    sounds["game_music"] = pygame.mixer.Sound(buffer=bytes(buf))
-
-    return sounds
+    """Lyd-effekter som pygame Sound-objekter (opskrifterne og cachen står i synth.py)."""
+    return {name: pygame.mixer.Sound(buffer=synth.load(name, sample_rate)) for name in synth.SOUNDS}
+
+
+def _sim_property(name):
+    """Game-attribut der læses og skrives direkte på self.sim."""
+    return property(lambda self: getattr(self.sim, name),
+                    lambda self, value: setattr(self.sim, name, value))
 
 
 class Game:
-    def __init__(self):
+    # Spiltilstanden ligger i Simulation; menuen, HUD'en og tegningen bruger den herigennem
+    num_players = _sim_property("num_players")
+    difficulty = _sim_property("difficulty")
+    scores = _sim_property("scores")
+    coins = _sim_property("coins")
+    ammo = _sim_property("ammo")
+    power = _sim_property("power")
+    gun_type = _sim_property("gun_type")
+    snake1 = _sim_property("snake1")
+    snake2 = _sim_property("snake2")
+    items = _sim_property("items")
+    bullets = _sim_property("bullets")
+    enemies = _sim_property("enemies")
+    ruins = _sim_property("ruins")
+    trees = _sim_property("trees")
+    fps = _sim_property("fps")
+    game_tick = _sim_property("game_tick")
+
+    def __init__(self, stress=False, replay=None, replay_skip=1, db=None, profiles=("p1", "p2")):
         pygame.mixer.pre_init(22050, -16, 1, 512)
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_W, WINDOW_H))
@@ -2213,76 +2010,92 @@ class Game:
         self.font_med = pygame.font.SysFont("Consolas", 22)
         self.font_small = pygame.font.SysFont("Consolas", 16)
 
-        self.scores = [0, 0]
-        self.coins = [0, 0]
-        self.ammo = [0, 0]
-        self.power = [0, 0]  # strøm til støvsuger
-        self.gun_type = [GUN_NONE, GUN_NONE]  # None, "basic", "auto", "quad", "vacuum"
-        self.auto_shoot_cd = [0, 0]
-        self.vacuum_cd = [0, 0]
-        self.vacuum_active = [False, False]  # om støvsugeren kører lige nu
+        self.sim = Simulation(stress)
+        self.sim.observers.append(self._on_sim_event)
+        self.pending_input = [PlayerInput(), PlayerInput()]  # tryk siden sidste game-tick
+        # Afspilning (--replay): inputtet kommer fra replay'en, og der tegnes kun
+        # hvert replay_skip. tick uden ventetid mellem frames
+        self.replay = replay
+        self.replay_skip = replay_skip
+        self.playback = None
+        self.replay_worst = (0.0, 0)  # (ms, tick) for det langsomste tick i afspilningen
         self.snake_type = [SNAKE_NORMAL, SNAKE_NORMAL]
         self.state = "MENU"
         self.current_music = None
-        self.num_players = 2
-        self.difficulty = 1
+        self.show_debug = False  # F3: cache-statistik i hjørnet
+        self.dirty_rects = DIRTY_RECTS
+        self.prev_frame = None  # forrige frames (x, y, w, h, signatur) - None = fuld opdatering
+        self.dirty_extra = []   # områder ændret uden for figurerne (fx ødelagte ruiner)
+        self.dirty_count = 0
+        self.sim_time = 0.0  # ikke-simuleret tid (sekunder) siden sidste game-tick
+        self.alpha = 1.0     # hvor langt vi er mellem forrige og nuværende tick (0..1)
         self.menu_row = 0
-        self.snake1 = Snake((3, 3), RIGHT, GREEN, GREEN_DARK, GREEN_BELLY)
-        self.snake2 = Snake((GRID_W - 4, GRID_H - 4), LEFT, BLUE, BLUE_DARK, BLUE_BELLY)
-        self.foods = []
-        self.coin_items = []
-        self.money_bills = []
-        self.bullets = []
-        self.enemies = []
-        self.enemy_spawn_cd = 0
-        self.ruins = set()
-        self.trees = []
-        self.fps = DIFFICULTIES[self.difficulty][1]
+        self.snake_colors = [(GREEN, GREEN_DARK, GREEN_BELLY), (BLUE, BLUE_DARK, BLUE_BELLY)]
+        self.floor_layers = {}  # forudtegnet gulv per map-tema
+        self.floor_layer = None
+        self.map_layer = None   # gulv + ruiner for den aktuelle runde
+        # Store baner: ét kamera per spiller (delt skærm i 2-spiller) over forudtegnede chunks
+        self.viewports = []
+        self.floor_tile = None
+        self.chunk_surfaces = SurfaceCache(CHUNK_CACHE_MAX)
         self.round_message = ""
-        self.game_tick = 0
-        self.special_food_cooldown = 0
-        self.coin_spawn_cooldown = 0
 
-        # Highscore
-        self.highscore_data = load_highscores()
+        # Pengepung og highscores: JSON-filerne, eller en delt SQLite-database (db)
+        self.profiles = list(profiles)
+        if db is not None:
+            # Importeres først her: sqlite3 findes ikke i alle builds (fx web)
+            from sqlite_store import SqliteStore
+            store = SqliteStore(db)
+            json_wallets = JsonWallets()  # alle profiler i filen, ikke kun dem der spilles med nu
+            store.migrate_json(json_wallets.load_wallets(json_wallets.profiles()), HIGHSCORE_FILE)
+            self.wallet_store = self.highscores = store
+        else:
+            self.wallet_store = JsonWallets()
+            self.highscores = HighscoreStore(HIGHSCORE_FILE)
         self.name_input = ""
         self.name_player_idx = 0
         self.pending_highscores = []
 
         # Load saved wallet data
         self._load_wallet()
+        self.wallet_saver = WriteBehind(self._wallet_data, self.wallet_store.save_wallets)
         # Start menu-musik
         self._play_music("menu_music")
+        if replay is not None:
+            self.new_round()
 
     def _load_wallet(self):
-        data = load_savedata()
-        self.coins[0] = data.get("p1_coins", 0)
-        self.coins[1] = data.get("p2_coins", 0)
-        self.ammo[0] = data.get("p1_ammo", 0)
-        self.ammo[1] = data.get("p2_ammo", 0)
-        self.power[0] = data.get("p1_power", 0)
-        self.power[1] = data.get("p2_power", 0)
-        self.gun_type[0] = data.get("p1_gun", GUN_NONE)
-        self.gun_type[1] = data.get("p2_gun", GUN_NONE)
-        st0 = data.get("p1_snake_type", SNAKE_NORMAL)
-        st1 = data.get("p2_snake_type", SNAKE_NORMAL)
-        self.snake_type[0] = st0 if st0 in SNAKE_TYPES_LIST else SNAKE_NORMAL
-        self.snake_type[1] = st1 if st1 in SNAKE_TYPES_LIST else SNAKE_NORMAL
+        wallets = self.wallet_store.load_wallets(self.profiles)
+        for idx, name in enumerate(self.profiles):
+            wallet = wallets[name]
+            self.coins[idx] = wallet.get("coins", 0)
+            self.ammo[idx] = wallet.get("ammo", 0)
+            self.power[idx] = wallet.get("power", 0)
+            self.gun_type[idx] = wallet.get("gun", GUN_NONE)
+            snake_type = wallet.get("snake_type", SNAKE_NORMAL)
+            self.snake_type[idx] = snake_type if snake_type in SNAKE_TYPES_LIST else SNAKE_NORMAL
 
     def _save_wallet(self):
-        data = {
-            "p1_coins": self.coins[0],
-            "p2_coins": self.coins[1],
-            "p1_ammo": self.ammo[0],
-            "p2_ammo": self.ammo[1],
-            "p1_power": self.power[0],
-            "p2_power": self.power[1],
-            "p1_gun": self.gun_type[0],
-            "p2_gun": self.gun_type[1],
-            "p1_snake_type": self.snake_type[0],
-            "p2_snake_type": self.snake_type[1],
+        """Pengepungen er ændret; den skrives bagud af wallet_saver (se WriteBehind)."""
+        if self.replay is not None:
+            return  # pengepungen under en afspilning er replay'ens, ikke spillerens
+        self.wallet_saver.mark()
+
+    def _wallet_data(self):
+        return {
+            name: {
+                "coins": self.coins[idx],
+                "ammo": self.ammo[idx],
+                "power": self.power[idx],
+                "gun": self.gun_type[idx],
+                "snake_type": self.snake_type[idx],
+            }
+            for idx, name in enumerate(self.profiles)
         }
-        save_savedata(data)
+
+    @property
+    def _highscore_key(self):
+        return bucket_key(self.difficulty, self.num_players)
 
     @property
     def _two_player(self):
@@ -2304,213 +2117,107 @@ class Game:
             self.sfx[self.current_music].stop()
         self.current_music = None
 
-    def _occupied(self):
-        positions = set(self.snake1.body)
-        if self._two_player:
-            positions.update(self.snake2.body)
-        positions.update(self.ruins)
-        for f in self.foods:
-            positions.add(f.pos)
-        for c in self.coin_items:
-            positions.add(c.pos)
-        for b in self.money_bills:
-            positions.add(b.pos)
-        return positions
-
-    def _spawn_food(self, food_type):
-        occupied = self._occupied()
-        free = [
-            (x, y) for x in range(GRID_W) for y in range(GRID_H)
-            if (x, y) not in occupied
-        ]
-        if free:
-            pos = random.choice(free)
-            self.foods.append(FoodItem(food_type, pos))
-
-    def _spawn_coin(self):
-        occupied = self._occupied()
-        free = [
-            (x, y) for x in range(GRID_W) for y in range(GRID_H)
-            if (x, y) not in occupied
-        ]
-        if free:
-            pos = random.choice(free)
-            self.coin_items.append(Coin(pos))
-
-    def _spawn_money_bill(self):
-        """Spawn en pengeseddel (10 coins) - sjældnere end normale coins."""
-        occupied = self._occupied()
-        free = [
-            (x, y) for x in range(GRID_W) for y in range(GRID_H)
-            if (x, y) not in occupied
-        ]
-        if free:
-            pos = random.choice(free)
-            self.money_bills.append(MoneyBill(pos))
-
     def _shoot(self, player_idx):
-        """Spiller skyder. Kræver kanon + ammo."""
-        gt = self.gun_type[player_idx]
-        if gt is GUN_NONE:
-            return
-        if gt == GUN_VACUUM:
-            return  # støvsuger håndteres separat
-        if self.ammo[player_idx] <= 0:
-            return
-        snake = self.snake1 if player_idx == 0 else self.snake2
-        if not snake.alive:
+        """Skydeknappen trykket: skuddet affyres ved næste game-tick."""
+        self.pending_input[player_idx].shots += 1
+
+    def _bought(self, player_idx, item, price):
+        """Et køb i butikken: gem pengepungen med det samme, så den passer med købshistorikken."""
+        if self.replay is not None:
             return
-        self.ammo[player_idx] -= 1
-        hx, hy = snake.head()
-        dx, dy = snake.direction
-        if gt == GUN_QUAD:
-            # 4 skud i alle retninger
-            for d in (UP, DOWN, LEFT, RIGHT):
-                self.bullets.append(Bullet((hx + d[0], hy + d[1]), d, player_idx, gt))
-        else:
-            # 1 skud fremad (basic + auto)
-            self.bullets.append(Bullet((hx + dx, hy + dy), snake.direction, player_idx, gt))
-        sfx_key = f"shoot_{gt}"
-        self.sfx.get(sfx_key, self.sfx["shoot_basic"]).play()
+        self.wallet_store.record_purchase(self.profiles[player_idx], item, price)
+        self._save_wallet()
+        self.wallet_saver.flush()
 
     def _buy_ammo(self, player_idx):
         """Køb ammo: AMMO_PRICE coins for AMMO_AMOUNT skud."""
-        if self.coins[player_idx] >= AMMO_PRICE:
-            self.coins[player_idx] -= AMMO_PRICE
-            self.ammo[player_idx] += AMMO_AMOUNT
-            self._save_wallet()
+        if self.sim.buy_ammo(player_idx):
+            self._bought(player_idx, "ammo", AMMO_PRICE)
 
     def _buy_gun(self, player_idx, gun_id):
         """Køb en kanon-type."""
-        info = GUN_INFO.get(gun_id)
-        if not info:
-            return
-        price = info[2]
-        if self.gun_type[player_idx] == gun_id:
-            return  # Har allerede denne type
-        if self.coins[player_idx] >= price:
-            self.coins[player_idx] -= price
-            self.gun_type[player_idx] = gun_id
-            self._save_wallet()
+        if self.sim.buy_gun(player_idx, gun_id):
+            self._bought(player_idx, f"gun:{gun_id}", GUN_PRICES[gun_id])
 
     def _buy_power(self, player_idx):
         """Køb strøm: POWER_PRICE coins for POWER_AMOUNT strøm."""
-        if self.coins[player_idx] >= POWER_PRICE:
-            self.coins[player_idx] -= POWER_PRICE
-            self.power[player_idx] += POWER_AMOUNT
+        if self.sim.buy_power(player_idx):
+            self._bought(player_idx, "power", POWER_PRICE)
+
+    def _on_sim_event(self, event, *args):
+        """Lyd, gemning og gentegning for det der sker i simulationen."""
+        if event == "eat":
+            _, food = args
+            if food.food_type == FOOD_MEGA:
+                self.sfx["mega_spawn"].play()  # episk lyd når man spiser den også
+            else:
+                self.sfx["eat_apple"].play()
+        elif event == "spawn":
+            if args[0].kind == ITEM_FOOD and args[0].food_type == FOOD_MEGA:
+                self.sfx["mega_spawn"].play()
+        elif event == "pickup":
+            self.sfx["coin_pling"].play()  # samme lyd til coins og pengesedler
             self._save_wallet()
-
-    def _vacuum_suck(self, player_idx):
-        """Støvsuger: ryk al mad og coins 1 felt tættere på slangens hoved."""
-        snake = self.snake1 if player_idx == 0 else self.snake2
-        if not snake.alive:
-            return
-        hx, hy = snake.head()
-        occupied = set()
-        if self.snake1.alive:
-            occupied.update(self.snake1.body)
-        if self._two_player and self.snake2.alive:
-            occupied.update(self.snake2.body)
-        occupied.update(self.ruins)
-        # Ryk mad tættere
-        for food in self.foods:
-            fx, fy = food.pos
-            dist = abs(fx - hx) + abs(fy - hy)
-            if dist <= VACUUM_RANGE and dist > 0:
-                # Flyt 1 celle mod hovedet
-                dx = (1 if hx > fx else -1) if hx != fx else 0
-                dy = (1 if hy > fy else -1) if hy != fy else 0
-                nx, ny = fx + dx, fy + dy
-                # Tjek bounds og ikke blokeret
-                if 0 <= nx < GRID_W and 0 <= ny < GRID_H and (nx, ny) not in occupied and (nx, ny) not in self.ruins:
-                    food.pos = (nx, ny)
-        # Ryk coins tættere
-        for coin in self.coin_items:
-            cx_c, cy_c = coin.pos
-            dist = abs(cx_c - hx) + abs(cy_c - hy)
-            if dist <= VACUUM_RANGE and dist > 0:
-                dx = (1 if hx > cx_c else -1) if hx != cx_c else 0
-                dy = (1 if hy > cy_c else -1) if hy != cy_c else 0
-                nx, ny = cx_c + dx, cy_c + dy
-                if 0 <= nx < GRID_W and 0 <= ny < GRID_H and (nx, ny) not in occupied and (nx, ny) not in self.ruins:
-                    coin.pos = (nx, ny)
-        # Ryk pengesedler tættere
-        for bill in self.money_bills:
-            bx, by = bill.pos
-            dist = abs(bx - hx) + abs(by - hy)
-            if dist <= VACUUM_RANGE and dist > 0:
-                dx = (1 if hx > bx else -1) if hx != bx else 0
-                dy = (1 if hy > by else -1) if hy != by else 0
-                nx, ny = bx + dx, by + dy
-                if 0 <= nx < GRID_W and 0 <= ny < GRID_H and (nx, ny) not in occupied and (nx, ny) not in self.ruins:
-                    bill.pos = (nx, ny)
-
-    def _generate_safe_zones(self):
-        """Positioner der skal holdes fri for ruiner (spawn-områder)."""
-        safe = set()
-        # Spiller 1 spawn-zone (øverst venstre)
-        for x in range(0, 8):
-            for y in range(0, 8):
-                safe.add((x, y))
-        # Spiller 2 spawn-zone (nederst højre)
-        for x in range(GRID_W - 8, GRID_W):
-            for y in range(GRID_H - 8, GRID_H):
-                safe.add((x, y))
-        # Center (for 1-spiller spawn)
-        cx, cy = GRID_W // 2, GRID_H // 2
-        for x in range(cx - 4, cx + 5):
-            for y in range(cy - 4, cy + 5):
-                safe.add((x, y))
-        return safe
+        elif event == "shoot":
+            _, gt = args
+            self.sfx.get(f"shoot_{gt}", self.sfx["shoot_basic"]).play()
+        elif event == "vacuum":
+            self.sfx.get("shoot_vacuum", self.sfx["shoot_basic"]).play()
+            self._save_wallet()
+        elif event == "dog_spawned":
+            self.sfx.get("enemy_bark", self.sfx["death"]).play()
+        elif event == "ruin_destroyed":
+            # Gentegn kun ruinens eget område i baggrundslaget
+            pos = args[0]
+            if self.map_layer is not None:
+                repaint_ruin_area(self.map_layer, self.floor_layer, self.ruins, pos, self.difficulty)
+                self.dirty_extra.append(_ruin_extent(pos))
+            if self.viewports:
+                self.chunk_surfaces.discard((pos[0] // CHUNK_SIZE, pos[1] // CHUNK_SIZE))
+        elif event == "round_over":
+            self._end_round()
 
     def new_round(self):
-        self.scores = [0, 0]
         # Anvend slange-type farver
-        c1 = SNAKE_TYPE_COLORS[self.snake_type[0]][0]
-        self.snake1.color, self.snake1.color_dark, self.snake1.color_belly = c1
-        c2 = SNAKE_TYPE_COLORS[self.snake_type[1]][1]
-        self.snake2.color, self.snake2.color_dark, self.snake2.color_belly = c2
-        if self._two_player:
-            self.snake1.reset((3, 3), RIGHT)
-            self.snake2.reset((GRID_W - 4, GRID_H - 4), LEFT)
+        self.snake_colors = [SNAKE_TYPE_COLORS[self.snake_type[0]][0], SNAKE_TYPE_COLORS[self.snake_type[1]][1]]
+        self.pending_input = [PlayerInput(), PlayerInput()]
+        if self.replay is not None:
+            self.replay.start(self.sim)
+            self.playback = self.replay.inputs()
+            self.replay_worst = (0.0, 0)
+        else:
+            self.sim.new_round()
+            self.sim.recorder = ReplayRecorder(self.sim)
+        # Gulvet tegnes kun én gang per tema og genbruges som baggrund
+        if self.difficulty not in self.floor_layers:
+            self.floor_layers[self.difficulty] = render_map_floor(self.difficulty)
+        self.floor_layer = self.floor_layers[self.difficulty]
+        if self.sim.large_map:
+            # Stor bane: kun chunks i kameraets udsnit tegnes (og gemmes til de ikke ses mere)
+            self.map_layer = None
+            self.floor_tile = self.floor_layer.subsurface((0, SCOREBOARD_H, WINDOW_W, WINDOW_H - SCOREBOARD_H))
+            self.chunk_surfaces.clear()
+            board_h = WINDOW_H - SCOREBOARD_H
+            if self._two_player:
+                half = WINDOW_W // 2
+                rects = [pygame.Rect(0, SCOREBOARD_H, half - 2, board_h),
+                         pygame.Rect(half + 2, SCOREBOARD_H, WINDOW_W - half - 2, board_h)]
+            else:
+                rects = [pygame.Rect(0, SCOREBOARD_H, WINDOW_W, board_h)]
+            self.viewports = [Viewport(rect, self.sim.width, self.sim.height) for rect in rects]
         else:
-            self.snake1.reset((GRID_W // 2, GRID_H // 2), RIGHT)
-            self.snake2.body = []
-            self.snake2.alive = False
-        # Generer ruiner og træer
-        safe = self._generate_safe_zones()
-        ruin_count = RUIN_COUNTS[self.difficulty]
-        self.ruins = generate_ruins(ruin_count, safe)
-        # Træer (dekorative - undgå ruiner og safe zones)
-        tree_occupied = set(self.ruins) | safe
-        tree_count = TREE_COUNTS[self.difficulty]
-        self.trees = generate_trees(tree_count, tree_occupied)
-        self.foods = []
-        self.coin_items = []
-        self.money_bills = []
-        self.bullets = []
-        self.enemies = []
-        self.enemy_spawn_cd = 0
-        self._spawn_food(FOOD_NORMAL)
-        diff = DIFFICULTIES[self.difficulty]
-        self.fps = diff[1]
+            self.viewports = []
+            self.map_layer = render_map_layer(self.floor_layer, self.ruins, self.difficulty)
+        self.prev_frame = None
         self.state = "PLAYING"
-        self.game_tick = 0
-        self.special_food_cooldown = 0
-        self.coin_spawn_cooldown = 0
-        self.mega_food_timer = 0.0       # sekund-tæller for mega-food
-        self.mega_food_spawned = 0       # antal mega-food spawnet denne runde
         self._play_music("game_music")
 
     def _start_name_input(self):
         self.pending_highscores = []
-        if self._two_player:
-            for idx in range(2):
-                if is_highscore(self.highscore_data, self.difficulty, self.num_players, self.scores[idx]):
-                    self.pending_highscores.append((idx, self.scores[idx]))
-        else:
-            if is_highscore(self.highscore_data, self.difficulty, self.num_players, self.scores[0]):
-                self.pending_highscores.append((0, self.scores[0]))
+        key = self._highscore_key
+        for idx in range(self.num_players):
+            if self.highscores.qualifies(key, self.scores[idx]):
+                self.pending_highscores.append((idx, self.scores[idx]))
         if self.pending_highscores:
             self._next_name_input()
         else:
@@ -2527,18 +2234,24 @@ class Game:
     def _submit_name(self):
         name = self.name_input.strip() or "???"
         _, score = self.pending_highscores.pop(0)
-        add_highscore(self.highscore_data, self.difficulty, self.num_players, name, score)
+        self.highscores.add(self._highscore_key, name, score)
         self._next_name_input()
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
+            if event.type == pygame.VIDEOEXPOSE:
+                self.prev_frame = None
             if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    self.show_debug = not self.show_debug
+                    continue
                 if event.key == pygame.K_ESCAPE:
                     if self.state in ("PLAYING", "ROUND_OVER", "ENTER_NAME"):
                         self.state = "MENU"
                         self._play_music("menu_music")
+                        self.wallet_saver.flush()
                         continue
                     else:
                         return False
@@ -2547,6 +2260,11 @@ class Game:
                     max_row = 8
                     if event.key == pygame.K_SPACE:
                         self.new_round()
+                    elif event.key == pygame.K_b:
+                        # Næste banestørrelse (stor bane = kamera der følger slangen)
+                        size = (self.sim.width, self.sim.height)
+                        idx = MAP_SIZES.index(size) if size in MAP_SIZES else -1
+                        self.sim.width, self.sim.height = MAP_SIZES[(idx + 1) % len(MAP_SIZES)]
                     elif event.key in (pygame.K_w, pygame.K_UP):
                         self.menu_row = max(0, self.menu_row - 1)
                     elif event.key in (pygame.K_s, pygame.K_DOWN):
@@ -2598,25 +2316,26 @@ class Game:
                             self._buy_gun(p2, GUN_VACUUM)
 
                 elif self.state == "PLAYING":
+                    p2 = 1 if self._two_player else 0
                     if event.key == pygame.K_w:
-                        self.snake1.set_direction(UP)
+                        self.pending_input[0].turns.append(UP)
                     elif event.key == pygame.K_s:
-                        self.snake1.set_direction(DOWN)
+                        self.pending_input[0].turns.append(DOWN)
                     elif event.key == pygame.K_a:
-                        self.snake1.set_direction(LEFT)
+                        self.pending_input[0].turns.append(LEFT)
                     elif event.key == pygame.K_d:
-                        self.snake1.set_direction(RIGHT)
+                        self.pending_input[0].turns.append(RIGHT)
                     elif event.key == pygame.K_e:
                         if self.gun_type[0] != GUN_AUTO:
                             self._shoot(0)
                     elif event.key == pygame.K_UP:
-                        (self.snake2 if self._two_player else self.snake1).set_direction(UP)
+                        self.pending_input[p2].turns.append(UP)
                     elif event.key == pygame.K_DOWN:
-                        (self.snake2 if self._two_player else self.snake1).set_direction(DOWN)
+                        self.pending_input[p2].turns.append(DOWN)
                     elif event.key == pygame.K_LEFT:
-                        (self.snake2 if self._two_player else self.snake1).set_direction(LEFT)
+                        self.pending_input[p2].turns.append(LEFT)
                     elif event.key == pygame.K_RIGHT:
-                        (self.snake2 if self._two_player else self.snake1).set_direction(RIGHT)
+                        self.pending_input[p2].turns.append(RIGHT)
                     elif event.key == pygame.K_RSHIFT:
                         if self._two_player:
                             if self.gun_type[1] != GUN_AUTO:
@@ -2645,302 +2364,39 @@ class Game:
     def update(self):
         if self.state != "PLAYING":
             return
-
-        self.game_tick += 1
-
-        self.snake1.move()
-        if self._two_player:
-            self.snake2.move()
-
-        self.snake1.check_wall_collision()
-        if self._two_player:
-            self.snake2.check_wall_collision()
-
-        self.snake1.check_self_collision()
-        if self._two_player:
-            self.snake2.check_self_collision()
-
-        # Ruin-kollision
-        self.snake1.check_ruin_collision(self.ruins)
-        if self._two_player:
-            self.snake2.check_ruin_collision(self.ruins)
-
-        if self._two_player and self.snake1.alive and self.snake2.alive:
-            s1_hit_s2 = self.snake1.head() in self.snake2.body
-            s2_hit_s1 = self.snake2.head() in self.snake1.body
-            head_on = self.snake1.head() == self.snake2.head()
-
-            if head_on:
-                if not self.snake1.is_invincible:
-                    self.snake1.alive = False
-                if not self.snake2.is_invincible:
-                    self.snake2.alive = False
-            else:
-                if s1_hit_s2 and not self.snake1.is_invincible:
-                    self.snake1.alive = False
-                    if not self.snake2.is_invincible:
-                        self.snake2.alive = False
-                if s2_hit_s1 and not self.snake2.is_invincible:
-                    self.snake2.alive = False
-                    if not self.snake1.is_invincible:
-                        self.snake1.alive = False
-
-        eaten = []
-        for food in self.foods:
-            if self.snake1.alive and self.snake1.head() == food.pos:
-                self.scores[0] += food.points
-                self.snake1.grow()
-                if food.food_type == FOOD_INVINCIBLE:
-                    self.snake1.invincible_timer = 50
-                eaten.append(food)
-            elif self._two_player and self.snake2.alive and self.snake2.head() == food.pos:
-                self.scores[1] += food.points
-                self.snake2.grow()
-                if food.food_type == FOOD_INVINCIBLE:
-                    self.snake2.invincible_timer = 50
-                eaten.append(food)
-
-        for food in eaten:
-            if food.food_type == FOOD_NORMAL:
-                self.sfx["eat_apple"].play()
-            elif food.food_type == FOOD_MEGA:
-                self.sfx["mega_spawn"].play()  # episk lyd når man spiser den også
-            else:
-                self.sfx["eat_apple"].play()
-
-        for food in self.foods:
-            food.tick()
-        self.foods = [
-            f for f in self.foods
-            if f not in eaten and not f.expired
-        ]
-
-        has_normal = any(f.food_type == FOOD_NORMAL for f in self.foods)
-        if not has_normal:
-            self._spawn_food(FOOD_NORMAL)
-
-        self.special_food_cooldown -= 1
-        if self.special_food_cooldown <= 0:
-            roll = random.random()
-            if roll < 0.03:
-                self._spawn_food(FOOD_BONUS)
-                self.special_food_cooldown = 30
-            elif roll < 0.04:
-                self._spawn_food(FOOD_INVINCIBLE)
-                self.special_food_cooldown = 60
-
-        # --- Mega-food (100 point, 20 per 10 minutter) ---
-        if self.mega_food_spawned < 20:
-            self.mega_food_timer += 1.0 / self.fps
-            if self.mega_food_timer >= MEGA_FOOD_INTERVAL:
-                self.mega_food_timer = 0.0
-                self.mega_food_spawned += 1
-                self._spawn_food(FOOD_MEGA)
-                self.sfx["mega_spawn"].play()
-
-        # --- Coins ---
-        self.coin_spawn_cooldown -= 1
-        if self.coin_spawn_cooldown <= 0:
-            if random.random() < 0.15:
-                self._spawn_coin()
-                self.coin_spawn_cooldown = 8
-            else:
-                self.coin_spawn_cooldown = 3
-
-        # --- Money Bills (pengesedler) - sjældnere end coins ---
-        if random.random() < 0.003:  # ~0.3% chance per tick
-            self._spawn_money_bill()
-
-        # Coin opsamling
-        coin_eaten = []
-        for coin in self.coin_items:
-            if self.snake1.alive and self.snake1.head() == coin.pos:
-                self.coins[0] += 1
-                coin_eaten.append(coin)
-            elif self._two_player and self.snake2.alive and self.snake2.head() == coin.pos:
-                self.coins[1] += 1
-                coin_eaten.append(coin)
-        if coin_eaten:
-            self.sfx["coin_pling"].play()
-            self._save_wallet()
-        for coin in self.coin_items:
-            coin.tick()
-        self.coin_items = [c for c in self.coin_items if c not in coin_eaten and not c.expired]
-
-        # Money Bill opsamling (10 coins!)
-        bills_eaten = []
-        for bill in self.money_bills:
-            if self.snake1.alive and self.snake1.head() == bill.pos:
-                self.coins[0] += MONEY_BILL_VALUE
-                bills_eaten.append(bill)
-            elif self._two_player and self.snake2.alive and self.snake2.head() == bill.pos:
-                self.coins[1] += MONEY_BILL_VALUE
-                bills_eaten.append(bill)
-        if bills_eaten:
-            self.sfx["coin_pling"].play()  # Brug samme lyd (eller lav ny senere)
-            self._save_wallet()
-        for bill in self.money_bills:
-            bill.tick()
-        self.money_bills = [b for b in self.money_bills if b not in bills_eaten and not b.expired]
-
-        # --- Auto-kanon (hold-to-fire) ---
+        if self.playback is not None:
+            inputs = next(self.playback, None)
+            if inputs is None:
+                self.state = "ROUND_OVER"  # replay'en sluttede før runden (bør ikke ske)
+                return
+            start = time.perf_counter()
+            self.sim.step(inputs)
+            ms = (time.perf_counter() - start) * 1000
+            if ms > self.replay_worst[0]:
+                self.replay_worst = (ms, self.game_tick)
+            return
+        inputs = self.pending_input
+        self.pending_input = [PlayerInput(), PlayerInput()]
+        # Skydeknapper der holdes nede (auto-kanon og støvsuger)
         keys = pygame.key.get_pressed()
-        for pidx in range(2 if self._two_player else 1):
-            if self.gun_type[pidx] == GUN_AUTO:
-                held = False
-                if pidx == 0 and keys[pygame.K_e]:
-                    held = True
-                elif pidx == 1 and keys[pygame.K_RSHIFT]:
-                    held = True
-                elif not self._two_player and (keys[pygame.K_e] or keys[pygame.K_RSHIFT]):
-                    held = True
-                if held:
-                    self.auto_shoot_cd[pidx] -= 1
-                    if self.auto_shoot_cd[pidx] <= 0:
-                        self._shoot(pidx)
-                        self.auto_shoot_cd[pidx] = AUTO_SHOOT_INTERVAL
-                else:
-                    self.auto_shoot_cd[pidx] = 0  # klar til at skyde med det samme
-
-        # --- Støvsuger (hold-to-suck) ---
-        for pidx in range(2 if self._two_player else 1):
-            if self.gun_type[pidx] == GUN_VACUUM:
-                held = False
-                if pidx == 0 and keys[pygame.K_e]:
-                    held = True
-                elif pidx == 1 and keys[pygame.K_RSHIFT]:
-                    held = True
-                elif not self._two_player and (keys[pygame.K_e] or keys[pygame.K_RSHIFT]):
-                    held = True
-                if held and self.power[pidx] > 0:
-                    self.vacuum_active[pidx] = True
-                    self.vacuum_cd[pidx] -= 1
-                    if self.vacuum_cd[pidx] <= 0:
-                        self.power[pidx] -= 1
-                        self._vacuum_suck(pidx)
-                        self.sfx.get("shoot_vacuum", self.sfx["shoot_basic"]).play()
-                        self.vacuum_cd[pidx] = VACUUM_INTERVAL
-                        self._save_wallet()
-                else:
-                    self.vacuum_active[pidx] = False
-                    self.vacuum_cd[pidx] = 0
-            else:
-                self.vacuum_active[pidx] = False
-
-        # --- Bullets ---
-        for bullet in self.bullets:
-            for _ in range(BULLET_SPEED):
-                bullet.move()
-                if bullet.is_out_of_bounds():
-                    bullet.alive = False
-                    break
-                bp = bullet.pos()
-                # Ruin-kollision: ødelæg ruin-blokken
-                if bp in self.ruins:
-                    self.ruins.discard(bp)
-                    bullet.alive = False
-                    break
-                # Slange-kollision (rammer modstanderen)
-                if bullet.owner_idx != 0 and self.snake1.alive and bp in self.snake1.body:
-                    if not self.snake1.is_invincible:
-                        self.snake1.alive = False
-                    bullet.alive = False
-                    break
-                if bullet.owner_idx != 1 and self._two_player and self.snake2.alive and bp in self.snake2.body:
-                    if not self.snake2.is_invincible:
-                        self.snake2.alive = False
-                    bullet.alive = False
-                    break
-        self.bullets = [b for b in self.bullets if b.alive]
-
-        # --- Fjendtlige hunde (Svær + Vanvid) ---
-        if self.difficulty >= 2:
-            # Spawn nye hunde med jævne mellemrum
-            self.enemy_spawn_cd -= 1
-            if self.enemy_spawn_cd <= 0:
-                # Svær: hvert ~60 ticks, Vanvid: hvert ~35 ticks
-                interval = 60 if self.difficulty == 2 else 35
-                self.enemy_spawn_cd = interval
-                # Max antal hunde: Svær=3, Vanvid=6
-                max_enemies = 3 if self.difficulty == 2 else 6
-                if len(self.enemies) < max_enemies:
-                    occupied = self._occupied()
-                    for edog in self.enemies:
-                        occupied.add(edog.pos())
-                    # Spawn ved kant
-                    edge_cells = (
-                        [(0, y) for y in range(GRID_H)] +
-                        [(GRID_W - 1, y) for y in range(GRID_H)] +
-                        [(x, 0) for x in range(GRID_W)] +
-                        [(x, GRID_H - 1) for x in range(GRID_W)]
-                    )
-                    free_edges = [p for p in edge_cells if p not in occupied]
-                    if free_edges:
-                        pos = random.choice(free_edges)
-                        self.enemies.append(EnemyDog(pos))
-                        self.sfx.get("enemy_bark", self.sfx["death"]).play()
-
-            # Opdater hunde-AI (jag nærmeste slange)
-            enemy_occ = set()
-            for edog in self.enemies:
-                enemy_occ.add(edog.pos())
-            for edog in self.enemies:
-                if not edog.alive:
-                    continue
-                # Find nærmeste levende slange
-                targets = []
-                if self.snake1.alive:
-                    targets.append(self.snake1.head())
-                if self._two_player and self.snake2.alive:
-                    targets.append(self.snake2.head())
-                if targets:
-                    best = min(targets, key=lambda t: abs(t[0] - edog.x) + abs(t[1] - edog.y))
-                    other_dogs = enemy_occ - {edog.pos()}
-                    edog.update(best, self.ruins, other_dogs)
-
-            # Hund ramt af kugle = dø
-            for edog in self.enemies:
-                if not edog.alive:
-                    continue
-                for bullet in self.bullets:
-                    if bullet.alive and bullet.pos() == edog.pos():
-                        edog.alive = False
-                        bullet.alive = False
-                        break
-            self.bullets = [b for b in self.bullets if b.alive]
-
-            # Hund rammer slange = dræb slangen
-            for edog in self.enemies:
-                if not edog.alive:
-                    continue
-                ep = edog.pos()
-                if self.snake1.alive and ep == self.snake1.head():
-                    if not self.snake1.is_invincible:
-                        self.snake1.alive = False
-                    edog.alive = False
-                if self._two_player and self.snake2.alive and ep == self.snake2.head():
-                    if not self.snake2.is_invincible:
-                        self.snake2.alive = False
-                    edog.alive = False
-
-            self.enemies = [e for e in self.enemies if e.alive]
-
-        self._update_speed()
-
-        if not self.snake1.alive:
-            self._end_round()
-        elif self._two_player and not self.snake2.alive:
-            self._end_round()
-
-    def _update_speed(self):
-        diff = DIFFICULTIES[self.difficulty]
-        _, start_fps, max_fps, increase_every = diff
-        total = self.scores[0] + self.scores[1]
-        self.fps = min(start_fps + total // increase_every, max_fps)
+        if self._two_player:
+            inputs[0].hold = keys[pygame.K_e]
+            inputs[1].hold = keys[pygame.K_RSHIFT]
+        else:
+            inputs[0].hold = keys[pygame.K_e] or keys[pygame.K_RSHIFT]
+        self.sim.step(inputs)
 
     def _end_round(self):
         self.sfx["death"].play()
+        if self.replay is not None:
+            ms, tick = self.replay_worst
+            self.round_message = f"Replay slut - {self.game_tick} ticks"
+            print(f"Replay: {self.game_tick} ticks, langsomste tick {tick}: {ms:.2f} ms")
+            self.state = "ROUND_OVER"
+            return
+        self.sim.recorder.save(REPLAY_FILE, self.game_tick)
         self._save_wallet()
+        self.wallet_saver.flush()
         if not self._two_player:
             self.round_message = f"Game Over!  Score: {self.scores[0]}"
         else:
@@ -2956,11 +2412,12 @@ class Game:
 
     def draw(self):
         self.screen.fill(BLACK)
+        frame = None
 
         if self.state == "MENU":
             self._draw_menu()
         elif self.state == "PLAYING":
-            self._draw_game()
+            frame = self._draw_game()
         elif self.state in ("ROUND_OVER", "ENTER_NAME"):
             self._draw_game()
             if self.state == "ENTER_NAME":
@@ -2968,7 +2425,57 @@ class Game:
             else:
                 self._draw_round_over()
 
-        pygame.display.flip()
+        if self.show_debug:
+            debug_entry = self._draw_debug()
+            if frame is not None:
+                frame.append(debug_entry)
+        self._present(frame)
+
+    def _present(self, frame):
+        """Send den tegnede frame til skærmen.
+
+        frame er en liste af (x, y, w, h, signatur) for alt der kan ændre sig mellem
+        to frames; ens poster tælles (to kugler i samme celle tegner mere skygge end én). Kun rektangler hvis signatur er ny eller forsvundet (plus
+        dirty_extra) uploades; None giver en fuld flip (menuer og overlays)."""
+        frame = Counter(frame) if frame is not None else None
+        prev, self.prev_frame = self.prev_frame, frame
+        if frame is None or prev is None or not self.dirty_rects:
+            self.dirty_extra.clear()
+            self.dirty_count = 0
+            pygame.display.flip()
+            return
+        rects = {entry[:4] for entry in (prev - frame) + (frame - prev)}
+        rects.update(tuple(r) for r in self.dirty_extra)
+        self.dirty_extra.clear()
+        self.dirty_count = len(rects)
+        if rects:
+            pygame.display.update([pygame.Rect(r) for r in rects])
+
+    def _draw_debug(self):
+        """Debug-overlay med allokeringer og hits i surface-cachene.
+
+        Returnerer overlayets (x, y, w, h, signatur) til dirty-rect sporingen."""
+        lines = [
+            f"fps {self.clock.get_fps():.0f}  dirty {self.dirty_count if self.prev_frame else 'flip'}",
+            f"stempler {STAMP_CACHE.stats()}",
+            f"atlas {SNAKE_ATLAS.sprites.stats()}",
+        ]
+        if self.viewports:
+            lines.append(f"chunks {self.chunk_surfaces.stats()}")
+        if self.sim.shortfall:
+            lines.append("ikke plads: " + ", ".join(
+                f"{kind} {placed}/{wanted}" for kind, (placed, wanted) in self.sim.shortfall.items()))
+        y0 = y = WINDOW_H - 6 - len(lines) * 18
+        width = 0
+        for line in lines:
+            txt = self.font_small.render(line, True, YELLOW)
+            bg = pygame.Surface((txt.get_width() + 8, 18), pygame.SRCALPHA)
+            bg.fill((0, 0, 0, 160))
+            self.screen.blit(bg, (6, y))
+            self.screen.blit(txt, (10, y + 1))
+            width = max(width, bg.get_width())
+            y += 18
+        return (6, y0, width, y - y0, ("debug", tuple(lines)))
 
     def _draw_menu_selector(self, cx, y, label, value_text, value_color, is_selected, can_left, can_right):
         sel_color = WHITE if is_selected else LIGHT_GRAY
@@ -3282,7 +2789,9 @@ class Game:
 
         # --- Hint ---
         hint_y = preview_y + 68
-        hint = self.font_small.render("W/S = skift række  |  A/D = skift værdi / køb", True, LIGHT_GRAY)
+        hint = self.font_small.render(
+            f"W/S = skift række  |  A/D = skift værdi / køb  |  B = bane {self.sim.width}x{self.sim.height}",
+            True, LIGHT_GRAY)
         self.screen.blit(hint, hint.get_rect(center=(cx, hint_y)))
 
         # === BUTIK section ===
@@ -3379,13 +2888,13 @@ class Game:
             sub1 = self.font_small.render("P1: WASD + E=skyd  |  P2: Pile + RShift=skyd", True, LIGHT_GRAY)
             self.screen.blit(sub1, sub1.get_rect(center=(cx, ctrl_y)))
 
-        hs_list = get_highscore_list(self.highscore_data, self.difficulty, self.num_players)
+        hs_list = self.highscores.top(self._highscore_key, 3)
         if hs_list:
             hs_y = ctrl_y + 18
             hs_title = self.font_small.render("-- Highscores --", True, GOLD)
             self.screen.blit(hs_title, hs_title.get_rect(center=(cx, hs_y)))
             hs_y += 16
-            for i, entry in enumerate(hs_list[:3]):
+            for i, entry in enumerate(hs_list):
                 color = GOLD if i == 0 else WHITE
                 txt = self.font_small.render(
                     f"{i + 1}. {entry['name']:<{MAX_NAME_LEN}} {entry['score']:>4}", True, color
@@ -3401,14 +2910,20 @@ class Game:
         self.screen.blit(start, start.get_rect(center=(cx, bottom_y)))
         self.screen.blit(esc, esc.get_rect(center=(cx, bottom_y + 20)))
 
+    def _cell_entry(self, pixel, signature):
+        """Dirty-rect post (x, y, w, h, signatur) for en figur tegnet i cellen med pixel-hjørnet pixel."""
+        x, y = pixel
+        size = CELL_SIZE + DIRTY_PAD * 2
+        return (x - DIRTY_PAD, y - DIRTY_PAD, size, size, signature)
+
     def _draw_game(self):
+        """Tegn spillet og returnér frame-listen til dirty-rect opdateringen (se _present)."""
         diff = self.difficulty
+        alpha = self.alpha
         theme = MAP_THEMES.get(diff, MAP_THEMES[0])
-        # Map-gulv (tema-baseret)
-        draw_map_floor(self.screen, diff)
-
-        # Ruiner (3D blokke, tema-farver)
-        draw_ruins(self.screen, self.ruins, diff)
+        # Map-gulv + ruiner (tema-baseret, forudtegnet i new_round; store baner tegnes i _draw_view)
+        if self.map_layer is not None:
+            self.screen.blit(self.map_layer, (0, 0))
 
         # 3D Scoreboard panel (tema-farve)
         draw_3d_panel(self.screen, (0, 0, WINDOW_W, SCOREBOARD_H), theme["scoreboard"], depth=4)
@@ -3426,44 +2941,109 @@ class Game:
         if self._two_player:
             s2_inv = " [INVINCIBLE]" if self.snake2.is_invincible else ""
             s2_color = CYAN if self.snake2.is_invincible else BLUE
-            s1_text = self.font_med.render(f"P1: {self.scores[0]}{s1_inv}", True, s1_color)
-            s1_sub = self.font_small.render(f"${self.coins[0]}{_hud_gun(0)}", True, COIN_COLOR)
-            s2_text = self.font_med.render(f"P2: {self.scores[1]}{s2_inv}", True, s2_color)
-            s2_sub = self.font_small.render(f"${self.coins[1]}{_hud_gun(1)}", True, COIN_COLOR)
+            hud = (f"P1: {self.scores[0]}{s1_inv}", f"${self.coins[0]}{_hud_gun(0)}",
+                   f"P2: {self.scores[1]}{s2_inv}", f"${self.coins[1]}{_hud_gun(1)}")
+            s1_text = self.font_med.render(hud[0], True, s1_color)
+            s1_sub = self.font_small.render(hud[1], True, COIN_COLOR)
+            s2_text = self.font_med.render(hud[2], True, s2_color)
+            s2_sub = self.font_small.render(hud[3], True, COIN_COLOR)
             self.screen.blit(s1_text, (20, 4))
             self.screen.blit(s1_sub, (20, 28))
             self.screen.blit(s2_text, (WINDOW_W - s2_text.get_width() - 20, 4))
             self.screen.blit(s2_sub, (WINDOW_W - s2_sub.get_width() - 20, 28))
         else:
-            hs_list = get_highscore_list(self.highscore_data, self.difficulty, self.num_players)
-            best = hs_list[0]["score"] if hs_list else 0
-            s1_text = self.font_med.render(f"Score: {self.scores[0]}{s1_inv}", True, s1_color)
-            s1_sub = self.font_small.render(f"${self.coins[0]}{_hud_gun(0)}", True, COIN_COLOR)
-            hs_text = self.font_med.render(f"Bedste: {best}", True, GOLD)
+            best = self.highscores.best(self._highscore_key)
+            hud = (f"Score: {self.scores[0]}{s1_inv}", f"${self.coins[0]}{_hud_gun(0)}", f"Bedste: {best}")
+            s1_text = self.font_med.render(hud[0], True, s1_color)
+            s1_sub = self.font_small.render(hud[1], True, COIN_COLOR)
+            hs_text = self.font_med.render(hud[2], True, GOLD)
             self.screen.blit(s1_text, (20, 4))
             self.screen.blit(s1_sub, (20, 28))
             self.screen.blit(hs_text, (WINDOW_W - hs_text.get_width() - 20, 12))
 
+        # Scoreboardet (inkl. panelets skygge) ændrer sig kun når teksten gør
+        frame = [(0, 0, WINDOW_W, SCOREBOARD_H + 5, ("hud",) + hud)]
+
+        # Animationer tegnes mellem to game-ticks i kvarte skridt (alpha=1 er nuværende tick)
+        substep = round(alpha * ANIM_SUBSTEPS)
+        tick = self.game_tick if substep == ANIM_SUBSTEPS else self.game_tick - 1 + substep / ANIM_SUBSTEPS
+
+        if self.viewports:
+            # Stor bane: hvert kamera følger sin slange; hele skærmen opdateres (frame None)
+            for snake, view in zip((self.snake1, self.snake2), self.viewports):
+                body = snake.body
+                prev = body[1] if snake.moved and len(body) > 1 else body[0]
+                px, py = _lerp_cell_px(prev, body[0], alpha, (0, SCOREBOARD_H))
+                view.follow(px + CELL_SIZE // 2, py + CELL_SIZE // 2)
+                self._draw_view(view, tick, alpha)
+            return None
+
         # Coins
-        for coin in self.coin_items:
-            coin.draw(self.screen, self.game_tick)
+        for coin in self.items.of(ITEM_COIN):
+            draw_coin(self.screen, coin, tick)
+            frame.append(self._cell_entry(_lerp_cell_px(coin.pos, coin.pos, 0), ("coin", tick)))
         # Money Bills (pengesedler)
-        for bill in self.money_bills:
-            bill.draw(self.screen, self.game_tick)
-        for food in self.foods:
-            food.draw(self.screen, self.game_tick)
-        # Bullets
+        for bill in self.items.of(ITEM_BILL):
+            draw_money_bill(self.screen, bill, tick)
+            frame.append(self._cell_entry(_lerp_cell_px(bill.pos, bill.pos, 0), ("bill", tick)))
+        for food in self.items.of(ITEM_FOOD):
+            draw_food(self.screen, food, tick)
+            # Almindelig mad er ikke animeret; de andre typer pulserer hvert tick
+            frame.append(self._cell_entry(_lerp_cell_px(food.pos, food.pos, 0),
+                                          ("food", food.food_type, None if food.food_type == FOOD_NORMAL else tick)))
+        # Bullets (interpoleret mellem forrige og nuværende celle)
         for bullet in self.bullets:
-            bullet.draw(self.screen)
+            draw_bullet(self.screen, bullet, alpha)
+            frame.append(self._cell_entry(_lerp_cell_px(bullet.prev_pos, bullet.pos(), alpha),
+                                          ("bullet", bullet.gun_type, bullet.direction)))
         # Fjendtlige hunde
         for edog in self.enemies:
-            edog.draw(self.screen, self.game_tick)
-        self.snake1.draw(self.screen, self.game_tick, self.gun_type[0], self.snake_type[0])
-        if self._two_player:
-            self.snake2.draw(self.screen, self.game_tick, self.gun_type[1], self.snake_type[1])
+            draw_enemy_dog(self.screen, edog, tick, alpha)
+            frame.append(self._cell_entry(_lerp_cell_px(edog.prev_pos, edog.pos(), alpha), ("dog", edog.direction, tick)))
+        for pidx, snake in enumerate((self.snake1, self.snake2)[:self.num_players]):
+            draw_snake(self.screen, snake, self.snake_colors[pidx], tick,
+                       self.gun_type[pidx], self.snake_type[pidx], frame, alpha)
 
         # 3D Dekorationer (træer/buske/klipper/strukturer - tegnes ovenpå)
         draw_decorations(self.screen, self.trees, self.difficulty)
+        return frame
+
+    def _draw_view(self, view, tick, alpha):
+        """Tegn et kameras udsnit af en stor bane; kun det der står i udsnittet tegnes."""
+        screen = self.screen
+        screen.set_clip(view.rect)
+        view.draw(screen, self._chunk_surface)
+        origin = view.origin
+        cells = view.cells()
+        x0, y0, x1, y1 = cells
+        items = self.items.in_rect(*cells)
+        for kind, draw_item in ((ITEM_COIN, draw_coin), (ITEM_BILL, draw_money_bill), (ITEM_FOOD, draw_food)):
+            for item in items:
+                if item.kind == kind:
+                    draw_item(screen, item, tick, origin)
+        for bullet in self.bullets:
+            if x0 <= bullet.x < x1 and y0 <= bullet.y < y1:
+                draw_bullet(screen, bullet, alpha, origin)
+        for edog in self.enemies:
+            if x0 <= edog.x < x1 and y0 <= edog.y < y1:
+                draw_enemy_dog(screen, edog, tick, alpha, origin)
+        for pidx, snake in enumerate((self.snake1, self.snake2)[:self.num_players]):
+            draw_snake(screen, snake, self.snake_colors[pidx], tick,
+                       self.gun_type[pidx], self.snake_type[pidx], None, alpha, origin, cells)
+        # Trækroner rager op over cellen ovenfor, så træerne tages med lidt længere ud
+        tx0, ty0, tx1, ty1 = view.cells(margin=2)
+        chunks = self.sim.terrain.chunks
+        trees = [
+            (tx, ty)
+            for key in view.chunks(margin=2) if key in chunks
+            for tx, ty in chunks[key][1]
+            if tx0 <= tx < tx1 and ty0 <= ty < ty1
+        ]
+        draw_decorations(screen, trees, self.difficulty, origin, seeded=True)
+        screen.set_clip(None)
+
+    def _chunk_surface(self, key):
+        return self.chunk_surfaces.get(key, lambda: render_chunk(self.sim.terrain, key, self.floor_tile, self.difficulty))
 
     def _draw_enter_name(self):
         overlay = pygame.Surface((WINDOW_W, WINDOW_H), pygame.SRCALPHA)
@@ -3477,7 +3057,10 @@ class Game:
         panel_w, panel_h = 500, 220
         draw_3d_panel(self.screen, (cx - panel_w // 2, cy - panel_h // 2, panel_w, panel_h), (35, 35, 45), depth=5)
 
-        new_hs = self.font_big.render("NY HIGHSCORE!", True, GOLD)
+        _, score = self.pending_highscores[0]
+        place = self.highscores.rank(self._highscore_key, score)
+        title = "NY HIGHSCORE!" if place <= MAX_HIGHSCORES else f"Plads #{place}!"
+        new_hs = self.font_big.render(title, True, GOLD)
         self.screen.blit(new_hs, new_hs.get_rect(center=(cx, cy - 70)))
 
         if self._two_player:
@@ -3487,7 +3070,6 @@ class Game:
             player_label = "Din score"
             player_color = GREEN
 
-        _, score = self.pending_highscores[0]
         score_txt = self.font_med.render(f"{player_label}: {score} point", True, player_color)
         self.screen.blit(score_txt, score_txt.get_rect(center=(cx, cy - 30)))
 
@@ -3532,18 +3114,74 @@ class Game:
         self.screen.blit(score_text, score_text.get_rect(center=(cx, cy + 15)))
         self.screen.blit(hint, hint.get_rect(center=(cx, cy + 55)))
 
+    def step(self, dt):
+        """Fremskriv simulationen dt sekunder med faste game-ticks på 1 / self.fps.
+
+        Efter et hak køres højst MAX_CATCHUP_STEPS ticks, og resten af efterslæbet
+        droppes. Bagefter er self.alpha brøkdelen af næste tick der er gået, som
+        tegningen interpolerer med."""
+        if self.state != "PLAYING":
+            self.sim_time = 0.0
+            self.alpha = 1.0
+            return
+        if self.playback is not None:
+            # Afspilning: replay_skip ticks per frame så hurtigt som muligt
+            for _ in range(self.replay_skip):
+                self.update()
+                if self.state != "PLAYING":
+                    break
+            self.alpha = 1.0
+            return
+        self.sim_time += dt
+        steps = 0
+        while self.sim_time >= 1.0 / self.fps:
+            if steps == MAX_CATCHUP_STEPS:
+                self.sim_time = 0.0
+                break
+            self.sim_time -= 1.0 / self.fps  # self.fps kan stige under update()
+            self.update()
+            steps += 1
+            if self.state != "PLAYING":
+                self.sim_time = 0.0
+                self.alpha = 1.0
+                return
+        self.alpha = min(1.0, self.sim_time * self.fps)
+
     async def run(self):
         running = True
+        dt = 0.0
         while running:
             running = self.handle_events()
-            self.update()
+            self.step(dt)
             self.draw()
-            self.clock.tick(self.fps if self.state == "PLAYING" else 30)
+            self.wallet_saver.poll()
+            if self.state != "PLAYING":
+                fps = 30
+            elif self.playback is not None:
+                fps = 0  # afspilning: ingen ventetid
+            else:
+                fps = RENDER_FPS
+            dt = self.clock.tick(fps) / 1000.0
             await asyncio.sleep(0)  # Yield control to browser
 
+        self.wallet_saver.flush()
         pygame.quit()
         sys.exit()
 
 
+def _cli_option(name, default=None):
+    """Værdien efter name på kommandolinjen (fx --replay FIL), ellers default."""
+    if name in sys.argv[1:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
 if __name__ == "__main__":
-    asyncio.run(Game().run())
+    replay_path = _cli_option("--replay")
+    profiles = _cli_option("--profiles", "p1,p2").split(",")
+    if len(profiles) != 2:
+        sys.exit("--profiles skal være to navne, fx kiosk1,kiosk2")
+    asyncio.run(Game(stress="--stress" in sys.argv,
+                     replay=Replay.load(replay_path) if replay_path else None,
+                     replay_skip=int(_cli_option("--replay-skip", 1)),
+                     db=_cli_option("--db"), profiles=profiles).run())
@@ -0,0 +1,1599 @@
+"""Snake-simulationen uden pygame: regler, bane, slanger, ting, kugler og hunde.
+
+Game i snake.py tegner og spiller lyd; alt der afgør hvad der sker i et
+game-tick ligger her, så runder kan køres headless (bots, balancering, tests)."""
+import random
+from array import array
+from collections import Counter, deque
+
+# --- Konstanter ---
+GRID_W = 50
+GRID_H = 30
+
+# Sværhedsgrader: (label, start_fps, max_fps, fps_increase_every)
+DIFFICULTIES = [
+    ("Let", 5, 20, 8),
+    ("Normal", 8, 26, 5),
+    ("Svær", 12, 32, 3),
+    ("Vanvid", 16, 48, 2),
+]
+
+# Retninger
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+
+OPPOSITES = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+FOOD_NORMAL = "normal"
+FOOD_BONUS = "bonus"
+FOOD_INVINCIBLE = "invincible"
+FOOD_MEGA = "mega"          # 100 point - spawner 20 per 10 min
+MEGA_FOOD_INTERVAL = 30     # sekunder mellem mega-food spawns (10 min / 20 = 30s)
+
+# Coin / Bullet / Gun
+MONEY_BILL_VALUE = 10  # Pengesedler giver 10 coins
+BULLET_SPEED = 2  # celler per game-tick
+AMMO_PRICE = 1      # 1 coin = 5 skud
+AMMO_AMOUNT = 5     # skud per køb
+
+# Kanon-typer og deres pris i coins
+GUN_NONE = None
+GUN_BASIC = "basic"       # Manuel skydning, 1 skud
+GUN_AUTO = "auto"         # Automatisk skydning
+GUN_QUAD = "quad"         # 4 skud ad gangen
+GUN_VACUUM = "vacuum"     # Støvsuger - suger mad til sig
+GUN_PRICES = {GUN_BASIC: 10, GUN_AUTO: 15, GUN_QUAD: 25, GUN_VACUUM: 50}
+AUTO_SHOOT_INTERVAL = 4  # auto-kanon skyder hvert N. tick
+VACUUM_INTERVAL = 12      # støvsuger suger hvert N. tick (langsom forbrug)
+VACUUM_RANGE = 10         # rækkevidde i celler
+POWER_PRICE = 5           # 5 coins for 7 strøm
+POWER_AMOUNT = 7
+# Fjendtlige hunde per sværhedsgrad: (spawn-interval i ticks, max antal hunde)
+ENEMY_SPAWN = {2: (60, 3), 3: (35, 6)}
+STRESS_ENEMY_SPAWN = (1, 300)  # stress-test (--stress): en ny hund hvert tick
+# Store baner: hundene kommer ind og jager omkring slangerne i stedet for over hele banen
+DOG_CHASE_RADIUS = 30  # afstandsfeltet regnes kun så mange skridt ud fra hovederne
+DOG_SPAWN_RADIUS = 30  # nye hunde kommer ind på kvadratet med denne "radius" om et slangehoved
+DOG_LEAVE_RADIUS = 60  # hunde længere væk end dette fra alle hoveder forsvinder
+TIMER_WHEEL_SLOTS = 256  # > længste levetid, så en spand normalt kun holder forfaldne ting
+
+# Dødsårsager (Snake.death_cause)
+DEATH_WALL = "wall"
+DEATH_SELF = "self"
+DEATH_RUIN = "ruin"
+DEATH_SNAKE = "snake"        # ramte den anden slange (eller blev ramt af den)
+DEATH_HEAD_ON = "head_on"
+DEATH_BULLET = "bullet"
+DEATH_DOG = "dog"
+
+
+# --- Ruin-layouts (relative positioner fra anker) ---
+RUIN_TEMPLATES = [
+    # L-form
+    [(0, 0), (1, 0), (2, 0), (0, 1), (0, 2)],
+    # Omvendt L
+    [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2)],
+    # Lille kvadrat
+    [(0, 0), (1, 0), (0, 1), (1, 1)],
+    # Vandret mur
+    [(0, 0), (1, 0), (2, 0), (3, 0)],
+    # Lodret mur
+    [(0, 0), (0, 1), (0, 2), (0, 3)],
+    # T-form
+    [(0, 0), (1, 0), (2, 0), (1, 1), (1, 2)],
+    # Kryds
+    [(1, 0), (0, 1), (1, 1), (2, 1), (1, 2)],
+    # S-form
+    [(1, 0), (2, 0), (0, 1), (1, 1), (0, 2)],
+    # Lille prik-klump
+    [(0, 0), (2, 0), (1, 1), (0, 2), (2, 2)],
+]
+
+# Antal ruiner per sværhedsgrad (mere skov = flere ruiner)
+RUIN_COUNTS = [4, 6, 9, 13]
+
+# Antal dekorative træer per sværhedsgrad
+TREE_COUNTS = [8, 12, 16, 20]
+
+# Banestørrelser (bredde, højde) i celler. Den første er standardbanen der står
+# helt på skærmen; på de større følger et kamera slangen (se snake.py), terrænet
+# genereres i chunks omkring slangerne (se Terrain), og ting spawner i den del
+# af banen der er i spil med samme tæthed som på standardbanen.
+MAP_SIZES = [(GRID_W, GRID_H), (200, 200), (500, 500)]
+CHUNK_SIZE = 16       # celler per side i et terræn-chunk
+TERRAIN_RADIUS = 5    # chunks omkring hvert slangehoved der holdes genereret
+
+
+def generate_safe_zones(width=GRID_W, height=GRID_H):
+    """Positioner der skal holdes fri for ruiner (spawn-områder)."""
+    safe = set()
+    # Spiller 1 spawn-zone (øverst venstre)
+    for x in range(0, 8):
+        for y in range(0, 8):
+            safe.add((x, y))
+    # Spiller 2 spawn-zone (nederst højre)
+    for x in range(width - 8, width):
+        for y in range(height - 8, height):
+            safe.add((x, y))
+    # Center (for 1-spiller spawn)
+    cx, cy = width // 2, height // 2
+    for x in range(cx - 4, cx + 5):
+        for y in range(cy - 4, cy + 5):
+            safe.add((x, y))
+    return safe
+
+
+def _shape_rotations(template):
+    """Skabelonens fire rotationer (0, 90, 180, 270), flyttet så mindste x og y er 0."""
+    shapes = []
+    rotated = template
+    for _ in range(4):
+        min_x = min(x for x, y in rotated)
+        min_y = min(y for x, y in rotated)
+        shapes.append([(x - min_x, y - min_y) for x, y in rotated])
+        rotated = [(-y, x) for x, y in rotated]
+    return shapes
+
+
+def _halo(shape):
+    """Formens celler og alle deres naboer (også diagonalt) - det en ruin spærrer for andre."""
+    return sorted({(x + dx, y + dy) for x, y in shape for dx in (-1, 0, 1) for dy in (-1, 0, 1)})
+
+
+# RUIN_SHAPES[skabelon][rotation] = cellerne, normaliseret så de starter i (0, 0),
+# og RUIN_HALOS de celler der blokeres når formen er placeret
+RUIN_SHAPES = [_shape_rotations(template) for template in RUIN_TEMPLATES]
+RUIN_HALOS = [[_halo(shape) for shape in shapes] for shapes in RUIN_SHAPES]
+PLACE_TRIES = 8  # tilfældige forsøg mod masken før de gyldige pladser tælles op
+
+
+def _block(mask, width, height, cells, radius=0):
+    """Markér cellerne (og naboerne inden for radius) som blokerede i masken.
+
+    Celler uden for banen springes over."""
+    if not radius:
+        for x, y in cells:
+            if 0 <= x < width and 0 <= y < height:
+                mask[y * width + x] = 1
+        return
+    for cx, cy in cells:
+        x0, x1 = max(0, cx - radius), min(width, cx + radius + 1)
+        fill = b"\x01" * (x1 - x0)
+        for row in range(max(0, cy - radius) * width, min(height, cy + radius + 1) * width, width):
+            mask[row + x0:row + x1] = fill
+
+
+def _place(mask, width, offsets, xs, ys, rng):
+    """En tilfældig plads (x, y) med x i xs og y i ys hvor ingen af offsets er blokeret.
+
+    Først et par tilfældige forsøg (billigt så længe banen er luftig), ellers
+    tælles alle gyldige pladser op og der trækkes blandt dem. Begge dele er
+    ligefordelt over de gyldige pladser; None hvis der ingen er."""
+    if not xs or not ys:
+        return None
+    for _ in range(PLACE_TRIES):
+        x, y = rng.choice(xs), rng.choice(ys)
+        base = y * width + x
+        if not any(mask[base + o] for o in offsets):
+            return x, y
+    valid = [(x, y) for y in ys for x in xs
+             if not any(mask[y * width + x + o] for o in offsets)]
+    return rng.choice(valid) if valid else None
+
+
+def generate_ruins(count, safe_zones, rng=random, width=GRID_W, height=GRID_H):
+    """Generer tilfældige ruiner på banen. safe_zones er et set af positioner der skal holdes fri.
+
+    rng er den tilfældighedskilde der trækkes fra (Simulation giver sin egen).
+    Returnerer (ruin-celler, antal placerede ruiner); er der ikke plads til
+    count ruiner, placeres så mange som muligt."""
+    # Blokeret = safe zones og ruiner plus en celles afstand rundt om dem
+    mask = bytearray(width * height)
+    _block(mask, width, height, safe_zones)
+    ruin_cells = set()
+    placed = 0
+    full = set()  # (skabelon, rotation) der ikke kan stå nogen steder mere
+    total = len(RUIN_SHAPES) * 4
+    while placed < count and len(full) < total:
+        # Tilfældig skabelon og rotation (0, 90, 180, 270)
+        key = (rng.randrange(len(RUIN_SHAPES)), rng.randint(0, 3))
+        if key in full:
+            continue
+        shape = RUIN_SHAPES[key[0]][key[1]]
+        max_x = max(x for x, y in shape)
+        max_y = max(y for x, y in shape)
+        # Ruiner holdes to celler fra kanten
+        pos = _place(mask, width, [y * width + x for x, y in shape],
+                     range(2, width - 2 - max_x), range(2, height - 2 - max_y), rng)
+        if pos is None:
+            full.add(key)  # masken bliver kun fyldigere, så formen passer heller ikke senere
+            continue
+        ox, oy = pos
+        ruin_cells.update((x + ox, y + oy) for x, y in shape)
+        # Halo'en rækker højst én celle ud, og ruinen står mindst to fra kanten
+        for x, y in RUIN_HALOS[key[0]][key[1]]:
+            mask[(y + oy) * width + x + ox] = 1
+        placed += 1
+    return ruin_cells, placed
+
+
+def generate_trees(count, occupied, rng=random, width=GRID_W, height=GRID_H):
+    """Generer tilfældige dekorative træ-positioner (grid-celler). Undgår occuperede celler.
+
+    Træer holder mindst 2 celler til hinanden; er der ikke plads til count
+    træer, returneres så mange som der kunne placeres."""
+    mask = bytearray(width * height)
+    _block(mask, width, height, occupied)
+    trees = []
+    xs, ys = range(1, width - 1), range(1, height - 1)
+    while len(trees) < count:
+        pos = _place(mask, width, (0,), xs, ys, rng)
+        if pos is None:
+            break
+        trees.append(pos)
+        _block(mask, width, height, [pos], 2)
+    return trees
+
+
+def _draw_count(rng, expected):
+    """Et helt antal med middelværdi expected (brøkdelen afgøres med rng)."""
+    count = int(expected)
+    return count + (rng.random() < expected - count)
+
+
+# --- Terræn i chunks (store baner) ---
+class Terrain:
+    """Ruiner og træer på en stor bane, genereret chunk for chunk når de kommer i spil.
+
+    Et chunk er CHUNK_SIZE x CHUNK_SIZE celler, og indholdet afhænger kun af
+    rundens seed og chunkets koordinat. Et chunk kan derfor smides ud når
+    slangerne er langt væk og genskabes ens senere; kun skudte ruiner skal
+    huskes (destroyed). Ruiner holdes mindst en celle fra chunkets kant, så de
+    aldrig deler sig over to chunks. keys er de indlæste chunks som en tæt
+    liste (til ChunkSampler), slot deres plads i den."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.seed = None
+        self.ruin_density = 0.0  # ruin-skabeloner per celle
+        self.tree_density = 0.0
+        self.safe_zones = {}     # chunk -> safe-celler i chunket
+        self.chunks = {}         # chunk -> (ruin-celler, træer)
+        self.keys = []
+        self.slot = {}
+        self.destroyed = set()
+
+    def reset(self, seed, difficulty, safe_zones):
+        """Ny runde: alt indlæst terræn skal være smidt ud (se Simulation._evict_chunk) først."""
+        self.seed = seed
+        self.ruin_density = RUIN_COUNTS[difficulty] / (GRID_W * GRID_H)
+        self.tree_density = TREE_COUNTS[difficulty] / (GRID_W * GRID_H)
+        self.safe_zones = {}
+        for x, y in safe_zones:
+            self.safe_zones.setdefault((x // CHUNK_SIZE, y // CHUNK_SIZE), set()).add((x, y))
+        self.destroyed = set()
+
+    def chunk_rect(self, key):
+        """Chunkets celler som (x0, y0, x1, y1); chunks ved banens kant kan være mindre."""
+        x0, y0 = key[0] * CHUNK_SIZE, key[1] * CHUNK_SIZE
+        return x0, y0, min(x0 + CHUNK_SIZE, self.width), min(y0 + CHUNK_SIZE, self.height)
+
+    def generate(self, key):
+        """Chunkets (ruin-celler, træer) i bane-koordinater, uden de skudte ruiner."""
+        x0, y0, x1, y1 = self.chunk_rect(key)
+        w, h = x1 - x0, y1 - y0
+        if min(w, h) < 8:
+            return set(), []  # for smalt til en ruin-skabelon med margen
+        rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+        safe = {(x - x0, y - y0) for x, y in self.safe_zones.get(key, ())}
+        ruins, _ = generate_ruins(_draw_count(rng, self.ruin_density * w * h), safe, rng, w, h)
+        trees = generate_trees(_draw_count(rng, self.tree_density * w * h), ruins | safe, rng, w, h)
+        ruins = {(x + x0, y + y0) for x, y in ruins} - self.destroyed
+        return ruins, [(x + x0, y + y0) for x, y in trees]
+
+    def load(self, key):
+        """Generér og indlæs chunket; returnerer (ruin-celler, træer)."""
+        chunk = self.chunks[key] = self.generate(key)
+        self.slot[key] = len(self.keys)
+        self.keys.append(key)
+        return chunk
+
+    def evict(self, key):
+        """Smid chunket ud; returnerer dets (ruin-celler, træer)."""
+        i = self.slot.pop(key)
+        last = self.keys.pop()
+        if i < len(self.keys):
+            self.keys[i] = last
+            self.slot[last] = i
+        return self.chunks.pop(key)
+
+    def loaded(self, pos):
+        return (pos[0] // CHUNK_SIZE, pos[1] // CHUNK_SIZE) in self.chunks
+
+    def destroy(self, pos):
+        """En ruin er skudt i stykker og skal blive væk når chunket genskabes."""
+        self.destroyed.add(pos)
+        chunk = self.chunks.get((pos[0] // CHUNK_SIZE, pos[1] // CHUNK_SIZE))
+        if chunk is not None:
+            chunk[0].discard(pos)
+
+
+# --- Occupancy-grid ---
+# Tags (bits) for hvad der står i en celle
+OCC_SNAKE1 = 1
+OCC_SNAKE2 = 2
+OCC_RUIN = 4
+OCC_FOOD = 8
+OCC_COIN = 16
+OCC_BILL = 32
+OCC_DOG = 64
+OCC_TAGS = (OCC_SNAKE1, OCC_SNAKE2, OCC_RUIN, OCC_FOOD, OCC_COIN, OCC_BILL, OCC_DOG)
+OCC_SNAKES = OCC_SNAKE1 | OCC_SNAKE2
+OCC_ITEMS = OCC_FOOD | OCC_COIN | OCC_BILL
+# Celler hvor der ikke må spawne mad/coins/sedler
+OCC_SPAWN_BLOCKED = OCC_SNAKES | OCC_RUIN | OCC_ITEMS
+
+
+def edge_cells(width, height):
+    """Cellerne langs banens kant (hvor hundene kommer ind)."""
+    return (
+        [(0, y) for y in range(height)] +
+        [(width - 1, y) for y in range(height)] +
+        [(x, 0) for x in range(width)] +
+        [(x, height - 1) for x in range(width)]
+    )
+
+
+class FreeCellIndex:
+    """De frie celler i et område med O(1) indsæt, fjern og uniform stikprøve.
+
+    En celle er fri når ingen af bits'ene i blocked er sat i grid'et. cells er
+    en tæt liste og slot cellens plads i den; en celle fjernes ved at flytte
+    den sidste ind på dens plads (swap-remove). region=None er hele banen."""
+
+    def __init__(self, blocked, region=None):
+        self.blocked = blocked
+        self.region = set(region) if region is not None else None
+        self.cells = []
+        self.slot = {}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def add(self, pos):
+        if pos not in self.slot:
+            self.slot[pos] = len(self.cells)
+            self.cells.append(pos)
+
+    def discard(self, pos):
+        i = self.slot.pop(pos, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.slot[last] = i
+
+    def update(self, pos, old_mask, new_mask):
+        """Kaldes af grid'et når cellens tag-bits ændrer sig."""
+        was_free = not old_mask & self.blocked
+        is_free = not new_mask & self.blocked
+        if was_free != is_free and (self.region is None or pos in self.region):
+            if is_free:
+                self.add(pos)
+            else:
+                self.discard(pos)
+
+    def rebuild(self, grid):
+        self.cells = []
+        self.slot = {}
+        for pos in grid.free_cells(self.blocked):
+            if self.region is None or pos in self.region:
+                self.add(pos)
+
+    def sample(self, rng=random):
+        """En tilfældig fri celle, eller None hvis der ingen er."""
+        return rng.choice(self.cells) if self.cells else None
+
+
+class ChunkSampler:
+    """Tilfældige frie celler i terrænets indlæste chunks (store baner).
+
+    Modstykket til FreeCellIndex når banen er for stor til at holde styr på
+    alle frie celler: et tilfældigt indlæst chunk og en tilfældig celle i det,
+    prøvet igen op til ATTEMPTS gange hvis cellen er optaget."""
+
+    ATTEMPTS = 16
+
+    def __init__(self, terrain, grid, blocked):
+        self.terrain = terrain
+        self.grid = grid
+        self.blocked = blocked
+
+    def sample(self, rng=random):
+        """En tilfældig fri celle, eller None hvis der ikke blev fundet nogen."""
+        keys = self.terrain.keys
+        if not keys:
+            return None
+        for _ in range(self.ATTEMPTS):
+            x0, y0, x1, y1 = self.terrain.chunk_rect(rng.choice(keys))
+            pos = (rng.randrange(x0, x1), rng.randrange(y0, y1))
+            if not self.grid.has(pos, self.blocked):
+                return pos
+        return None
+
+
+class OccupancyGrid:
+    """Hvad der står i hver celle, vedligeholdt inkrementelt i O(1) per ændring.
+
+    mask har én bit per tag og celle. counts tæller per tag, fordi ting kan
+    overlappe (en uovervindelig slange over sig selv, to hunde på samme felt);
+    bitten slukkes først når tælleren når 0. Celler uden for banen ignoreres.
+    Registrerede FreeCellIndex'er (se track) holdes opdateret når bits skifter."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.mask = bytearray(width * height)
+        self.counts = {tag: bytearray(width * height) for tag in OCC_TAGS}
+        self.free_indexes = []
+
+    def track(self, index):
+        """Hold index opdateret fremover og returnér det."""
+        index.rebuild(self)
+        self.free_indexes.append(index)
+        return index
+
+    def _set_mask(self, i, pos, new_mask):
+        old_mask = self.mask[i]
+        self.mask[i] = new_mask
+        for index in self.free_indexes:
+            index.update(pos, old_mask, new_mask)
+
+    def _index(self, pos):
+        """Celle-indeks (kolonnevis, så scanning giver samme rækkefølge som x-y-løkker), None uden for banen."""
+        x, y = pos
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x * self.height + y
+        return None
+
+    def add(self, pos, tag):
+        i = self._index(pos)
+        if i is not None:
+            self.counts[tag][i] += 1
+            if not self.mask[i] & tag:
+                self._set_mask(i, pos, self.mask[i] | tag)
+
+    def remove(self, pos, tag):
+        i = self._index(pos)
+        if i is not None:
+            counts = self.counts[tag]
+            counts[i] -= 1
+            if not counts[i]:
+                self._set_mask(i, pos, self.mask[i] & ~tag)
+
+    def move(self, old_pos, new_pos, tag):
+        self.remove(old_pos, tag)
+        self.add(new_pos, tag)
+
+    def get(self, pos):
+        """Tag-bits for cellen (0 uden for banen)."""
+        i = self._index(pos)
+        return self.mask[i] if i is not None else 0
+
+    def has(self, pos, tags):
+        return bool(self.get(pos) & tags)
+
+    def count(self, pos, tag):
+        i = self._index(pos)
+        return self.counts[tag][i] if i is not None else 0
+
+    def clear(self, tags=None):
+        """Fjern alle tags (eller kun de angivne bits) fra hele grid'et."""
+        if tags is None:
+            tags = OCC_SNAKES | OCC_RUIN | OCC_ITEMS | OCC_DOG
+        size = self.width * self.height
+        for tag in OCC_TAGS:
+            if tag & tags:
+                self.counts[tag] = bytearray(size)
+        keep = ~tags & 0xFF
+        self.mask = bytearray(m & keep for m in self.mask)
+        for index in self.free_indexes:
+            index.rebuild(self)
+
+    def free_cells(self, blocked):
+        """Alle celler uden nogen af bits'ene i blocked, i x-y-rækkefølge."""
+        h = self.height
+        return [(i // h, i % h) for i, m in enumerate(self.mask) if not m & blocked]
+
+
+class FlowField:
+    """Afstandsfelt (BFS i skridt) fra et sæt kilde-celler, delt af alle hunde.
+
+    Udregnes højst én gang per tick uanset antal hunde; en hund går så bare
+    ned ad bakke. Celler med blokerede tags (og celler uden for banen) er
+    UNREACHED. Indeks som i OccupancyGrid (kolonnevis).
+
+    Naboerne står i fire tabeller (op, ned, venstre, højre) bygget én gang; en
+    nabo uden for banen peger på en ekstra celle efter den sidste, der altid
+    regnes som blokeret, så søgningen ikke skal tjekke kanter."""
+
+    UNREACHED = 0xFFFF
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        n = width * height
+        self.dist = array("H", [self.UNREACHED]) * n
+        cells = array("l", range(-height, n + height))  # cells[height + i] == i
+        self.up = cells[height - 1:height - 1 + n]
+        self.down = cells[height + 1:height + 1 + n]
+        self.left = cells[:n]
+        self.right = cells[2 * height:]
+        edge = array("l", [n])
+        self.up[0::height] = edge * width
+        self.down[height - 1::height] = edge * width
+        self.left[:height] = edge * height
+        self.right[n - height:] = edge * height
+        self.blocked_tables = {}  # blocked -> bytes.translate-tabel: maske -> 1 hvis blokeret
+
+    def compute(self, sources, grid, blocked, max_dist=None, around=None):
+        """Fyld feltet fra sources (altid afstand 0, selv på blokerede celler).
+
+        Med max_dist stopper søgningen så mange skridt ude, og resten er
+        UNREACHED; på en stor bane koster feltet så det samme som på en lille.
+        Med around (hundenes positioner) stopper den allerede når hver af dem
+        og deres naboer har fået en afstand - den samme som uden around."""
+        w, h = self.width, self.height
+        unreached = self.UNREACHED
+        dist = array("H", [unreached]) * (w * h)
+        table = self.blocked_tables.get(blocked)
+        if table is None:
+            table = self.blocked_tables[blocked] = bytes(int(bool(m & blocked)) for m in range(256))
+        closed = grid.mask.translate(table) + b"\x01"  # blokeret, besøgt eller uden for banen
+        frontier = []
+        for x, y in sources:
+            if 0 <= x < w and 0 <= y < h:
+                i = x * h + y
+                if dist[i]:
+                    dist[i] = 0
+                    closed[i] = 1
+                    frontier.append(i)
+        up, down, left, right = self.up, self.down, self.left, self.right
+        wanted = None
+        if around is not None:
+            wanted = {(x + dx) * h + y + dy for x, y in around
+                      for dx, dy in ((0, 0), (0, -1), (0, 1), (-1, 0), (1, 0))
+                      if 0 <= x + dx < w and 0 <= y + dy < h}
+            wanted = [i for i in wanted if not closed[i]]
+        d = 0
+        while frontier and d != max_dist:
+            if wanted is not None:
+                while wanted and closed[wanted[-1]]:
+                    wanted.pop()  # har fået sin afstand
+                if not wanted:
+                    break
+            d += 1
+            nxt = []
+            for i in frontier:
+                for j in (up[i], down[i], left[i], right[i]):
+                    if not closed[j]:
+                        closed[j] = 1
+                        dist[j] = d
+                        nxt.append(j)
+            frontier = nxt
+        self.dist = dist
+
+    def get(self, pos):
+        x, y = pos
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.dist[x * self.height + y]
+        return self.UNREACHED
+
+
+class TickScheduler:
+    """Hashed timer wheel: ting der skal ske på et bestemt game_tick.
+
+    schedule() lægger en payload i spanden tick % slots, og pop_due() tømmer
+    kun spanden for det aktuelle tick, så prisen per tick ikke vokser med
+    antallet af ventende ting. Aflysning sker dovent: den der henter de
+    forfaldne payloads tjekker selv om de stadig er relevante."""
+
+    def __init__(self, slots=TIMER_WHEEL_SLOTS):
+        self.slots = [[] for _ in range(slots)]
+        self.pending = 0
+
+    def schedule(self, tick, payload):
+        self.slots[tick % len(self.slots)].append((tick, payload))
+        self.pending += 1
+
+    def pop_due(self, tick):
+        """Payloads planlagt til tick (eller tidligere), i planlægningsrækkefølge.
+
+        Skal kaldes for hvert tick i træk, ellers springes spande over."""
+        i = tick % len(self.slots)
+        bucket = self.slots[i]
+        if not bucket:
+            return []
+        due = [payload for t, payload in bucket if t <= tick]
+        if len(due) == len(bucket):
+            self.slots[i] = []
+        else:
+            self.slots[i] = [entry for entry in bucket if entry[0] > tick]
+        self.pending -= len(due)
+        return due
+
+    def clear(self):
+        self.slots = [[] for _ in self.slots]
+        self.pending = 0
+
+
+class Snake:
+    """En slange. body er en deque fra hoved til hale, så hovedet indsættes og
+    halen fjernes i O(1); "står slangen på cellen" slås op i grid'et (se attach)."""
+
+    def __init__(self, start_pos, direction):
+        self.grid = None        # OccupancyGrid slangen holder opdateret (sættes med attach)
+        self.occ_tag = 0
+        self.body = deque()
+        self.reset(start_pos, direction)
+
+    def attach(self, grid, tag):
+        """Registrér slangen i grid'et under tag; grid'et følger med ved hver bevægelse."""
+        self.grid = grid
+        self.occ_tag = tag
+        for pos in self.body:
+            grid.add(pos, tag)
+
+    def clear(self):
+        """Fjern slangen fra banen (tom krop)."""
+        if self.grid is not None:
+            for pos in self.body:
+                self.grid.remove(pos, self.occ_tag)
+        self.body.clear()
+
+    def reset(self, start_pos, direction):
+        self.clear()
+        self.direction = direction
+        self.next_direction = direction
+        self.alive = True
+        self.death_cause = None  # DEATH_* når slangen er død
+        self.grow_pending = 0
+        self.invincible_timer = 0
+        self.moved = False      # flyttede slangen i sidste tick (til interpolation)
+        self.prev_tail = None   # cellen halen forlod i sidste tick
+        x, y = start_pos
+        for i in range(3):
+            dx, dy = direction
+            self.body.append((x - dx * i, y - dy * i))
+        if self.grid is not None:
+            for pos in self.body:
+                self.grid.add(pos, self.occ_tag)
+
+    @property
+    def is_invincible(self):
+        return self.invincible_timer > 0
+
+    def kill(self, cause):
+        """Slangen dør; den første årsag i et tick er den der huskes."""
+        if self.alive:
+            self.alive = False
+            self.death_cause = cause
+
+    def set_direction(self, new_dir):
+        if new_dir != OPPOSITES.get(self.direction):
+            self.next_direction = new_dir
+
+    def move(self):
+        self.moved = self.alive
+        if not self.alive:
+            return
+        self.direction = self.next_direction
+        head_x, head_y = self.body[0]
+        dx, dy = self.direction
+        new_head = (head_x + dx, head_y + dy)
+        self.body.appendleft(new_head)
+        self.grid.add(new_head, self.occ_tag)
+        if self.grow_pending > 0:
+            self.grow_pending -= 1
+            self.prev_tail = None
+        else:
+            self.prev_tail = self.body.pop()
+            self.grid.remove(self.prev_tail, self.occ_tag)
+        if self.invincible_timer > 0:
+            self.invincible_timer -= 1
+
+    def grow(self, amount=1):
+        self.grow_pending += amount
+
+    def head(self):
+        return self.body[0]
+
+    def occupies(self, pos):
+        """Står en del af slangen på pos? O(1) via grid'et."""
+        return self.grid.count(pos, self.occ_tag) > 0
+
+    def check_wall_collision(self):
+        x, y = self.head()
+        if x < 0 or x >= self.grid.width or y < 0 or y >= self.grid.height:
+            if not self.is_invincible:
+                self.kill(DEATH_WALL)
+
+    def check_self_collision(self):
+        # Hovedet tæller selv én gang i grid'et - mere end det er et sammenstød
+        if self.grid.count(self.head(), self.occ_tag) > 1:
+            if not self.is_invincible:
+                self.kill(DEATH_SELF)
+
+    def check_ruin_collision(self):
+        if self.grid.has(self.head(), OCC_RUIN):
+            if not self.is_invincible:
+                self.kill(DEATH_RUIN)
+
+
+class FoodItem:
+    kind = "food"
+
+    def __init__(self, food_type, pos):
+        self.food_type = food_type
+        self.pos = pos
+        self.lifetime = None
+        self.expires_at = None  # game_tick hvor tingen forsvinder (sættes ved spawn)
+        if food_type == FOOD_BONUS:
+            self.points = 3
+            self.lifetime = 80
+        elif food_type == FOOD_INVINCIBLE:
+            self.points = 0
+            self.lifetime = 60
+        elif food_type == FOOD_MEGA:
+            self.points = 100
+            self.lifetime = 120  # forsvinder efter 120 ticks
+        else:
+            self.points = 1
+            self.lifetime = None
+
+
+class Coin:
+    kind = "coin"
+
+    def __init__(self, pos):
+        self.pos = pos
+        self.lifetime = 120  # forsvinder efter 120 ticks
+        self.expires_at = None
+
+
+class MoneyBill:
+    """Pengeseddel der giver 10 coins når den samles op."""
+    kind = "bill"
+
+    def __init__(self, pos):
+        self.pos = pos
+        self.lifetime = 180  # forsvinder efter 180 ticks (lidt længere end coins)
+        self.expires_at = None
+
+
+ITEM_FOOD = FoodItem.kind
+ITEM_COIN = Coin.kind
+ITEM_BILL = MoneyBill.kind
+ITEM_OCC_TAGS = {ITEM_FOOD: OCC_FOOD, ITEM_COIN: OCC_COIN, ITEM_BILL: OCC_BILL}
+
+
+class ItemStore:
+    """Alle ting på banen (mad, coins, pengesedler) indekseret efter celle.
+
+    by_cell giver O(1) opslag af hvad der ligger på en celle (flere ting kan
+    ligge samme sted når støvsugeren skubber dem sammen). kinds er en
+    indsættelsesordnet visning per type (dict brugt som ordnet set), så
+    fjernelse er O(1) og tegne-rækkefølgen er spawn-rækkefølgen.
+    Grid'et opdateres sammen med butikken."""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.by_cell = {}
+        self.kinds = {kind: {} for kind in ITEM_OCC_TAGS}
+        self.food_counts = Counter()  # antal madvarer per food_type
+
+    def __len__(self):
+        return sum(len(items) for items in self.kinds.values())
+
+    def __contains__(self, item):
+        return item in self.kinds[item.kind]
+
+    def of(self, kind):
+        """Alle ting af én type (kopiér med list() hvis der fjernes undervejs)."""
+        return self.kinds[kind].keys()
+
+    def at(self, pos, kind=None):
+        """Tingene på cellen pos, evt. kun af én type."""
+        items = self.by_cell.get(pos, ())
+        if kind is None:
+            return list(items)
+        return [item for item in items if item.kind == kind]
+
+    def add(self, item):
+        self.kinds[item.kind][item] = None
+        self.by_cell.setdefault(item.pos, []).append(item)
+        self.grid.add(item.pos, ITEM_OCC_TAGS[item.kind])
+        if item.kind == ITEM_FOOD:
+            self.food_counts[item.food_type] += 1
+
+    def _unlink(self, item):
+        cell = self.by_cell[item.pos]
+        cell.remove(item)
+        if not cell:
+            del self.by_cell[item.pos]
+        self.grid.remove(item.pos, ITEM_OCC_TAGS[item.kind])
+
+    def remove(self, item):
+        del self.kinds[item.kind][item]
+        self._unlink(item)
+        if item.kind == ITEM_FOOD:
+            self.food_counts[item.food_type] -= 1
+
+    def move(self, item, pos):
+        self._unlink(item)
+        item.pos = pos
+        self.by_cell.setdefault(pos, []).append(item)
+        self.grid.add(pos, ITEM_OCC_TAGS[item.kind])
+
+    def within(self, center, radius):
+        """Ting højst radius celler fra center (Manhattan), uden tingene på selve center.
+
+        Scanner den mindste af diamanten omkring center og listen af ting."""
+        cx, cy = center
+        if 2 * radius * (radius + 1) < len(self):
+            found = []
+            for dx in range(-radius, radius + 1):
+                span = radius - abs(dx)
+                for dy in range(-span, span + 1):
+                    if dx or dy:
+                        found.extend(self.by_cell.get((cx + dx, cy + dy), ()))
+            return found
+        return [item for items in self.kinds.values() for item in items
+                if 0 < abs(item.pos[0] - cx) + abs(item.pos[1] - cy) <= radius]
+
+    def in_rect(self, x0, y0, x1, y1):
+        """Ting med x0 <= x < x1 og y0 <= y < y1 (fx kameraets udsnit).
+
+        Scanner ligesom within det mindste af rektanglets celler og listen af ting."""
+        if (x1 - x0) * (y1 - y0) < len(self):
+            by_cell = self.by_cell
+            return [item for x in range(x0, x1) for y in range(y0, y1) for item in by_cell.get((x, y), ())]
+        return [item for items in self.kinds.values() for item in items
+                if x0 <= item.pos[0] < x1 and y0 <= item.pos[1] < y1]
+
+    def clear(self):
+        for items in self.kinds.values():
+            for item in list(items):
+                self.remove(item)
+
+
+class EnemyDog:
+    """Fjendtlig hund der jager slangen og dræber ved kontakt."""
+    DOG_MOVE_INTERVAL = 3  # bevæger sig hvert N. game-tick (langsommere end slangen)
+
+    def __init__(self, pos, rng=random):
+        self.x, self.y = pos
+        self.alive = True
+        self.rng = rng  # tilfældig retning når hunden er spærret inde
+        self.next_move = 0  # game_tick hvor hunden må gå igen
+        self.direction = rng.choice([UP, DOWN, LEFT, RIGHT])
+        self.prev_pos = pos  # position før sidste tick (til interpolation)
+
+    def pos(self):
+        return (self.x, self.y)
+
+    def update(self, field, grid, tick, heads=None):
+        """Gå ét skridt ned ad flow-feltet mod nærmeste slangehoved.
+
+        Hunden flytter sig selv i grid'et og går ikke ind på en anden hund.
+        heads gives på store baner, hvor feltet ikke når hele vejen ud: en
+        hund uden for feltet går så lige mod det nærmeste hoved."""
+        self.prev_pos = self.pos()
+        if tick < self.next_move:
+            return
+        self.next_move = tick + self.DOG_MOVE_INTERVAL
+        # Nabo med kortest afstand; nuværende retning først, så hunden ikke zig-zagger
+        best, best_dist = None, field.get(self.pos())
+        queued = False
+        for mx, my in (self.direction, UP, DOWN, LEFT, RIGHT):
+            nxt = (self.x + mx, self.y + my)
+            d = field.get(nxt)
+            if d < best_dist:
+                if grid.has(nxt, OCC_DOG):
+                    queued = True
+                else:
+                    best, best_dist = (mx, my), d
+        if best is not None:
+            mx, my = best
+            grid.move(self.pos(), (self.x + mx, self.y + my), OCC_DOG)
+            self.x += mx
+            self.y += my
+            self.direction = best
+            return
+        if queued:
+            return  # vejen frem er spærret af en anden hund - vent i køen
+        if heads and field.get(self.pos()) == field.UNREACHED:
+            # Uden for feltet: først ad den akse hvor hovedet er længst væk
+            hx, hy = min(heads, key=lambda h: abs(h[0] - self.x) + abs(h[1] - self.y))
+            dx, dy = hx - self.x, hy - self.y
+            steps = [((dx > 0) - (dx < 0), 0), (0, (dy > 0) - (dy < 0))]
+            if abs(dy) > abs(dx):
+                steps.reverse()
+            for mx, my in steps:
+                nxt = (self.x + mx, self.y + my)
+                if (mx or my) and not grid.has(nxt, OCC_RUIN | OCC_DOG):
+                    grid.move(self.pos(), nxt, OCC_DOG)
+                    self.x, self.y = nxt
+                    self.direction = (mx, my)
+                    return
+        # Ingen vej (indespærret): tilfældig retning
+        moves = [UP, DOWN, LEFT, RIGHT]
+        self.rng.shuffle(moves)
+        for mx, my in moves:
+            nx, ny = self.x + mx, self.y + my
+            if 0 <= nx < grid.width and 0 <= ny < grid.height and not grid.has((nx, ny), OCC_RUIN):
+                grid.move(self.pos(), (nx, ny), OCC_DOG)
+                self.x, self.y = nx, ny
+                self.direction = (mx, my)
+                return
+
+
+class Bullet:
+    def __init__(self, pos, direction, owner_idx, gun_type=GUN_BASIC):
+        self.x, self.y = pos
+        self.direction = direction
+        self.owner_idx = owner_idx  # 0 = spiller 1, 1 = spiller 2
+        self.gun_type = gun_type
+        self.alive = True
+        self.age = 0
+        self.prev_pos = pos  # position før sidste tick (til interpolation)
+
+    def move(self):
+        dx, dy = self.direction
+        self.x += dx
+        self.y += dy
+        self.age += 1
+
+    def pos(self):
+        return (self.x, self.y)
+
+    def is_out_of_bounds(self, width, height):
+        return self.x < 0 or self.x >= width or self.y < 0 or self.y >= height
+
+
+class PlayerInput:
+    """Én spillers input til ét game-tick.
+
+    turns er retningstryk i den rækkefølge de kom, shots antal tryk på
+    skydeknappen (auto-kanonen ignorerer dem) og hold om skydeknappen holdes
+    nede (auto-kanon og støvsuger)."""
+
+    def __init__(self, turns=(), shots=0, hold=False):
+        self.turns = list(turns)
+        self.shots = shots
+        self.hold = hold
+
+
+class Simulation:
+    """Én spilrunde uden pygame: bane, slanger, ting, kugler, hunde, score og pengepung.
+
+    step() kører ét game-tick ud fra spillernes PlayerInput. Det der skal
+    høres eller tegnes om (spist mad, skud, ødelagte ruiner, rundens slutning)
+    sendes som events til observers: kaldbare objekter der får (event, *args)."""
+
+    def __init__(self, stress=False, size=MAP_SIZES[0]):
+        self.observers = []
+        self.recorder = None  # får hvert ticks input (se replay.ReplayRecorder)
+        self.rng = random.Random()  # al tilfældighed i en runde; seedes i new_round
+        self.seed = None
+        self.stress = stress  # stress-test: hunde i hundredvis (se STRESS_ENEMY_SPAWN)
+        self.num_players = 2
+        self.difficulty = 1
+        self.width, self.height = size  # banens størrelse; skift træder i kraft ved new_round
+        # Pengepung (Game gemmer den mellem spil)
+        self.coins = [0, 0]
+        self.ammo = [0, 0]
+        self.power = [0, 0]  # strøm til støvsuger
+        self.gun_type = [GUN_NONE, GUN_NONE]  # None, "basic", "auto", "quad", "vacuum"
+        self.scores = [0, 0]
+        # Nedkøling gemmes som det game_tick hvor handlingen er klar igen
+        self.auto_shoot_ready = [0, 0]
+        self.vacuum_ready = [0, 0]
+        self.vacuum_active = [False, False]  # om støvsugeren kører lige nu
+        self._build_board()
+        self.timers = TickScheduler()  # udløb af ting med begrænset levetid
+        self.bullets = []
+        self.enemies = []
+        self.enemy_spawn_ready = 0
+        self.ruins = set()
+        self.trees = []
+        self.shortfall = {}  # "ruiner"/"træer" -> (placeret, ønsket) når der ikke var plads
+        self.fps = DIFFICULTIES[self.difficulty][1]
+        self.game_tick = 0
+        self.special_food_ready = 0
+        self.coin_spawn_ready = 0
+        self.mega_food_timer = 0.0
+        self.mega_food_spawned = 0
+        self.over = True  # ingen runde i gang før new_round()
+
+    def _build_board(self):
+        """Grid, slanger, frie-celle-indekser og hundenes felt i størrelsen width x height."""
+        w, h = self.width, self.height
+        self.grid = OccupancyGrid(w, h)
+        self.snake1 = Snake((3, 3), RIGHT)
+        self.snake2 = Snake((w - 4, h - 4), LEFT)
+        self.snake1.attach(self.grid, OCC_SNAKE1)
+        self.snake2.attach(self.grid, OCC_SNAKE2)
+        if self.large_map:
+            # Terrænet kommer og går i chunks, og ting spawner kun i de indlæste
+            self.terrain = Terrain(w, h)
+            self.terrain_centers = None  # slangehovedernes chunks ved sidste opdatering
+            self.spawn_cells = ChunkSampler(self.terrain, self.grid, OCC_SPAWN_BLOCKED)
+            self.edge_spawn_cells = None
+        else:
+            # Frie celler til mad/coins/sedler og til hunde ved kanten
+            self.terrain = None
+            self.spawn_cells = self.grid.track(FreeCellIndex(OCC_SPAWN_BLOCKED))
+            self.edge_spawn_cells = self.grid.track(
+                FreeCellIndex(OCC_SPAWN_BLOCKED | OCC_DOG, edge_cells(w, h)))
+        self.items = ItemStore(self.grid)
+        self.dog_field = FlowField(w, h)
+
+    @property
+    def large_map(self):
+        """Større end standardbanen: kamera i Game, hunde omkring slangerne."""
+        return self.width > GRID_W or self.height > GRID_H
+
+    @property
+    def spawn_scale(self):
+        """Arealet i spil målt i standardbaner (hele banen, eller de indlæste
+        chunks på en stor bane); antallet af ting der spawner ganges med det."""
+        if self.terrain is not None:
+            return max(1, len(self.terrain.keys) * CHUNK_SIZE * CHUNK_SIZE // (GRID_W * GRID_H))
+        return max(1, self.width * self.height // (GRID_W * GRID_H))
+
+    def _load_chunk(self, key):
+        ruins, _ = self.terrain.load(key)
+        for pos in ruins:
+            self.grid.add(pos, OCC_RUIN)
+        self.ruins |= ruins
+
+    def _evict_chunk(self, key):
+        """Smid et chunk ud: dets ruiner ud af grid'et og tingene der ligger i det væk."""
+        ruins, _ = self.terrain.evict(key)
+        for pos in ruins:
+            self.grid.remove(pos, OCC_RUIN)
+        self.ruins -= ruins
+        for item in self.items.in_rect(*self.terrain.chunk_rect(key)):
+            self.items.remove(item)
+
+    def _update_terrain(self):
+        """Hold terrænet indlæst TERRAIN_RADIUS chunks omkring slangehovederne.
+
+        Chunks der er mere end én chunk uden for det smides ud (den ekstra
+        margen gør at en slange der kører frem og tilbage over en chunk-grænse
+        ikke genskaber de samme chunks hele tiden)."""
+        snakes = (self.snake1, self.snake2)[:self.num_players]
+        centers = tuple((x // CHUNK_SIZE, y // CHUNK_SIZE) for x, y in (snake.head() for snake in snakes))
+        if centers == self.terrain_centers:
+            return
+        self.terrain_centers = centers
+        terrain = self.terrain
+        nx, ny = -(-self.width // CHUNK_SIZE), -(-self.height // CHUNK_SIZE)
+        for key in [key for key in terrain.keys
+                    if all(max(abs(key[0] - cx), abs(key[1] - cy)) > TERRAIN_RADIUS + 1 for cx, cy in centers)]:
+            self._evict_chunk(key)
+        r = TERRAIN_RADIUS
+        wanted = {(cx + dx, cy + dy) for cx, cy in centers for dx in range(-r, r + 1) for dy in range(-r, r + 1)}
+        for key in sorted(wanted):
+            if 0 <= key[0] < nx and 0 <= key[1] < ny and key not in terrain.chunks:
+                self._load_chunk(key)
+
+    def emit(self, event, *args):
+        for observer in self.observers:
+            observer(event, *args)
+
+    @property
+    def _two_player(self):
+        return self.num_players == 2
+
+    def _spawn_food(self, food_type, count=1):
+        for _ in range(count):
+            pos = self.spawn_cells.sample(self.rng)
+            if pos is not None:
+                self._add_item(FoodItem(food_type, pos))
+
+    def _spawn_coin(self, count=1):
+        for _ in range(count):
+            pos = self.spawn_cells.sample(self.rng)
+            if pos is not None:
+                self._add_item(Coin(pos))
+
+    def _spawn_money_bill(self, count=1):
+        """Spawn pengesedler (10 coins) - sjældnere end normale coins."""
+        for _ in range(count):
+            pos = self.spawn_cells.sample(self.rng)
+            if pos is not None:
+                self._add_item(MoneyBill(pos))
+
+    def _dog_spawn_pos(self):
+        """Hvor en ny hund kommer ind: en fri kantcelle, eller på en stor bane
+        et tilfældigt sted DOG_SPAWN_RADIUS fra et slangehoved (uden for skærmen)."""
+        if not self.large_map:
+            return self.edge_spawn_cells.sample(self.rng)
+        heads = [snake.head() for _, snake in self._live_snakes()]
+        if not heads:
+            return None
+        hx, hy = self.rng.choice(heads)
+        r = DOG_SPAWN_RADIUS
+        blocked = OCC_SPAWN_BLOCKED | OCC_DOG
+        for _ in range(8):
+            side = self.rng.randint(-r, r)
+            dx, dy = self.rng.choice(((side, -r), (side, r), (-r, side), (r, side)))
+            x, y = hx + dx, hy + dy
+            if 0 <= x < self.width and 0 <= y < self.height and not self.grid.has((x, y), blocked):
+                return (x, y)
+        return None
+
+    def _add_item(self, item):
+        """Læg en ting på banen og planlæg dens udløb hvis den har en levetid."""
+        self.items.add(item)
+        if item.lifetime is not None:
+            item.expires_at = self.game_tick + item.lifetime
+            self.timers.schedule(item.expires_at, item)
+        self.emit("spawn", item)
+
+    def _shoot(self, player_idx):
+        """Spiller skyder. Kræver kanon + ammo."""
+        gt = self.gun_type[player_idx]
+        if gt is GUN_NONE:
+            return
+        if gt == GUN_VACUUM:
+            return  # støvsuger håndteres separat
+        if self.ammo[player_idx] <= 0:
+            return
+        snake = self.snake1 if player_idx == 0 else self.snake2
+        if not snake.alive:
+            return
+        self.ammo[player_idx] -= 1
+        hx, hy = snake.head()
+        dx, dy = snake.direction
+        if gt == GUN_QUAD:
+            # 4 skud i alle retninger
+            for d in (UP, DOWN, LEFT, RIGHT):
+                self.bullets.append(Bullet((hx + d[0], hy + d[1]), d, player_idx, gt))
+        else:
+            # 1 skud fremad (basic + auto)
+            self.bullets.append(Bullet((hx + dx, hy + dy), snake.direction, player_idx, gt))
+        self.emit("shoot", player_idx, gt)
+
+    def buy_ammo(self, player_idx):
+        """Køb ammo: AMMO_PRICE coins for AMMO_AMOUNT skud. True hvis købet gik igennem."""
+        if self.coins[player_idx] >= AMMO_PRICE:
+            self.coins[player_idx] -= AMMO_PRICE
+            self.ammo[player_idx] += AMMO_AMOUNT
+            return True
+        return False
+
+    def buy_gun(self, player_idx, gun_id):
+        """Køb en kanon-type. True hvis købet gik igennem."""
+        price = GUN_PRICES.get(gun_id)
+        if price is None:
+            return False
+        if self.gun_type[player_idx] == gun_id:
+            return False  # Har allerede denne type
+        if self.coins[player_idx] >= price:
+            self.coins[player_idx] -= price
+            self.gun_type[player_idx] = gun_id
+            return True
+        return False
+
+    def buy_power(self, player_idx):
+        """Køb strøm: POWER_PRICE coins for POWER_AMOUNT strøm. True hvis købet gik igennem."""
+        if self.coins[player_idx] >= POWER_PRICE:
+            self.coins[player_idx] -= POWER_PRICE
+            self.power[player_idx] += POWER_AMOUNT
+            return True
+        return False
+
+    def _vacuum_suck(self, player_idx):
+        """Støvsuger: ryk al mad og coins 1 felt tættere på slangens hoved."""
+        snake = self.snake1 if player_idx == 0 else self.snake2
+        if not snake.alive:
+            return
+        hx, hy = snake.head()
+        # Levende slanger og ruiner blokerer; ting må godt skubbes oven i hinanden
+        blocked = OCC_RUIN
+        if self.snake1.alive:
+            blocked |= OCC_SNAKE1
+        if self._two_player and self.snake2.alive:
+            blocked |= OCC_SNAKE2
+        # Ryk mad, coins og pengesedler 1 celle mod hovedet
+        for item in self.items.within((hx, hy), VACUUM_RANGE):
+            ix, iy = item.pos
+            dx = (1 if hx > ix else -1) if hx != ix else 0
+            dy = (1 if hy > iy else -1) if hy != iy else 0
+            nx, ny = ix + dx, iy + dy
+            # Tjek bounds og ikke blokeret
+            if 0 <= nx < self.width and 0 <= ny < self.height and not self.grid.has((nx, ny), blocked):
+                self.items.move(item, (nx, ny))
+
+    def _destroy_ruin(self, pos):
+        """Fjern en ruin-blok (Game gentegner dens område ved "ruin_destroyed")."""
+        self.ruins.discard(pos)
+        self.grid.remove(pos, OCC_RUIN)
+        if self.terrain is not None:
+            self.terrain.destroy(pos)
+        self.emit("ruin_destroyed", pos)
+
+    def _sweep_bullet(self, bullet, dogs_at):
+        """Flyt en kugle BULLET_SPEED celler og stop ved første ting den rammer.
+
+        Hele strækningen slås op i occupancy-griddet celle for celle, så både
+        ruiner, modstanderens krop og hunde midt på strækningen bliver ramt. En
+        ny kugle tjekker også den celle den blev affyret i."""
+        bullet.prev_pos = bullet.pos()
+        hit = OCC_RUIN | OCC_DOG
+        if bullet.owner_idx != 0 and self.snake1.alive:
+            hit |= OCC_SNAKE1
+        if bullet.owner_idx != 1 and self._two_player and self.snake2.alive:
+            hit |= OCC_SNAKE2
+        fresh = bullet.age == 0  # affyringscellen tjekkes også
+        for step in range(BULLET_SPEED + fresh):
+            if step or not fresh:
+                bullet.move()
+                # Uden for banen (eller det indlæste terræn på en stor bane) forsvinder kuglen
+                if bullet.is_out_of_bounds(self.width, self.height) or (
+                        self.terrain is not None and not self.terrain.loaded(bullet.pos())):
+                    bullet.alive = False
+                    return
+            bp = bullet.pos()
+            occ = self.grid.get(bp) & hit
+            if not occ:
+                continue
+            if occ & OCC_RUIN:
+                # Ruin-kollision: ødelæg ruin-blokken
+                self._destroy_ruin(bp)
+            elif occ & OCC_DOG:
+                edog = dogs_at.pop(bp, None)
+                if edog is None:
+                    continue  # hunden her er allerede skudt i dette tick
+                edog.alive = False
+            else:
+                # Slange-kollision (rammer modstanderen)
+                snake = self.snake1 if occ & OCC_SNAKE1 else self.snake2
+                if not snake.is_invincible:
+                    snake.kill(DEATH_BULLET)
+            bullet.alive = False
+            return
+
+    def new_round(self, seed=None):
+        """Start en ny runde med num_players spillere på difficulty.
+
+        Hele runden trækker fra self.rng seedet med seed (et nyt tilfældigt
+        seed hvis None), så samme seed og samme input giver samme runde.
+        Er width/height ændret siden sidst, bygges banen om i den nye størrelse.
+        På en stor bane genereres kun terrænet omkring slangerne, så rundestarten
+        koster det samme uanset banens størrelse."""
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.scores = [0, 0]
+        w, h = self.width, self.height
+        rebuilt = (self.grid.width, self.grid.height) != (w, h)
+        if rebuilt:
+            self._build_board()
+            self.enemies = []  # forrige rundes hunde stod i det gamle grid
+        # Forrige rundes ting, ruiner og hunde ud af grid'et (slangerne rydder selv op)
+        self.items.clear()
+        self.timers.clear()
+        if self.terrain is not None:
+            for key in list(self.terrain.keys):
+                self._evict_chunk(key)
+            if not rebuilt:
+                for edog in self.enemies:
+                    self.grid.remove(edog.pos(), OCC_DOG)
+        else:
+            self.grid.clear(OCC_RUIN | OCC_DOG)
+        if self._two_player:
+            self.snake1.reset((3, 3), RIGHT)
+            self.snake2.reset((w - 4, h - 4), LEFT)
+        else:
+            self.snake1.reset((w // 2, h // 2), RIGHT)
+            self.snake2.clear()
+            self.snake2.alive = False
+        # Generer ruiner og træer
+        safe = generate_safe_zones(w, h)
+        self.shortfall = {}
+        if self.terrain is not None:
+            # Stor bane: træerne står i terrain.chunks, og ruins er de indlæste ruiner
+            self.ruins = set()
+            self.trees = []
+            self.terrain.reset(seed, self.difficulty, safe)
+            self.terrain_centers = None
+            self._update_terrain()
+        else:
+            ruin_count = RUIN_COUNTS[self.difficulty]
+            self.ruins, placed = generate_ruins(ruin_count, safe, self.rng, w, h)
+            for pos in self.ruins:
+                self.grid.add(pos, OCC_RUIN)
+            # Træer (dekorative - undgå ruiner og safe zones)
+            tree_count = TREE_COUNTS[self.difficulty]
+            self.trees = generate_trees(tree_count, self.ruins | safe, self.rng, w, h)
+            # Hvad der ikke var plads til (vises i debug-overlayet)
+            if placed < ruin_count:
+                self.shortfall["ruiner"] = (placed, ruin_count)
+            if len(self.trees) < tree_count:
+                self.shortfall["træer"] = (len(self.trees), tree_count)
+        self.bullets = []
+        self.enemies = []
+        self.enemy_spawn_ready = 0
+        self._spawn_food(FOOD_NORMAL, self.spawn_scale)
+        diff = DIFFICULTIES[self.difficulty]
+        self.fps = diff[1]
+        self.over = False
+        self.game_tick = 0
+        self.special_food_ready = 0
+        self.coin_spawn_ready = 0
+        self.auto_shoot_ready = [0, 0]
+        self.vacuum_ready = [0, 0]
+        self.mega_food_timer = 0.0       # sekund-tæller for mega-food
+        self.mega_food_spawned = 0       # antal mega-food spawnet denne runde
+
+    def step(self, inputs=()):
+        """Kør ét game-tick. inputs[i] er spiller i+1's PlayerInput (mangler = intet input)."""
+        if self.over:
+            return
+        inputs = list(inputs) + [PlayerInput()] * (2 - len(inputs))
+        if self.recorder is not None:
+            self.recorder.record(self.game_tick, inputs)
+
+        # Retningstryk og enkeltskud siden sidste tick (skuddet tager nuværende retning)
+        for pidx, snake in ((0, self.snake1), (1, self.snake2)):
+            for direction in inputs[pidx].turns:
+                snake.set_direction(direction)
+            if self.gun_type[pidx] != GUN_AUTO:
+                for _ in range(inputs[pidx].shots):
+                    self._shoot(pidx)
+
+        self.game_tick += 1
+
+        self.snake1.move()
+        if self._two_player:
+            self.snake2.move()
+        if self.terrain is not None:
+            self._update_terrain()
+
+        self.snake1.check_wall_collision()
+        if self._two_player:
+            self.snake2.check_wall_collision()
+
+        self.snake1.check_self_collision()
+        if self._two_player:
+            self.snake2.check_self_collision()
+
+        # Ruin-kollision
+        self.snake1.check_ruin_collision()
+        if self._two_player:
+            self.snake2.check_ruin_collision()
+
+        if self._two_player and self.snake1.alive and self.snake2.alive:
+            s1_hit_s2 = self.snake2.occupies(self.snake1.head())
+            s2_hit_s1 = self.snake1.occupies(self.snake2.head())
+            head_on = self.snake1.head() == self.snake2.head()
+
+            if head_on:
+                if not self.snake1.is_invincible:
+                    self.snake1.kill(DEATH_HEAD_ON)
+                if not self.snake2.is_invincible:
+                    self.snake2.kill(DEATH_HEAD_ON)
+            else:
+                if s1_hit_s2 and not self.snake1.is_invincible:
+                    self.snake1.kill(DEATH_SNAKE)
+                    if not self.snake2.is_invincible:
+                        self.snake2.kill(DEATH_SNAKE)
+                if s2_hit_s1 and not self.snake2.is_invincible:
+                    self.snake2.kill(DEATH_SNAKE)
+                    if not self.snake1.is_invincible:
+                        self.snake1.kill(DEATH_SNAKE)
+
+        eaten = []
+        for pidx, snake in self._live_snakes():
+            for food in self.items.at(snake.head(), ITEM_FOOD):
+                self.scores[pidx] += food.points
+                snake.grow()
+                if food.food_type == FOOD_INVINCIBLE:
+                    snake.invincible_timer = 50
+                self.items.remove(food)
+                eaten.append((pidx, food))
+
+        for pidx, food in eaten:
+            self.emit("eat", pidx, food)
+
+        self._expire_items()
+
+        # Én almindelig madvare per standardbane-areal ligger altid klar
+        scale = self.spawn_scale
+        missing = scale - self.items.food_counts[FOOD_NORMAL]
+        if missing > 0:
+            self._spawn_food(FOOD_NORMAL, missing)
+
+        if self.game_tick >= self.special_food_ready:
+            roll = self.rng.random()
+            if roll < 0.03:
+                self._spawn_food(FOOD_BONUS, scale)
+                self.special_food_ready = self.game_tick + 30
+            elif roll < 0.04:
+                self._spawn_food(FOOD_INVINCIBLE, scale)
+                self.special_food_ready = self.game_tick + 60
+
+        # --- Mega-food (100 point, 20 per 10 minutter) ---
+        if self.mega_food_spawned < 20:
+            self.mega_food_timer += 1.0 / self.fps
+            if self.mega_food_timer >= MEGA_FOOD_INTERVAL:
+                self.mega_food_timer = 0.0
+                self.mega_food_spawned += 1
+                self._spawn_food(FOOD_MEGA, scale)
+
+        # --- Coins ---
+        if self.game_tick >= self.coin_spawn_ready:
+            if self.rng.random() < 0.15:
+                self._spawn_coin(scale)
+                self.coin_spawn_ready = self.game_tick + 8
+            else:
+                self.coin_spawn_ready = self.game_tick + 3
+
+        # --- Money Bills (pengesedler) - sjældnere end coins ---
+        if self.rng.random() < 0.003:  # ~0.3% chance per tick
+            self._spawn_money_bill(scale)
+
+        # Coin opsamling
+        coin_eaten = []
+        for pidx, snake in self._live_snakes():
+            for coin in self.items.at(snake.head(), ITEM_COIN):
+                self.coins[pidx] += 1
+                self.items.remove(coin)
+                coin_eaten.append(coin)
+        if coin_eaten:
+            self.emit("pickup", ITEM_COIN, coin_eaten)
+
+        # Money Bill opsamling (10 coins!)
+        bills_eaten = []
+        for pidx, snake in self._live_snakes():
+            for bill in self.items.at(snake.head(), ITEM_BILL):
+                self.coins[pidx] += MONEY_BILL_VALUE
+                self.items.remove(bill)
+                bills_eaten.append(bill)
+        if bills_eaten:
+            self.emit("pickup", ITEM_BILL, bills_eaten)
+
+        # --- Auto-kanon (hold-to-fire) ---
+        for pidx in range(2 if self._two_player else 1):
+            if self.gun_type[pidx] == GUN_AUTO:
+                if inputs[pidx].hold:
+                    if self.game_tick >= self.auto_shoot_ready[pidx]:
+                        self._shoot(pidx)
+                        self.auto_shoot_ready[pidx] = self.game_tick + AUTO_SHOOT_INTERVAL
+                else:
+                    self.auto_shoot_ready[pidx] = 0  # klar til at skyde med det samme
+
+        # --- Støvsuger (hold-to-suck) ---
+        for pidx in range(2 if self._two_player else 1):
+            if self.gun_type[pidx] == GUN_VACUUM:
+                if inputs[pidx].hold and self.power[pidx] > 0:
+                    self.vacuum_active[pidx] = True
+                    if self.game_tick >= self.vacuum_ready[pidx]:
+                        self.power[pidx] -= 1
+                        self._vacuum_suck(pidx)
+                        self.vacuum_ready[pidx] = self.game_tick + VACUUM_INTERVAL
+                        self.emit("vacuum", pidx)
+                else:
+                    self.vacuum_active[pidx] = False
+                    self.vacuum_ready[pidx] = 0
+            else:
+                self.vacuum_active[pidx] = False
+
+        # --- Bullets ---
+        if self.bullets:
+            dogs_at = {edog.pos(): edog for edog in self.enemies if edog.alive}
+            for bullet in self.bullets:
+                self._sweep_bullet(bullet, dogs_at)
+            self.bullets = [b for b in self.bullets if b.alive]
+
+        # --- Fjendtlige hunde (Svær + Vanvid) ---
+        if self.difficulty >= 2:
+            # Spawn nye hunde med jævne mellemrum
+            if self.game_tick >= self.enemy_spawn_ready:
+                interval, max_enemies = STRESS_ENEMY_SPAWN if self.stress else ENEMY_SPAWN[self.difficulty]
+                self.enemy_spawn_ready = self.game_tick + interval
+                if len(self.enemies) < max_enemies:
+                    pos = self._dog_spawn_pos()
+                    if pos is not None:
+                        edog = EnemyDog(pos, self.rng)
+                        self.enemies.append(edog)
+                        self.grid.add(pos, OCC_DOG)
+                        self.emit("dog_spawned", edog)
+
+            # Opdater hunde-AI: ét fælles afstandsfelt fra alle levende slangehoveder,
+            # hvor ruiner og slangekroppe spærrer. På en stor bane regnes feltet kun
+            # DOG_CHASE_RADIUS ud, og hunde der er sluppet af med slangerne forsvinder.
+            # Feltet regnes kun på ticks hvor en hund skal gå, og kun ud til de
+            # celler de hunde læser (deres egen og naboerne)
+            heads = [snake.head() for _, snake in self._live_snakes()]
+            if heads and self.enemies:
+                large = self.large_map
+                tick = self.game_tick
+                due = [edog.pos() for edog in self.enemies if edog.alive and tick >= edog.next_move]
+                if due:
+                    self.dog_field.compute(heads, self.grid, OCC_RUIN | OCC_SNAKES,
+                                           DOG_CHASE_RADIUS if large else None, due)
+                for edog in self.enemies:
+                    if edog.alive:
+                        edog.update(self.dog_field, self.grid, self.game_tick, heads if large else None)
+                        if large and all(max(abs(edog.x - hx), abs(edog.y - hy)) > DOG_LEAVE_RADIUS
+                                         for hx, hy in heads):
+                            edog.alive = False
+
+            # Hund der går ind i en kugle = dø (kugler på banen ramte allerede i sweepet)
+            if self.bullets:
+                bullets_at = {bullet.pos(): bullet for bullet in self.bullets}
+                for edog in self.enemies:
+                    bullet = bullets_at.get(edog.pos()) if edog.alive else None
+                    if bullet is not None and bullet.alive:
+                        edog.alive = False
+                        bullet.alive = False
+                self.bullets = [b for b in self.bullets if b.alive]
+
+            # Hund rammer slange = dræb slangen
+            for edog in self.enemies:
+                if not edog.alive:
+                    continue
+                ep = edog.pos()
+                if self.snake1.alive and ep == self.snake1.head():
+                    if not self.snake1.is_invincible:
+                        self.snake1.kill(DEATH_DOG)
+                    edog.alive = False
+                if self._two_player and self.snake2.alive and ep == self.snake2.head():
+                    if not self.snake2.is_invincible:
+                        self.snake2.kill(DEATH_DOG)
+                    edog.alive = False
+
+            for edog in self.enemies:
+                if not edog.alive:
+                    self.grid.remove(edog.pos(), OCC_DOG)
+            self.enemies = [e for e in self.enemies if e.alive]
+
+        self._update_speed()
+
+        if not self.snake1.alive or (self._two_player and not self.snake2.alive):
+            self.over = True
+            self.emit("round_over")
+
+    def _live_snakes(self):
+        """(spillerindeks, slange) for de levende slanger i spillet."""
+        live = []
+        if self.snake1.alive:
+            live.append((0, self.snake1))
+        if self._two_player and self.snake2.alive:
+            live.append((1, self.snake2))
+        return live
+
+    def _expire_items(self):
+        """Fjern på én gang alle ting hvis levetid udløber i dette tick.
+
+        Ting der allerede er spist eller samlet op ligger stadig i hjulet og
+        springes bare over her."""
+        for item in self.timers.pop_due(self.game_tick):
+            if item in self.items:
+                self.items.remove(item)
+
+    def _update_speed(self):
+        diff = DIFFICULTIES[self.difficulty]
+        _, start_fps, max_fps, increase_every = diff
+        total = self.scores[0] + self.scores[1]
+        self.fps = min(start_fps + total // increase_every, max_fps)
@@ -0,0 +1,199 @@
+"""SQLite i stedet for savedata.json og highscores.json (python snake.py --db snake.db).
+
+Flere spil-instanser kan dele én database: den kører i WAL-mode, så
+læsere ikke blokerer skriveren, og en instans der venter på en lås prøver
+igen i BUSY_TIMEOUT sekunder i stedet for at fejle. Hver skrivning er én
+transaktion. Tabellerne:
+
+    profiles   én række per profil (spiller-plads, fx "p1") med slange-type og kanon
+    wallets    profilens coins, ammo og strøm
+    purchases  alt der er købt i butikken (profil, vare, pris, tidspunkt)
+    scores     highscores per {num_players}p_{difficulty}, indekseret på (bucket, score)
+
+Coins, ammo og strøm gemmes som ændringen siden instansen sidst læste eller
+skrev profilen, lagt til i databasen i én transaktion. To instanser med
+samme profil overskriver derfor ikke hinandens indtjening, men ser heller
+ikke hinandens saldo før de starter igen, og bruger de samme coins, ender
+saldoen på 0 (ikke negativ) - giv hver instans sine egne profiler
+(--profiles). Våben og slange-type er et valg; den sidste der gemmer, vinder.
+
+SQL'en står som konstanter med ?-parametre, så sqlite3's statement-cache
+genbruger de forberedte statements. Første gang en tom database åbnes med
+migrate_json(), kopieres pengepungene og highscores fra JSON-filerne over."""
+import sqlite3
+import time
+
+from highscores import HIGHSCORE_LIMIT, HighscoreStore
+
+BUSY_TIMEOUT = 5.0
+WALLET_FIELDS = ("coins", "ammo", "power", "gun", "snake_type")
+AMOUNTS = ("coins", "ammo", "power")  # tælles som ændringer (se modulets docstring)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    snake_type TEXT,
+    gun TEXT
+);
+CREATE TABLE IF NOT EXISTS wallets (
+    profile_id INTEGER PRIMARY KEY REFERENCES profiles(id),
+    coins INTEGER NOT NULL DEFAULT 0,
+    ammo INTEGER NOT NULL DEFAULT 0,
+    power INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL REFERENCES profiles(id),
+    item TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS purchases_profile ON purchases(profile_id, at);
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_rank ON scores(bucket, score DESC, id);
+"""
+
+SQL_PROFILE = "INSERT INTO profiles (name) VALUES (?) ON CONFLICT(name) DO NOTHING"
+SQL_PROFILE_ID = "SELECT id FROM profiles WHERE name = ?"
+SQL_LOAD_WALLET = """
+SELECT w.coins, w.ammo, w.power, p.gun, p.snake_type
+FROM profiles p LEFT JOIN wallets w ON w.profile_id = p.id WHERE p.name = ?"""
+SQL_SAVE_PROFILE = "UPDATE profiles SET gun = ?, snake_type = ? WHERE id = ?"
+SQL_SAVE_WALLET = """
+INSERT INTO wallets (profile_id, coins, ammo, power) VALUES (?, ?, ?, ?)
+ON CONFLICT(profile_id) DO UPDATE SET coins = excluded.coins, ammo = excluded.ammo, power = excluded.power"""
+SQL_WALLET_ROW = "INSERT INTO wallets (profile_id) VALUES (?) ON CONFLICT(profile_id) DO NOTHING"
+SQL_ADD_WALLET = """
+UPDATE wallets SET coins = MAX(0, coins + ?), ammo = MAX(0, ammo + ?), power = MAX(0, power + ?)
+WHERE profile_id = ?"""
+SQL_PURCHASE = "INSERT INTO purchases (profile_id, item, price, at) VALUES (?, ?, ?, ?)"
+SQL_ADD_SCORE = "INSERT INTO scores (bucket, name, score, at) VALUES (?, ?, ?, ?)"
+SQL_RANK = "SELECT COUNT(*) FROM scores WHERE bucket = ? AND score >= ?"
+SQL_PLACE = "SELECT COUNT(*) FROM scores WHERE bucket = ? AND (score > ? OR (score = ? AND id <= ?))"
+SQL_BEST = "SELECT MAX(score) FROM scores WHERE bucket = ?"
+SQL_TOP = "SELECT name, score FROM scores WHERE bucket = ? ORDER BY score DESC, id LIMIT ? OFFSET ?"
+SQL_COUNT = "SELECT COUNT(*) FROM scores WHERE bucket = ?"
+SQL_TRIM = """
+DELETE FROM scores WHERE id IN (
+    SELECT id FROM scores WHERE bucket = ? ORDER BY score DESC, id LIMIT -1 OFFSET ?)"""
+SQL_META_GET = "SELECT value FROM meta WHERE key = ?"
+SQL_META_SET = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+
+
+class SqliteStore:
+    """Pengepunge, køb og highscores i én SQLite-database.
+
+    Har samme metoder som JsonWallets (snake.py) og HighscoreStore, så Game
+    kan bruge den i stedet for begge."""
+
+    def __init__(self, path, limit=HIGHSCORE_LIMIT):
+        self.path = path
+        self.limit = limit
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.profile_ids = {}
+        self.amounts = {}  # profil -> (coins, ammo, power) som instansen sidst læste eller skrev
+
+    def close(self):
+        self.db.close()
+
+    def _profile_id(self, name):
+        """Profilens id; profilen oprettes første gang den bruges."""
+        if name not in self.profile_ids:
+            self.db.execute(SQL_PROFILE, (name,))
+            self.profile_ids[name] = self.db.execute(SQL_PROFILE_ID, (name,)).fetchone()[0]
+        return self.profile_ids[name]
+
+    # --- Pengepung og køb ---
+    def load_wallets(self, profiles):
+        """{profil: {coins, ammo, power, gun, snake_type}}; felter der ikke er gemt, mangler."""
+        wallets = {}
+        for name in profiles:
+            self._profile_id(name)
+            row = self.db.execute(SQL_LOAD_WALLET, (name,)).fetchone()
+            wallets[name] = {field: value for field, value in zip(WALLET_FIELDS, row) if value is not None}
+            self.amounts[name] = tuple(wallets[name].get(field, 0) for field in AMOUNTS)
+        return wallets
+
+    def _write_wallets(self, wallets):
+        """Skriv pengepungene som de er (migrering)."""
+        for name, w in wallets.items():
+            profile_id = self._profile_id(name)
+            self.db.execute(SQL_SAVE_PROFILE, (w.get("gun"), w.get("snake_type"), profile_id))
+            self.db.execute(SQL_SAVE_WALLET, (profile_id, w.get("coins", 0), w.get("ammo", 0), w.get("power", 0)))
+
+    def save_wallets(self, wallets):
+        """Gem {profil: pengepung} i én transaktion; coins, ammo og strøm som ændringer."""
+        amounts = {name: tuple(w.get(field, 0) for field in AMOUNTS) for name, w in wallets.items()}
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            for name, w in wallets.items():
+                profile_id = self._profile_id(name)
+                before = self.amounts.get(name, (0,) * len(AMOUNTS))
+                deltas = [now - old for now, old in zip(amounts[name], before)]
+                self.db.execute(SQL_SAVE_PROFILE, (w.get("gun"), w.get("snake_type"), profile_id))
+                self.db.execute(SQL_WALLET_ROW, (profile_id,))
+                self.db.execute(SQL_ADD_WALLET, (*deltas, profile_id))
+        self.amounts.update(amounts)
+
+    def record_purchase(self, profile, item, price):
+        self.db.execute(SQL_PURCHASE, (self._profile_id(profile), item, price, time.time()))
+
+    # --- Highscores (som HighscoreStore) ---
+    def rank(self, key, score):
+        return self.db.execute(SQL_RANK, (key, score)).fetchone()[0] + 1
+
+    def qualifies(self, key, score):
+        return score > 0 and self.rank(key, score) <= self.limit
+
+    def best(self, key):
+        return self.db.execute(SQL_BEST, (key,)).fetchone()[0] or 0
+
+    def top(self, key, count, offset=0):
+        return [{"name": name, "score": score}
+                for name, score in self.db.execute(SQL_TOP, (key, count, offset))]
+
+    def count(self, key):
+        return self.db.execute(SQL_COUNT, (key,)).fetchone()[0]
+
+    def add(self, key, name, score):
+        """Tilføj en score; returnerer pladsen (1 = bedst) eller None hvis den faldt uden for listen."""
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            row_id = self.db.execute(SQL_ADD_SCORE, (key, name, score, time.time())).lastrowid
+            place = self.db.execute(SQL_PLACE, (key, score, score, row_id)).fetchone()[0]
+            self.db.execute(SQL_TRIM, (key, self.limit))
+        return place if place <= self.limit else None
+
+    # --- Migrering ---
+    def migrate_json(self, wallets, highscore_path):
+        """Kopiér alle pengepungene (læst fra savedata.json, {profil: pengepung}) og
+        highscores.json (+ journal) ind - kun første gang databasen åbnes.
+
+        JSON-filerne røres ikke (heller ikke en halvt skrevet journal-linje).
+        Returnerer True hvis der blev migreret."""
+        if self.db.execute(SQL_META_GET, ("migrated_json",)).fetchone():
+            return False
+        scores = HighscoreStore(highscore_path, limit=self.limit, repair=False)
+        now = time.time()
+        for name in wallets:
+            self._profile_id(name)  # uden for transaktionen, så den kun skriver
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            if self.db.execute(SQL_META_GET, ("migrated_json",)).fetchone():
+                return False  # en anden instans nåede det først
+            self._write_wallets(wallets)
+            for key, entries in scores.lists.items():
+                self.db.executemany(SQL_ADD_SCORE, ((key, name, -neg, now) for neg, _, name in entries))
+            self.db.execute(SQL_META_SET, ("migrated_json", str(int(now))))
+        return True
@@ -0,0 +1,505 @@
+"""Lyd-syntese et helt signal ad gangen i stedet for sample for sample.
+
+Et signal er et NumPy-array når NumPy er installeret, ellers et Signal
+(en liste med regneoperatorer) så det også kører i Pygbag uden NumPy. En
+opskrift skrives én gang med +, -, *, / og funktionerne her (sin, maximum,
+minimum, where, clip, noise, ...) og giver samme samples med begge.
+
+Opskrifterne i SOUNDS står som de oprindelige sample-løkker, bare for alle
+samples på én gang: frac er i / n, t er i / sample_rate. Støj trækkes stadig
+fra en random.Random med fast seed, så lydene er de samme hver gang.
+render(navn) giver 16-bit mono PCM til pygame.mixer.Sound(buffer=...).
+
+Fordi lydene er de samme hver gang, gemmer load(navn) dem i sound_cache/
+som rå PCM-filer med en hash af denne fil, navnet og sample-raten i
+filnavnet. Næste opstart læser bare filen; ændres en opskrift (eller noget
+andet her), passer hashen ikke længere, og lyden renderes og gemmes igen.
+"python synth.py" fylder cachen på forhånd, fx før pygbag, så den kommer
+med i web-bundtet."""
+import hashlib
+import math
+import operator
+import os
+import random
+import sys
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # fx Pygbag: Signal-listerne bruges i stedet
+    np = None
+
+TWO_PI = 2 * math.pi
+
+
+# --- Signal uden NumPy ---
+class Signal:
+    """Samples som en liste, med elementvise operatorer (tal udvides til hele signalet)."""
+
+    __slots__ = ("v",)
+
+    def __init__(self, values):
+        self.v = values
+
+    def __len__(self):
+        return len(self.v)
+
+    def _zip(self, other, op):
+        return Signal(list(map(op, self.v, other.v)))
+
+    def __add__(self, other):
+        if isinstance(other, Signal):
+            return self._zip(other, operator.add)
+        return Signal([a + other for a in self.v])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Signal):
+            return self._zip(other, operator.sub)
+        return Signal([a - other for a in self.v])
+
+    def __rsub__(self, other):
+        return Signal([other - a for a in self.v])
+
+    def __mul__(self, other):
+        if isinstance(other, Signal):
+            return self._zip(other, operator.mul)
+        return Signal([a * other for a in self.v])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Signal):
+            return self._zip(other, operator.truediv)
+        return Signal([a / other for a in self.v])
+
+    def __rtruediv__(self, other):
+        return Signal([other / a for a in self.v])
+
+    def __pow__(self, other):
+        return Signal([a ** other for a in self.v])
+
+    def __mod__(self, other):
+        return Signal([a % other for a in self.v])
+
+    def __neg__(self):
+        return Signal([-a for a in self.v])
+
+    def __lt__(self, other):
+        if isinstance(other, Signal):
+            return self._zip(other, operator.lt)
+        return Signal([a < other for a in self.v])
+
+    def __gt__(self, other):
+        if isinstance(other, Signal):
+            return self._zip(other, operator.gt)
+        return Signal([a > other for a in self.v])
+
+
+# --- Signaler og funktioner (NumPy eller Signal) ---
+def index(n):
+    """0, 1, ..., n - 1 som heltal."""
+    return np.arange(n) if np is not None else Signal(list(range(n)))
+
+
+def ramp(n, scale):
+    """i / scale for i = 0 .. n - 1 (frac med scale = n, tid med scale = sample_rate)."""
+    if np is not None:
+        return np.arange(n) / scale
+    return Signal([i / scale for i in range(n)])
+
+
+def constant(n, value):
+    return np.full(n, float(value)) if np is not None else Signal([float(value)] * n)
+
+
+def noise(rng, n):
+    """n samples hvid støj i [-1, 1) fra rng (samme tal som rng.random() * 2 - 1 én ad gangen).
+
+    Med NumPy flyttes rng's Mersenne Twister-tilstand over i en RandomState,
+    der trækker de samme 53-bit tal på én gang; bagefter står rng hvor den
+    ville have stået efter n kald."""
+    if np is None:
+        return Signal([rng.random() * 2 - 1 for _ in range(n)])
+    version, state, gauss = rng.getstate()
+    mt = np.random.RandomState()
+    mt.set_state(("MT19937", np.array(state[:-1], dtype=np.uint32), state[-1]))
+    values = mt.random_sample(n)
+    _, keys, pos = mt.get_state()[:3]
+    rng.setstate((version, tuple(int(k) for k in keys) + (int(pos),), gauss))
+    return values * 2 - 1
+
+
+def sin(x):
+    if np is not None:
+        return np.sin(x)
+    if isinstance(x, Signal):
+        return Signal(list(map(math.sin, x.v)))
+    return math.sin(x)
+
+
+def osc(freq, t):
+    """Sinus-oscillator: sin(2 pi freq t); freq kan være et tal eller et signal (sweep)."""
+    return sin(TWO_PI * freq * t)
+
+
+def maximum(x, value):
+    """Elementvis max(x, value) - value er et tal eller et signal."""
+    if np is not None:
+        return np.maximum(x, value)
+    if isinstance(value, Signal):
+        return Signal([a if a > b else b for a, b in zip(x.v, value.v)])
+    return Signal([a if a > value else value for a in x.v])
+
+
+def minimum(x, value):
+    """Elementvis min(x, value) - value er et tal eller et signal."""
+    if np is not None:
+        return np.minimum(x, value)
+    if isinstance(value, Signal):
+        return Signal([a if a < b else b for a, b in zip(x.v, value.v)])
+    return Signal([a if a < value else value for a in x.v])
+
+
+def clip(x, lo, hi):
+    """Hård klipning (forvrængning) til [lo, hi]."""
+    return maximum(minimum(x, hi), lo)
+
+
+def where(cond, a, b):
+    """a hvor cond er sand, ellers b (a og b kan være tal eller signaler)."""
+    if np is not None:
+        return np.where(cond, a, b)
+    av = a.v if isinstance(a, Signal) else [a] * len(cond)
+    bv = b.v if isinstance(b, Signal) else [b] * len(cond)
+    return Signal([x if c else y for c, x, y in zip(cond.v, av, bv)])
+
+
+def concat(signals):
+    if np is not None:
+        return np.concatenate(signals) if signals else np.zeros(0)
+    out = []
+    for s in signals:
+        out.extend(s.v)
+    return Signal(out)
+
+
+def pcm16(s):
+    """Signal i [-1, 1] som 16-bit little-endian PCM; int() runder mod 0 og klipper som før."""
+    if np is not None:
+        return np.clip((np.asarray(s) * 32767).astype(np.int64), -32768, 32767).astype("<i2").tobytes()
+    pcm = array("h", [-32768 if v < -32768 else 32767 if v > 32767 else v
+                      for v in [int(a * 32767) for a in s.v]])
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    return pcm.tobytes()
+
+
+# --- Opskrifter ---
+def _axes(duration, rate):
+    n = int(rate * duration)
+    return n, ramp(n, rate), ramp(n, n)
+
+
+def shoot_basic(rate):
+    """SHOTGUN BLAST - massiv eksplosion."""
+    dur = 0.35
+    n, t, frac = _axes(dur, rate)
+    # Massiv noise-eksplosion de første 60ms
+    noise_env = where(frac < 0.18, maximum(1.0 - frac * 5, 0.0), maximum(0.3 * (1.0 - frac * 2), 0.0))
+    noise_s = noise_env * noise(random.Random(99), n)
+    # Dyb tone-sweep 1500->60Hz
+    freq = 1500 * (1.0 - frac) ** 2 + 60
+    tone = maximum(1.0 - frac * 2.0, 0.0) * osc(freq, t)
+    # Distorted bass-punch 55Hz
+    bass_env = where(frac < 0.35, maximum(1.0 - frac * 3, 0.0), 0.0)
+    bass = bass_env * 0.8 * clip(osc(55, t) * 3.0, -1.0, 1.0)
+    # Mid-crunch 300Hz
+    crunch_env = where(frac < 0.25, maximum(1.0 - frac * 4, 0.0), 0.0)
+    crunch = crunch_env * 0.4 * osc(300, t)
+    return (0.40 * noise_s + 0.30 * tone + 0.20 * bass + 0.10 * crunch) * 1.3
+
+
+def shoot_auto(rate):
+    """EXPLOSIVE BURST - distorted laser-eksplosion."""
+    dur = 0.18
+    n, t, frac = _axes(dur, rate)
+    # Noise-blast
+    noise_env = where(frac < 0.15, maximum(1.0 - frac * 6, 0.0), 0.0)
+    noise_s = noise_env * noise(random.Random(55), n)
+    # Dobbelt distorted laser-sweep
+    env = maximum(1.0 - frac * 2.5, 0.0)
+    raw1 = osc(2800 - 2400 * frac, t)
+    raw2 = osc(1800 - 1500 * frac, t)
+    zap = env * (0.35 * clip(raw1 * 2.5, -1.0, 1.0) + 0.25 * clip(raw2 * 2.0, -1.0, 1.0))
+    # Bass-thump
+    bass_env = where(frac < 0.2, maximum(1.0 - frac * 5, 0.0), 0.0)
+    bass = bass_env * 0.5 * osc(90, t)
+    return (0.35 * noise_s + 0.45 * zap + 0.20 * bass) * 1.2
+
+
+def shoot_quad(rate):
+    """MEGA-BOOM - massiv eksplosion med sub-bass og ekko."""
+    dur = 0.55
+    n, t, frac = _axes(dur, rate)
+    # Full-clip noise-eksplosion
+    noise_env = where(frac < 0.25, maximum(1.0 - frac * 4, 0.0), maximum(0.2 * (1.0 - frac * 1.5), 0.0))
+    noise_s = noise_env * noise(random.Random(77), n)
+    # Cubic sweep 800->25Hz for ekstra tyngde
+    sweep_frac = minimum(frac * 1.5, 1.0)
+    freq = 800 * (1.0 - sweep_frac) ** 3 + 25
+    tone = maximum(1.0 - frac * 1.5, 0.0) * osc(freq, t)
+    # Sub-bass vibrato 35Hz med tremolo
+    sub_env = maximum(1.0 - frac * 1.8, 0.0)
+    sub = sub_env * 0.7 * osc(35, t) * (1.0 + 0.5 * osc(8, t))
+    # Distorted mid-crunch
+    crunch_env = where(frac < 0.3, maximum(1.0 - frac * 3, 0.0), 0.0)
+    crunch_raw = osc(200, t) + 0.5 * osc(150, t)
+    crunch = crunch_env * 0.4 * clip(crunch_raw * 3.0, -1.0, 1.0)
+    # Ekko-bølge efter 120ms
+    te = t - 0.12
+    echo_frac = te / (dur - 0.12)
+    echo_env = maximum(0.5 * (1.0 - echo_frac * 2), 0.0)
+    echo = where(t > 0.12, echo_env * osc(300 - 250 * echo_frac, te), 0.0)
+    return (0.30 * noise_s + 0.25 * tone + 0.20 * sub + 0.15 * crunch + 0.10 * echo) * 1.5
+
+
+def shoot_vacuum(rate):
+    """STØVSUGER-HVINEN - stigende sug med luft-woosh."""
+    dur = 0.25
+    n, t, frac = _axes(dur, rate)
+    # Luftstrøm-noise (konstant sugelyd)
+    air_env = 0.6 * (0.8 + 0.2 * osc(12, t))
+    air = air_env * noise(random.Random(33), n)
+    # Stigende hvine-tone 200->800Hz (sugelyd)
+    whine = (0.5 + 0.3 * frac) * osc(200 + 600 * frac, t)
+    # Dyb motor-brummen 60Hz
+    motor = 0.3 * osc(60, t) * (1.0 + 0.4 * osc(6, t))
+    # Fade in/out
+    fade = minimum(frac * 8, 1.0) * minimum((1.0 - frac) * 5, 1.0)
+    return fade * (0.35 * air + 0.40 * whine + 0.25 * motor)
+
+
+def death(rate):
+    """Faldende tone (0.4s, 500->80Hz)."""
+    n, t, frac = _axes(0.4, rate)
+    vol = 0.3 * (1 - frac * 0.7)
+    return vol * osc(500 - 420 * frac, t)
+
+
+def coin_pling(rate):
+    """Kort krystalklart pling."""
+    n, t, frac = _axes(0.15, rate)
+    env = where(frac < 0.33, maximum(1.0 - frac * 3, 0.0), maximum((1.0 - frac) * 1.5, 0.0))
+    # Høj klar tone 1200Hz + overtone 2400Hz
+    s = env * (0.5 * osc(1200, t) + 0.3 * osc(2400, t) + 0.2 * osc(3600, t))
+    return s * 0.4
+
+
+def _bumps(frac, first, second):
+    """To "bid" (halve sinus-buer) ved frac 0-0.4 og 0.5-0.9 med styrke first og second."""
+    bite1 = sin(math.pi * (frac / 0.4)) * first
+    bite2 = sin(math.pi * minimum((frac - 0.5) / 0.4, 1.0)) * second
+    return where(frac < 0.4, bite1, where(frac < 0.5, 0.0, bite2))
+
+
+def eat_apple(rate):
+    """To korte bløde "nam" lyde."""
+    n, t, frac = _axes(0.3, rate)
+    env = _bumps(frac, 0.8, 0.6)
+    # Blød crunch-lyd (lav tone + lidt noise)
+    tone = osc(180, t) + 0.5 * osc(300, t)
+    noise_s = noise(random.Random(42), n) * 0.3
+    return env * (0.6 * tone + 0.4 * noise_s) * 0.35
+
+
+def mega_spawn(rate):
+    """Majestætisk stigende akkord (C5, E5, G5 og C6 forskudt)."""
+    n, t, frac = _axes(1.2, rate)
+    # Fade in hurtigt, hold, fade ud blødt
+    env = where(frac < 0.05, frac / 0.05, where(frac < 0.7, 1.0, maximum((1.0 - frac) / 0.3, 0.0)))
+    c5, e5, g5, c6 = 523.25, 659.25, 783.99, 1046.50
+    t1 = osc(c5, t) * minimum(t * 8, 1.0)
+    t2 = osc(e5, t) * minimum(maximum((t - 0.1) * 6, 0.0), 1.0)
+    t3 = osc(g5, t) * minimum(maximum((t - 0.2) * 5, 0.0), 1.0)
+    t4 = osc(c6, t) * minimum(maximum((t - 0.35) * 4, 0.0), 1.0)
+    # Shimmer
+    shimmer = 0.15 * osc(12, t) * osc(g5 * 2, t)
+    return env * (0.25 * t1 + 0.25 * t2 + 0.25 * t3 + 0.15 * t4 + 0.10 * shimmer) * 0.5
+
+
+def enemy_bark(rate):
+    """Aggressivt gø: to hurtige "vov"."""
+    n, t, frac = _axes(0.2, rate)
+    env = where(frac < 0.9, _bumps(frac, 0.9, 0.7), 0.0)
+    # Rå tone 150Hz + noise for gø-lyd
+    tone = osc(150, t) + 0.6 * osc(250, t)
+    noise_s = noise(random.Random(66), n) * 0.4
+    return env * (0.55 * tone + 0.45 * noise_s) * 0.45
+
+
+def melody(notes, vol, rate, attack=0.08, release=0.15):
+    """notes: [(freq, dur_sek), ...] med attack/sustain/release per node (freq 0 = pause)."""
+    att_s = int(rate * attack)
+    rel_s = int(rate * release)
+    parts = []
+    for freq, dur in notes:
+        ns = int(rate * dur)
+        if freq <= 0:
+            parts.append(constant(ns, 0.0))
+            continue
+        j = index(ns)
+        env = where(j < att_s, j / att_s, where(j > ns - rel_s, (ns - j) / rel_s, 1.0))
+        parts.append(vol * env * osc(freq, ramp(ns, rate)))
+    return concat(parts)
+
+
+# Noder (Hz)
+_C3, _E3, _G3, _A3, _B3 = 130.81, 164.81, 196.00, 220.00, 246.94
+_C4, _D4, _E4, _F4, _G4 = 261.63, 293.66, 329.63, 349.23, 392.00
+_A4, _B4, _C5 = 440.00, 493.88, 523.25
+_R = 0  # pause
+
+MENU_NOTES = [
+    (_E4, 0.45), (_G4, 0.45), (_C5, 0.6), (_B4, 0.3), (_G4, 0.45),
+    (_E4, 0.45), (_F4, 0.45), (_A4, 0.6), (_G4, 0.3), (_E4, 0.45),
+    (_C4, 0.45), (_D4, 0.45), (_F4, 0.45), (_E4, 0.6), (_R, 0.2),
+    (_C4, 0.45), (_D4, 0.45), (_E4, 0.45), (_G4, 0.45), (_C5, 0.6),
+    (_A4, 0.3), (_G4, 0.45), (_E4, 0.45), (_D4, 0.45), (_C4, 0.6),
+    (_R, 0.3),
+]
+
+GAME_NOTES = [
+    (_A3, 0.16), (_C4, 0.16), (_E4, 0.16), (_A4, 0.12), (_E4, 0.12),
+    (_C4, 0.16), (_D4, 0.16), (_F4, 0.16), (_D4, 0.12), (_A3, 0.12),
+    (_E3, 0.16), (_G3, 0.16), (_B3, 0.16), (_E4, 0.12), (_B3, 0.12),
+    (_A3, 0.22), (_R, 0.06), (_G3, 0.16), (_E3, 0.16), (_A3, 0.22),
+    (_R, 0.08),
+    (_A3, 0.12), (_E4, 0.12), (_C4, 0.16), (_A3, 0.12), (_E3, 0.16),
+    (_G3, 0.16), (_A3, 0.22), (_R, 0.06),
+]
+
+
+def menu_music(rate):
+    """Rolig C-dur melodi med pad (ca. 10 sek loop)."""
+    mel = melody(MENU_NOTES, 0.10, rate, attack=0.06, release=0.12)
+    n = len(mel)
+    t, frac = ramp(n, rate), ramp(n, n)
+    # Blød pad underneden
+    pad = 0.025 * sin(math.pi * frac) * (osc(_C3, t) + 0.7 * osc(_G3, t) + 0.4 * osc(_E4, t * 0.5))
+    # Melodi fader lidt ind/ud ved loop-grænsen
+    mel_env = minimum(minimum(frac * 8, 1.0), (1.0 - frac) * 8)
+    return mel * mel_env + pad
+
+
+def game_music(rate):
+    """Intens A-mol melodi med pulserende bas og hi-hat (ca. 5 sek loop)."""
+    mel = melody(GAME_NOTES, 0.12, rate, attack=0.02, release=0.05)
+    n = len(mel)
+    t, i = ramp(n, rate), index(n)
+    beat = int(rate * 60.0 / 140)  # 140 bpm
+    # Pulserende bas (A2 = 110 Hz)
+    bass = 0.10 * maximum(1.0 - (i % beat) / beat * 2.5, 0.0) * osc(110, t)
+    # Hi-hat på hvert halve slag
+    half = beat // 2
+    hat = 0.018 * maximum(1.0 - (i % half) / half * 8, 0.0) * noise(random.Random(42), n)
+    return mel + bass + hat
+
+
+SOUNDS = {
+    "shoot_basic": shoot_basic,
+    "shoot_auto": shoot_auto,
+    "shoot_quad": shoot_quad,
+    "shoot_vacuum": shoot_vacuum,
+    "death": death,
+    "coin_pling": coin_pling,
+    "eat_apple": eat_apple,
+    "mega_spawn": mega_spawn,
+    "enemy_bark": enemy_bark,
+    "menu_music": menu_music,
+    "game_music": game_music,
+}
+
+
+def render(name, rate=22050):
+    """Lyden name som 16-bit mono PCM bytes."""
+    return pcm16(SOUNDS[name](rate))
+
+
+# --- Cache på disk ---
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sound_cache")
+CACHE_FORMAT = 1  # rå 16-bit little-endian mono PCM; tæl op hvis filformatet ændres
+
+
+def _source_digest():
+    try:
+        with open(__file__, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:  # kun .pyc (fx frosset program) - så caches der ikke
+        return None
+
+
+SOURCE_DIGEST = _source_digest()
+
+
+def cache_path(name, rate, cache_dir=CACHE_DIR):
+    """Cache-filen for lyden, eller None hvis der ikke kan laves en nøgle."""
+    if SOURCE_DIGEST is None:
+        return None
+    key = hashlib.sha256(f"{CACHE_FORMAT}:{name}:{rate}:{SOURCE_DIGEST}".encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{name}-{rate}-{key}.pcm")
+
+
+def _store(path, pcm):
+    """Skriv path atomisk og slet ældre versioner af samme lyd og sample-rate."""
+    directory, filename = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"  # flere spil kan starte samtidig
+    with open(tmp, "wb") as f:
+        f.write(pcm)
+    os.replace(tmp, path)
+    prefix = filename.rsplit("-", 1)[0] + "-"
+    for other in os.listdir(directory):
+        if other.startswith(prefix) and other.endswith(".pcm") and other != filename:
+            os.remove(os.path.join(directory, other))
+
+
+def load(name, rate=22050, cache_dir=CACHE_DIR):
+    """Som render(), men fra cachen hvis lyden ligger der; ellers renderes og gemmes den.
+
+    Kan cachen ikke skrives (skrivebeskyttet mappe), bruges lyden bare uden."""
+    path = cache_path(name, rate, cache_dir)
+    if path is None:
+        return render(name, rate)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+    pcm = render(name, rate)
+    try:
+        _store(path, pcm)
+    except OSError:
+        pass
+    return pcm
+
+
+def main(rate=22050):
+    if SOURCE_DIGEST is None:
+        print(f"{CACHE_DIR}: ingen cache - kilden til synth.py kan ikke læses")
+        return
+    start = time.perf_counter()
+    built = 0
+    for name in SOUNDS:
+        path = cache_path(name, rate)
+        if not os.path.exists(path):
+            _store(path, render(name, rate))
+            built += 1
+    print(f"{CACHE_DIR}: {built} af {len(SOUNDS)} lyde renderet ved {rate} Hz "
+          f"på {(time.perf_counter() - start) * 1000:.0f} ms ({'NumPy' if np is not None else 'uden NumPy'})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 22050)
@@ -0,0 +1,55 @@
+"""HighscoreStore: journalen efter et nedbrud midt i en linje."""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from highscores import HighscoreStore  # noqa: E402
+
+KEY = "1p_1"
+
+
+class TornJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "highscores.json")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def open_store(self):
+        return HighscoreStore(self.path, compact_every=1000)
+
+    def test_adds_after_torn_line_survive_reload(self):
+        store = self.open_store()
+        for name, score in (("a", 10), ("b", 12), ("c", 5)):
+            store.add(KEY, name, score)
+        with open(store.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"seq": 4, "buck')  # nedbrud midt i linjen
+
+        store = self.open_store()
+        self.assertEqual(store.count(KEY), 3)
+        store.add(KEY, "d", 200)
+        store.add(KEY, "e", 7)
+
+        store = self.open_store()
+        self.assertEqual(store.count(KEY), 5)
+        self.assertEqual(store.best(KEY), 200)
+        self.assertEqual([e["name"] for e in store.top(KEY, 5)], ["d", "b", "a", "e", "c"])
+
+    def test_line_without_newline_is_cut(self):
+        store = self.open_store()
+        store.add(KEY, "a", 10)
+        with open(store.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"seq": 2, "bucket": "1p_1", "name": "x", "score": 1}')
+
+        store = self.open_store()
+        store.add(KEY, "b", 20)
+        store = self.open_store()
+        self.assertEqual([e["name"] for e in store.top(KEY, 5)], ["b", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+"""Bot-turnering: mange headless runder med AI-politikker fordelt over alle kerner.
+
+Hver kombination af sværhedsgrad, 1/2 spillere og politik (eller par af
+politikker i 2-spiller) spilles --games gange på Simulation. Hvert spil får
+sit eget seed, så en turnering giver samme resultat uanset antal processer.
+Score-fordelinger, rundelængder, dødsårsager og vindere samles i en
+JSON-opsummering.
+
+    python tournament.py --games 500 --policies greedy,random --out tournament.json
+
+En politik er en fabrik der får en random.Random og returnerer en funktion
+(sim, player_idx) -> PlayerInput. Indbyggede politikker står i POLICIES;
+andre angives som "modul:navn"."""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from snake_sim import (
+    DIFFICULTIES, UP, DOWN, LEFT, RIGHT, OPPOSITES,
+    OCC_RUIN, OCC_SNAKES, OCC_DOG, ITEM_FOOD, PlayerInput, Simulation,
+)
+
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+MAX_TICKS = 20000         # runder der varer længere afbrydes (dødsårsag "timeout")
+DEATH_TIMEOUT = "timeout"
+SURVIVED = "survived"     # "dødsårsag" for den der overlevede i 2-spiller
+PERCENTILES = (0, 10, 25, 50, 75, 90, 100)
+
+
+# --- Politikker ---
+def random_policy(rng):
+    """Drejer i en tilfældig retning ca. hvert 10. tick."""
+    def act(sim, player_idx):
+        if rng.random() < 0.1:
+            return PlayerInput([rng.choice(DIRECTIONS)])
+        return PlayerInput()
+    return act
+
+
+def greedy_policy(rng):
+    """Går mod nærmeste mad ad en celle uden væg, ruin, slange eller hund."""
+    blocked = OCC_RUIN | OCC_SNAKES | OCC_DOG
+
+    def act(sim, player_idx):
+        snake = sim.snake1 if player_idx == 0 else sim.snake2
+        hx, hy = snake.head()
+        foods = [food.pos for food in sim.items.of(ITEM_FOOD)]
+        best = None
+        for dx, dy in DIRECTIONS:
+            if (dx, dy) == OPPOSITES[snake.direction]:
+                continue
+            nx, ny = hx + dx, hy + dy
+            if not (0 <= nx < sim.width and 0 <= ny < sim.height) or sim.grid.has((nx, ny), blocked):
+                continue
+            dist = min((abs(nx - fx) + abs(ny - fy) for fx, fy in foods), default=0)
+            key = (dist, rng.random())
+            if best is None or key < best[0]:
+                best = (key, (dx, dy))
+        return PlayerInput([best[1]] if best else [])
+    return act
+
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+}
+
+
+def load_policy(name):
+    """Politik-fabrik ud fra et navn i POLICIES eller "modul:navn"."""
+    if name in POLICIES:
+        return POLICIES[name]
+    module, sep, attr = name.partition(":")
+    if not sep:
+        raise ValueError(f"ukendt politik: {name!r} (kendte: {', '.join(POLICIES)})")
+    return getattr(importlib.import_module(module), attr)
+
+
+# --- Ét spil (kører i en worker-proces) ---
+def play_game(spec):
+    """Spil én runde. spec = (difficulty, num_players, politik-navne, seed, max_ticks)."""
+    difficulty, num_players, names, seed, max_ticks = spec
+    sim = Simulation()
+    sim.difficulty = difficulty
+    sim.num_players = num_players
+    policies = [load_policy(name)(random.Random(f"{seed}:{pidx}")) for pidx, name in enumerate(names)]
+    sim.new_round(seed)
+    while not sim.over and sim.game_tick < max_ticks:
+        sim.step([policy(sim, pidx) for pidx, policy in enumerate(policies)])
+    snakes = (sim.snake1, sim.snake2)[:num_players]
+    causes = [SURVIVED if snake.alive else snake.death_cause for snake in snakes]
+    if not sim.over:
+        causes = [DEATH_TIMEOUT] * num_players
+        winner = DEATH_TIMEOUT
+    elif num_players == 1:
+        winner = None
+    elif snakes[0].alive == snakes[1].alive:
+        winner = "draw"
+    else:
+        winner = "p1" if snakes[0].alive else "p2"
+    return {
+        "difficulty": difficulty,
+        "num_players": num_players,
+        "policies": list(names),
+        "seed": seed,
+        "scores": sim.scores[:num_players],
+        "ticks": sim.game_tick,
+        "causes": causes,
+        "winner": winner,
+    }
+
+
+# --- Opsummering ---
+def _distribution(values):
+    """Middel, spredning og percentiler for en liste tal."""
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {
+        "mean": round(statistics.fmean(ordered), 3),
+        "stdev": round(statistics.pstdev(ordered), 3),
+        "percentiles": {str(p): ordered[round(last * p / 100)] for p in PERCENTILES},
+    }
+
+
+def summarize(results):
+    """Saml resultaterne per {num_players}p_{difficulty} og politik-opstilling."""
+    groups = {}
+    for result in results:
+        bucket = f"{result['num_players']}p_{result['difficulty']}"
+        groups.setdefault(bucket, {}).setdefault(" vs ".join(result["policies"]), []).append(result)
+    summary = {}
+    for bucket, matchups in sorted(groups.items()):
+        summary[bucket] = {}
+        for matchup, games in sorted(matchups.items()):
+            seats = len(games[0]["policies"])
+            entry = {
+                "difficulty": DIFFICULTIES[games[0]["difficulty"]][0],
+                "games": len(games),
+                "ticks": _distribution([g["ticks"] for g in games]),
+                "seats": [],
+            }
+            for pidx in range(seats):
+                scores = [g["scores"][pidx] for g in games]
+                entry["seats"].append({
+                    "policy": games[0]["policies"][pidx],
+                    "score": _distribution(scores),
+                    "histogram": dict(sorted(Counter(scores).items())),
+                    "death_causes": dict(Counter(g["causes"][pidx] for g in games).most_common()),
+                })
+            if seats == 2:
+                entry["winners"] = dict(Counter(g["winner"] for g in games).most_common())
+            summary[bucket][matchup] = entry
+    return summary
+
+
+# --- Kommandolinje ---
+def build_specs(games, policies, difficulties, modes, seed, max_ticks):
+    """Alle spil i turneringen; seedet følger spillets plads i listen."""
+    specs = []
+    for difficulty in difficulties:
+        for num_players in modes:
+            for names in itertools.product(policies, repeat=num_players):
+                for _ in range(games):
+                    specs.append((difficulty, num_players, names, seed + len(specs), max_ticks))
+    return specs
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snake bot-turnering")
+    parser.add_argument("--games", type=int, default=100, help="spil per opstilling")
+    parser.add_argument("--policies", default="greedy,random",
+                        help="kommasepareret; indbyggede eller modul:navn")
+    parser.add_argument("--difficulties", type=_int_list, default=list(range(len(DIFFICULTIES))),
+                        help="indeks i DIFFICULTIES, fx 0,3 (standard: alle)")
+    parser.add_argument("--players", type=_int_list, default=[1, 2], help="1, 2 eller 1,2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="tournament.json")
+    args = parser.parse_args(argv)
+
+    policies = args.policies.split(",")
+    for name in policies:
+        load_policy(name)  # fejl tidligt, før processerne startes
+    specs = build_specs(args.games, policies, args.difficulties, args.players, args.seed, args.max_ticks)
+    start = time.perf_counter()
+    with Pool(args.workers) as pool:
+        results = list(pool.imap_unordered(play_game, specs, chunksize=max(1, len(specs) // (args.workers * 8))))
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: r["seed"])
+
+    summary = {
+        "games": len(results),
+        "seed": args.seed,
+        "max_ticks": args.max_ticks,
+        "seconds": round(elapsed, 2),
+        "results": summarize(results),
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(f"{len(results)} spil på {elapsed:.1f}s med {args.workers} processer -> {args.out}")
+    for bucket, matchups in summary["results"].items():
+        for matchup, entry in matchups.items():
+            scores = "  ".join(f"{seat['policy']}: {seat['score']['mean']:.1f}" for seat in entry["seats"])
+            print(f"{bucket:5} {entry['difficulty']:7} {matchup:20} score {scores}  "
+                  f"ticks {entry['ticks']['mean']:.0f}")
+
+
+if __name__ == "__main__":
+    main()